@@ -0,0 +1,68 @@
+"""Add full-text search vector to literature items
+
+Revision ID: 4f2a9c7d1e53
+Revises: bce348bd81a5
+Create Date: 2026-10-18 10:12:41.503317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.search import refresh_search_vectors
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c7d1e53'
+down_revision: Union[str, None] = 'bce348bd81a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgresql = bind.dialect.name == "postgresql"
+
+    op.add_column(
+        "literature_items",
+        sa.Column("search_vector", postgresql.TSVECTOR() if is_postgresql else sa.Text(), nullable=True),
+    )
+
+    # Заполняем поисковые документы для уже существующих книг
+    literature_items = sa.table(
+        "literature_items",
+        sa.column("id", sa.Integer),
+        sa.column("title", sa.String),
+        sa.column("description", sa.String),
+        sa.column("search_vector"),
+    )
+    refresh_search_vectors(bind, literature_items)
+
+    if is_postgresql:
+        # GIN-индекс строится без блокировки записи в таблицу
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_literature_items_search_vector",
+                "literature_items",
+                ["search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_literature_items_search_vector", "literature_items", ["search_vector"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_literature_items_search_vector",
+                table_name="literature_items",
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index("ix_literature_items_search_vector", table_name="literature_items")
+    op.drop_column("literature_items", "search_vector")
@@ -0,0 +1,41 @@
+"""Replace transactions user_id index with (user_id, loan_date, id)
+
+Revision ID: 5e8b2f7a9c14
+Revises: a6d3e9b15c82
+Create Date: 2026-10-18 20:31:12.845310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b2f7a9c14'
+down_revision: Union[str, None] = 'a6d3e9b15c82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# История выдач читателя по дате выдачи; префикс user_id заменяет прежний индекс
+NEW_INDEX = ("ix_transactions_user_id_loan_date", ["user_id", "loan_date", "id"])
+OLD_INDEX = ("ix_transactions_user_id", ["user_id"])
+
+
+def replace_index(create, drop) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Новый индекс строится без блокировки записи, старый удаляется только после него
+        with op.get_context().autocommit_block():
+            op.create_index(create[0], "transactions", create[1], postgresql_concurrently=True)
+            op.drop_index(drop[0], table_name="transactions", postgresql_concurrently=True)
+    else:
+        op.create_index(create[0], "transactions", create[1])
+        op.drop_index(drop[0], table_name="transactions")
+
+
+def upgrade() -> None:
+    replace_index(NEW_INDEX, OLD_INDEX)
+
+
+def downgrade() -> None:
+    replace_index(OLD_INDEX, NEW_INDEX)
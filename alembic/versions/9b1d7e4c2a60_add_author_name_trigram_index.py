@@ -0,0 +1,72 @@
+"""Add normalized author name with trigram index
+
+Revision ID: 9b1d7e4c2a60
+Revises: 4f2a9c7d1e53
+Create Date: 2026-10-18 12:40:05.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.search import normalize_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1d7e4c2a60'
+down_revision: Union[str, None] = '4f2a9c7d1e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.add_column("authors", sa.Column("name_normalized", sa.String(), nullable=True))
+
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # То же правило, что normalize_name: нижний регистр, "ё" -> "е", одиночные пробелы
+        op.execute(
+            "UPDATE authors SET name_normalized = "
+            "regexp_replace(btrim(lower(translate(name, 'Ёё', 'Ее'))), '\\s+', ' ', 'g')"
+        )
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_authors_name_normalized_trgm",
+                "authors",
+                ["name_normalized"],
+                postgresql_using="gin",
+                postgresql_ops={"name_normalized": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+    else:
+        authors = sa.table(
+            "authors",
+            sa.column("id", sa.Integer),
+            sa.column("name", sa.String),
+            sa.column("name_normalized", sa.String),
+        )
+        rows = bind.execute(sa.select(authors.c.id, authors.c.name)).all()
+        if rows:
+            bind.execute(
+                authors.update().where(authors.c.id == sa.bindparam("row_id")).values(
+                    name_normalized=sa.bindparam("normalized")
+                ),
+                [{"row_id": row.id, "normalized": normalize_name(row.name)} for row in rows],
+            )
+        op.create_index("ix_authors_name_normalized_trgm", "authors", ["name_normalized"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_authors_name_normalized_trgm",
+                table_name="authors",
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index("ix_authors_name_normalized_trgm", table_name="authors")
+    op.drop_column("authors", "name_normalized")
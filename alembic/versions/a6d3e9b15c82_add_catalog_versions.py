@@ -0,0 +1,37 @@
+"""Add literature item versions and catalog_versions table
+
+Revision ID: a6d3e9b15c82
+Revises: f1c4a8b27d39
+Create Date: 2026-10-18 19:42:07.531904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9b15c82'
+down_revision: Union[str, None] = 'f1c4a8b27d39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "literature_items",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    catalog_versions = op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(catalog_versions, [{"name": "literature_items", "version": 1}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_versions")
+    op.drop_column("literature_items", "version")
@@ -0,0 +1,63 @@
+"""Add indexes for loans, author bibliographies and genre filter
+
+Revision ID: c3e8f1a26b94
+Revises: 9b1d7e4c2a60
+Create Date: 2026-10-18 15:05:37.402911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f1a26b94'
+down_revision: Union[str, None] = '9b1d7e4c2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Частичные индексы покрывают только невозвращенные книги: лимит выдач и поиск просрочек
+ACTIVE_LOANS = sa.text("return_date IS NULL")
+
+INDEXES = [
+    ("ix_transactions_user_id", "transactions", ["user_id"], {}),
+    ("ix_transactions_literature_item_id", "transactions", ["literature_item_id"], {}),
+    ("ix_transactions_active_user_id", "transactions", ["user_id"], {
+        "postgresql_where": ACTIVE_LOANS,
+        "sqlite_where": ACTIVE_LOANS,
+    }),
+    ("ix_transactions_active_due_date", "transactions", ["due_date"], {
+        "postgresql_where": ACTIVE_LOANS,
+        "sqlite_where": ACTIVE_LOANS,
+    }),
+    ("ix_literature_items_author_id", "literature_items", ["author_id"], {}),
+    # Фильтр по жанру — ILIKE '%...%', в PostgreSQL его ускоряет только триграммный индекс
+    ("ix_literature_items_genre_trgm", "literature_items", ["genre"], {
+        "postgresql_using": "gin",
+        "postgresql_ops": {"genre": "gin_trgm_ops"},
+    }),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Индексы строятся без блокировки записи в таблицы
+        with op.get_context().autocommit_block():
+            for name, table_name, columns, options in INDEXES:
+                op.create_index(name, table_name, columns, postgresql_concurrently=True, **options)
+    else:
+        for name, table_name, columns, options in INDEXES:
+            op.create_index(name, table_name, columns, **options)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table_name, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table_name, postgresql_concurrently=True)
+    else:
+        for name, table_name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table_name)
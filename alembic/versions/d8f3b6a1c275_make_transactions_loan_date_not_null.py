@@ -0,0 +1,64 @@
+"""Make transactions.loan_date NOT NULL
+
+Revision ID: d8f3b6a1c275
+Revises: 5e8b2f7a9c14
+Create Date: 2026-10-19 10:14:52.306418
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.transaction import LOAN_PERIOD
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b6a1c275'
+down_revision: Union[str, None] = '5e8b2f7a9c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+transactions = sa.table(
+    "transactions",
+    sa.column("id", sa.Integer),
+    sa.column("loan_date", sa.DateTime),
+    sa.column("due_date", sa.DateTime),
+    sa.column("return_date", sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Выдачи без даты восстанавливаются по сроку возврата, иначе по дате возврата или текущему времени
+    rows = bind.execute(
+        sa.select(transactions.c.id, transactions.c.due_date, transactions.c.return_date)
+        .where(transactions.c.loan_date.is_(None))
+    ).all()
+    now = datetime.utcnow()
+    backfill = [
+        {
+            "row_id": row.id,
+            "value": row.due_date - LOAN_PERIOD if row.due_date is not None else row.return_date or now,
+        }
+        for row in rows
+    ]
+    update = (
+        transactions.update()
+        .where(transactions.c.id == sa.bindparam("row_id"))
+        .values(loan_date=sa.bindparam("value"))
+    )
+    for start in range(0, len(backfill), BATCH_SIZE):
+        bind.execute(update, backfill[start:start + BATCH_SIZE])
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.alter_column("loan_date", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.alter_column("loan_date", existing_type=sa.DateTime(), nullable=True)
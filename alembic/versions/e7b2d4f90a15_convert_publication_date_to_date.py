@@ -0,0 +1,134 @@
+"""Convert literature_items.publication_date to DATE
+
+Revision ID: e7b2d4f90a15
+Revises: c3e8f1a26b94
+Create Date: 2026-10-18 16:42:10.775031
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.dates import parse_publication_date
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2d4f90a15'
+down_revision: Union[str, None] = 'c3e8f1a26b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 10000
+# Сколько неразобранных строк выводить в лог; все они сохраняются в literature_item_unparsed_dates
+REPORTED_ROWS = 50
+
+literature_items = sa.table(
+    "literature_items",
+    sa.column("id", sa.Integer),
+    sa.column("publication_date", sa.String),
+    sa.column("publication_date_parsed", sa.Date),
+)
+
+
+def create_publication_date_index(is_postgresql: bool) -> None:
+    if is_postgresql:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_literature_items_publication_date_id",
+                "literature_items",
+                ["publication_date", "id"],
+                postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_literature_items_publication_date_id", "literature_items", ["publication_date", "id"])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    op.add_column("literature_items", sa.Column("publication_date_parsed", sa.Date(), nullable=True))
+    unparsed_dates = op.create_table(
+        "literature_item_unparsed_dates",
+        sa.Column("literature_item_id", sa.Integer(), nullable=False),
+        sa.Column("publication_date", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["literature_item_id"], ["literature_items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("literature_item_id"),
+    )
+
+    # Разбор существующих строк тем же парсером, что использует приложение
+    rows = bind.execute(
+        sa.select(literature_items.c.id, literature_items.c.publication_date)
+        .where(literature_items.c.publication_date.is_not(None))
+    ).all()
+    parsed, unparsed = [], []
+    for row in rows:
+        try:
+            value = parse_publication_date(row.publication_date)
+        except ValueError:
+            unparsed.append({"literature_item_id": row.id, "publication_date": row.publication_date})
+            continue
+        if value is not None:
+            parsed.append({"row_id": row.id, "parsed": value})
+
+    update = (
+        literature_items.update()
+        .where(literature_items.c.id == sa.bindparam("row_id"))
+        .values(publication_date_parsed=sa.bindparam("parsed"))
+    )
+    for start in range(0, len(parsed), BATCH_SIZE):
+        bind.execute(update, parsed[start:start + BATCH_SIZE])
+    for start in range(0, len(unparsed), BATCH_SIZE):
+        bind.execute(unparsed_dates.insert(), unparsed[start:start + BATCH_SIZE])
+
+    # Отчёт о строках, которые не удалось разобрать
+    logger.info("publication_date: %d values converted, %d unparseable", len(parsed), len(unparsed))
+    for row in unparsed[:REPORTED_ROWS]:
+        logger.warning(
+            "publication_date: literature item %d has unparseable value %r",
+            row["literature_item_id"], row["publication_date"],
+        )
+    if len(unparsed) > REPORTED_ROWS:
+        logger.warning(
+            "publication_date: %d more unparseable values, see literature_item_unparsed_dates",
+            len(unparsed) - REPORTED_ROWS,
+        )
+
+    with op.batch_alter_table("literature_items") as batch_op:
+        batch_op.drop_column("publication_date")
+        batch_op.alter_column("publication_date_parsed", new_column_name="publication_date")
+
+    create_publication_date_index(bind.dialect.name == "postgresql")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_literature_items_publication_date_id",
+                table_name="literature_items",
+                postgresql_concurrently=True,
+            )
+    else:
+        op.drop_index("ix_literature_items_publication_date_id", table_name="literature_items")
+
+    op.add_column("literature_items", sa.Column("publication_date_text", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE literature_items SET publication_date_text = CAST(publication_date AS VARCHAR) "
+        "WHERE publication_date IS NOT NULL"
+    )
+    # Исходные строки, которые не удалось разобрать, возвращаются как были
+    op.execute(
+        "UPDATE literature_items SET publication_date_text = ("
+        "SELECT u.publication_date FROM literature_item_unparsed_dates u "
+        "WHERE u.literature_item_id = literature_items.id"
+        ") WHERE id IN (SELECT literature_item_id FROM literature_item_unparsed_dates)"
+    )
+    op.drop_table("literature_item_unparsed_dates")
+
+    with op.batch_alter_table("literature_items") as batch_op:
+        batch_op.drop_column("publication_date")
+        batch_op.alter_column("publication_date_text", new_column_name="publication_date")
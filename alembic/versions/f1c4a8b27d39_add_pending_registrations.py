@@ -0,0 +1,35 @@
+"""Add pending_registrations table
+
+Revision ID: f1c4a8b27d39
+Revises: e7b2d4f90a15
+Create Date: 2026-10-18 18:20:54.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4a8b27d39'
+down_revision: Union[str, None] = 'e7b2d4f90a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pending_registrations",
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("username"),
+    )
+    op.create_index(op.f("ix_pending_registrations_expires_at"), "pending_registrations", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_pending_registrations_expires_at"), table_name="pending_registrations")
+    op.drop_table("pending_registrations")
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from app.core.cache import literature_item_cache, principal_cache, query_cache
+from app.core.security import Principal
+from app.db.pool import pool_stats
+from app.db.session import async_engine, engine
+from app.dependencies import get_current_admin
+from app.schemas.admin import CachesStatsResponse, PoolsStatsResponse
+
+router = APIRouter()
+
+# Счётчики кэшей приложения (только для администратора).
+@router.get("/cache", response_model=CachesStatsResponse)
+async def get_cache_stats(current_admin: Principal = Depends(get_current_admin)):
+    return {
+        "caches": {
+            "literature_items": literature_item_cache.stats().as_dict(),
+            "principals": principal_cache.stats().as_dict(),
+            "query_results": query_cache.stats().as_dict(),
+        }
+    }
+
+# Состояние пулов соединений текущего процесса (только для администратора):
+# занятые соединения, соединения сверх пула, ожидание и тайм-ауты получения соединения.
+@router.get("/pool", response_model=PoolsStatsResponse)
+async def get_pool_stats(current_admin: Principal = Depends(get_current_admin)):
+    return {
+        "pools": {
+            "async": pool_stats(async_engine),
+            "sync": pool_stats(engine),
+        }
+    }
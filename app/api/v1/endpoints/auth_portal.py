@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from app.core.security import verify_user_credentials, generate_auth_token
 from app.core.config import settings
@@ -11,7 +11,7 @@ router = APIRouter()
 
 # Аутентификация пользователя.
 @router.post("/login", response_model=AuthToken)
-def authenticate_user(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def authenticate_user(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
 
     # Проверяем, что имя пользователя и пароль не пустые
     if not login_data.username or not login_data.password:
@@ -20,7 +20,7 @@ def authenticate_user(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="Incorrect username or password",
         )
 
-    user = verify_user_credentials(db, login_data.username, login_data.password)
+    user = await verify_user_credentials(db, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=400,
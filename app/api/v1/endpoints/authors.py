@@ -1,71 +1,170 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
-from app.models import Author, User
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+from app.models import Author, LiteratureItem
 from app.db.session import get_db
-from app.dependencies import get_current_user
-from app.schemas.author import AuthorResponse, AuthorCreate
-from app.schemas.literature_item import LiteratureItemResponse
+from app.core.search import WORD_SIMILARITY_THRESHOLD, normalize_name, word_similarity
+from app.core.pagination import (
+    decode_cursor, encode_cursor, ensure_single_pagination_mode, keyset_after, set_next_page_headers
+)
+from app.core.cache import CachedPage, query_cache
+from app.core.invalidation import publish_changes
+from app.core.responses import dump_json, json_response, raw_json_response
+from app.core.security import Principal
+from app.dependencies import get_current_admin
+from app.models.literature_item import LITERATURE_ITEM_RESPONSE_COLUMNS
+from app.schemas.author import (
+    AuthorResponse, AuthorCreate, AuthorSummaryResponse, author_summaries_adapter, authors_adapter
+)
+from app.schemas.literature_item import LiteratureItemResponse, literature_items_adapter
 
-from typing import List
+from typing import List, Union
 
 router = APIRouter()
 
-# Функция для проверки, является ли пользователь администратором
-def get_current_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":  # Проверяем роль пользователя
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Требуется роль администратора для выполнения этого действия."
-        )
-    return current_user
+# Связи, которые можно встроить в список авторов через параметр include
+AUTHOR_INCLUDES = {"literature_items"}
 
 # Получение списка авторов с возможностью фильтрации.
-@router.get("/", response_model=List[AuthorResponse])
+@router.get("/", response_model=Union[List[AuthorResponse], List[AuthorSummaryResponse]])
 async def get_authors(
-    db: Session = Depends(get_db),
-    name: str | None = Query(None, description="Фильтр по имени или фамилии автора"),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    name: str | None = Query(None, description="Нечёткий поиск по имени автора (допускаются опечатки)"),
+    include: str | None = Query(None, description="Встроить связанные данные: literature_items"),
     limit: int = Query(10, ge=1, le=100, description="Количество записей на страницу"),
-    offset: int = Query(0, ge=0, description="Смещение от начала списка")
+    offset: int = Query(0, ge=0, description="Смещение от начала списка"),
+    cursor: str | None = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor")
 ):
-    query = db.query(Author)
+    ensure_single_pagination_mode(cursor, offset)
+    if include is not None and include not in AUTHOR_INCLUDES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректное значение параметра include"
+        )
+
+    if include == "literature_items":
+        # Книги всех авторов страницы загружаются одним дополнительным запросом
+        query = select(Author).options(selectinload(Author.literature_items))
+        adapter = authors_adapter
+    else:
+        # Без include список книг не загружается, а поле literature_items не выводится
+        query = select(Author).options(noload(Author.literature_items))
+        adapter = author_summaries_adapter
+
+    # Результаты нечёткого поиска упорядочены по релевантности, курсор к ним неприменим
+    if name and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Курсорная пагинация недоступна при поиске по имени"
+        )
+
+    # Стабильный порядок по первичному ключу: курсор продолжает выдачу без пропусков и дублей
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, [int])
+        query = query.where(keyset_after([Author.id], [last_id]))
+
+    # Встроенные книги делают страницу зависимой и от записей в literature_items
+    tables = ("authors", "literature_items") if include else ("authors",)
+    key = query_cache.key("authors", tables, {
+        "name": name, "include": include, "limit": limit, "offset": offset, "cursor": cursor
+    })
     if name:
-        # Разделяем имя на части (если они есть)
-        name_parts = name.split()
-        if len(name_parts) == 2:
-            # Фильтруем по фамилии (вторая часть строки)
-            query = query.filter(Author.name.ilike(f"%{name_parts[1]}%"))
-        else:
-            # Если передано только одно слово (например, фамилия)
-            query = query.filter(Author.name.ilike(f"%{name}%"))
-    authors = query.offset(offset).limit(limit).all()
-    return authors
-
-# Получение всех книг автора по его ID.
+        page = await query_cache.get_or_compute(
+            key, lambda: search_authors_page(db, adapter, query, name, limit, offset)
+        )
+    else:
+        page = await query_cache.get_or_compute(key, lambda: load_authors_page(db, adapter, query, limit, offset))
+
+    set_next_page_headers(request, response, page.next_cursor)
+    return raw_json_response(page.body, response)
+
+async def load_authors_page(db: AsyncSession, adapter, query, limit: int, offset: int) -> CachedPage:
+    if offset:
+        query = query.offset(offset)
+    # Лишняя запись показывает, есть ли следующая страница, без подсчёта строк
+    result = await db.execute(query.order_by(Author.id).limit(limit + 1))
+    authors = result.scalars().all()
+
+    next_cursor = encode_cursor([authors[limit - 1].id]) if len(authors) > limit else None
+    return CachedPage(dump_json(adapter, authors[:limit]), next_cursor=next_cursor)
+
+async def search_authors_page(db: AsyncSession, adapter, query, name: str, limit: int, offset: int) -> CachedPage:
+    return CachedPage(dump_json(adapter, await search_authors_by_name(db, query, name, limit, offset)))
+
+# Нечёткий поиск автора по имени: лучшие совпадения первыми, опечатки допускаются
+async def search_authors_by_name(db: AsyncSession, query, name: str, limit: int, offset: int):
+    normalized = normalize_name(name)
+    if not normalized:
+        return []
+
+    if db.bind.dialect.name == "postgresql":
+        # Оператор <% использует GIN-индекс по триграммам name_normalized
+        score = func.word_similarity(normalized, Author.name_normalized)
+        result = await db.execute(
+            query.where(literal(normalized).op("<%")(Author.name_normalized))
+            .order_by(score.desc(), func.similarity(Author.name_normalized, normalized).desc(), Author.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    # Резервный вариант без pg_trgm: ранжирование в Python
+    result = await db.execute(select(Author.id, Author.name_normalized))
+    scored = sorted(
+        (
+            (-score, author_id)
+            for author_id, name_normalized in result.all()
+            if (score := word_similarity(normalized, name_normalized or "")) >= WORD_SIMILARITY_THRESHOLD
+        )
+    )
+    page_ids = [author_id for _, author_id in scored[offset:offset + limit]]
+    if not page_ids:
+        return []
+    result = await db.execute(query.where(Author.id.in_(page_ids)))
+    authors = {author.id: author for author in result.scalars().all()}
+    return [authors[author_id] for author_id in page_ids]
+
+# Получение книг автора по его ID с постраничной выдачей.
 @router.get("/{author_id}/literature_items", response_model=List[LiteratureItemResponse])
 async def get_literature_items_for_author(
     author_id: int,  # Параметр пути для получения литературы конкретного автора
-    db: Session = Depends(get_db)  # Получаем сессию БД
+    db: AsyncSession = Depends(get_db),  # Получаем сессию БД
+    limit: int = Query(10, ge=1, le=100, description="Количество записей на страницу"),
+    offset: int = Query(0, ge=0, description="Смещение от начала списка")
 ):
-    # Запрашиваем автора по ID
-    author = db.query(Author).filter(Author.id == author_id).first()
+    # Запрашиваем только нужную страницу библиографии, не загружая её целиком
+    result = await db.execute(
+        select(*LITERATURE_ITEM_RESPONSE_COLUMNS)
+        .where(LiteratureItem.author_id == author_id)
+        .order_by(LiteratureItem.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    literature_items = result.all()
 
-    # Если автор не найден, возвращаем ошибку 404
-    if not author:
-        raise HTTPException(status_code=404, detail="Author not found")
+    # Существование автора проверяем отдельно, только если страница пуста
+    if not literature_items:
+        author_exists = await db.scalar(select(Author.id).where(Author.id == author_id))
+        if author_exists is None:
+            raise HTTPException(status_code=404, detail="Author not found")
 
-    # Возвращаем литературу, принадлежащую автору (используем связь между моделями)
-    return author.literature_items
+    return json_response(literature_items_adapter, literature_items)
 
 # Создание нового автора (только для администратора).
 @router.post("/", response_model=AuthorResponse)
 async def create_author(
     author_data: AuthorCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     author = Author(name=author_data.name, bio=author_data.bio)
     db.add(author)
-    db.commit()
-    db.refresh(author)
+    await db.commit()
+    await db.refresh(author)
+    await publish_changes("authors", [author.id])
 
-    return AuthorResponse(**author.__dict__)
\ No newline at end of file
+    # У нового автора ещё нет книг: связь не загружаем
+    return AuthorResponse(id=author.id, name=author.name, bio=author.bio)
\ No newline at end of file
@@ -1,82 +1,322 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
-from app.models import LiteratureItem, User
-from app.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import LiteratureItem
+from app.models.literature_item import LITERATURE_ITEM_RESPONSE_COLUMNS
+from app.core.security import Principal
+from app.dependencies import get_current_admin
 from app.db.session import get_db
-from app.schemas.literature_item import LiteratureItemResponse, LiteratureItemCreate
+from app.core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    ensure_single_pagination_mode,
+    keyset_after,
+    keyset_segments_nulls,
+    set_next_page_headers,
+)
+from app.core.cache import CachedPage, literature_item_cache, query_cache
+from app.core.invalidation import publish_changes
+from app.core.etag import bump_catalog_version, etag_matches, get_catalog_version, make_etag, not_modified
+from app.core.responses import dump_json, raw_json_response
+from app.core.search import (
+    build_snippet, query_lexemes, rank_document, regconfig, search_query_expression, search_vector_value
+)
+from app.core.catalog_export import EXPORT_COLUMNS, EXPORT_FORMATS, accepts_gzip, gzip_stream, stream_rows
+from app.core.catalog_import import (
+    IMPORT_CHUNK_SIZE, IMPORT_FORMATS, CatalogImporter, detect_format, iter_lines, iter_records
+)
+from app.schemas.literature_item import (
+    LiteratureItemResponse, LiteratureItemCreate, LiteratureSearchResult, CatalogImportResponse,
+    literature_items_adapter,
+)
 
-from typing import List
+from datetime import date
+from typing import List, Literal
 
 router = APIRouter()
 
-# Функция для проверки, является ли пользователь администратором
-def get_current_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":  # Проверяем роль пользователя
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Требуется роль администратора для выполнения этого действия."
-        )
-    return current_user
+# Фильтры списка книг, общие для постраничной выдачи и выгрузки
+def filter_items(
+    query,
+    title: str | None,
+    genre: str | None,
+    publication_date: date | None,
+    published_from: date | None = None,
+    published_to: date | None = None,
+):
+    if title:
+        query = query.where(LiteratureItem.title.ilike(f"%{title}%"))
+    if genre:
+        query = query.where(LiteratureItem.genre.ilike(f"%{genre}%"))
+    if publication_date:
+        query = query.where(LiteratureItem.publication_date == publication_date)
+    if published_from:
+        query = query.where(LiteratureItem.publication_date >= published_from)
+    if published_to:
+        query = query.where(LiteratureItem.publication_date <= published_to)
+    return query
+
+# Порядок выдачи: по ID или по дате публикации (книги без даты — в конце, при убывании — в начале)
+ITEM_SORTS = Literal["id", "publication_date", "-publication_date"]
+
+def parse_optional_date(value) -> date | None:
+    return None if value is None else date.fromisoformat(value)
 
 # Получение списка книг с фильтрацией по названию, жанру и дате публикации.
 @router.get("/", response_model=List[LiteratureItemResponse])
 async def get_items(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     title: str | None = Query(None, description="Фильтр по названию"),
     genre: str | None = Query(None, description="Фильтр по жанру"),
-    publication_date: str | None = Query(None, description="Фильтр по дате публикации"),
+    publication_date: date | None = Query(None, description="Фильтр по дате публикации"),
+    published_from: date | None = Query(None, description="Опубликованы не раньше этой даты"),
+    published_to: date | None = Query(None, description="Опубликованы не позже этой даты"),
+    sort: ITEM_SORTS = Query("id", description="Сортировка: id, publication_date или -publication_date"),
+    limit: int = Query(10, ge=1, le=100, description="Количество записей на страницу"),
+    offset: int = Query(0, ge=0, description="Смещение от начала списка"),
+    cursor: str | None = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor")
+):
+    ensure_single_pagination_mode(cursor, offset)
+    query = filter_items(
+        select(*LITERATURE_ITEM_RESPONSE_COLUMNS), title, genre, publication_date, published_from, published_to
+    )
+
+    # Стабильный порядок с первичным ключом в конце: курсор продолжает выдачу без пропусков и дублей.
+    # Порядок по дате совпадает с прямым или обратным просмотром индекса (publication_date, id)
+    if sort == "id":
+        if cursor is not None:
+            (last_id,) = decode_cursor(cursor, [int])
+            query = query.where(keyset_after([LiteratureItem.id], [last_id]))
+        segments = [query.order_by(LiteratureItem.id)]
+    else:
+        descending = sort.startswith("-")
+        if cursor is None:
+            if descending:
+                order_by = [LiteratureItem.publication_date.desc().nulls_first(), LiteratureItem.id.desc()]
+            else:
+                order_by = [LiteratureItem.publication_date.asc().nulls_last(), LiteratureItem.id]
+            segments = [query.order_by(*order_by)]
+        else:
+            cursor_values = decode_cursor(cursor, [parse_optional_date, int])
+            segments = [
+                query.where(condition).order_by(*order_by)
+                for condition, order_by in keyset_segments_nulls(
+                    LiteratureItem.publication_date, LiteratureItem.id, cursor_values, descending
+                )
+            ]
+    if cursor is None:
+        segments = [segment.offset(offset) for segment in segments]
+
+    # Условный запрос сверяется с версией каталога до кэша: при промахе страница не читается из БД
+    if request.headers.get("if-none-match"):
+        etag = await items_list_etag(db)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    # Популярные сочетания фильтров отдаются из кэша готовыми байтами вместе с ETag страницы
+    key = query_cache.key("literature_items", ("literature_items",), {
+        "title": title,
+        "genre": genre,
+        "publication_date": publication_date,
+        "published_from": published_from,
+        "published_to": published_to,
+        "sort": sort,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+    })
+    page = await query_cache.get_or_compute(key, lambda: load_items_page(db, segments, sort, limit))
+    if etag_matches(request, page.etag):
+        return not_modified(page.etag)
+
+    set_next_page_headers(request, response, page.next_cursor)
+    response.headers["ETag"] = page.etag
+    return raw_json_response(page.body, response)
+
+# ETag списка книг — версия каталога: общий для всех фильтров и страниц
+async def items_list_etag(db: AsyncSession) -> str:
+    return make_etag("literature-items", await get_catalog_version(db))
+
+async def load_items_page(db: AsyncSession, segments: list, sort: str, limit: int) -> CachedPage:
+    # ETag списка — версия каталога, прочитанная до запроса страницы: запись, попавшая между ними,
+    # даст страницу новее тега, а не устаревшую страницу под новым тегом
+    etag = await items_list_etag(db)
+
+    # Лишняя запись показывает, есть ли следующая страница, без подсчёта строк.
+    # Следующий сегмент читается, только если текущий закончился раньше страницы
+    items = []
+    for segment in segments:
+        result = await db.execute(segment.limit(limit + 1 - len(items)))
+        items += result.all()
+        if len(items) > limit:
+            break
+
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        next_cursor = encode_cursor([last.id] if sort == "id" else [last.publication_date, last.id])
+    return CachedPage(dump_json(literature_items_adapter, items[:limit]), etag, next_cursor)
+
+# Выгрузка всего каталога одним запросом в NDJSON или CSV с теми же фильтрами, что у списка книг.
+# Ответ отдаётся потоком; при Accept-Encoding: gzip сжимается на лету
+@router.get("/export")
+async def export_items(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", description="ndjson или csv"),
+    title: str | None = Query(None, description="Фильтр по названию"),
+    genre: str | None = Query(None, description="Фильтр по жанру"),
+    publication_date: date | None = Query(None, description="Фильтр по дате публикации"),
+    published_from: date | None = Query(None, description="Опубликованы не раньше этой даты"),
+    published_to: date | None = Query(None, description="Опубликованы не позже этой даты"),
+):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Неподдерживаемый формат выгрузки")
+
+    query = filter_items(
+        select(*(getattr(LiteratureItem, name) for name in EXPORT_COLUMNS)),
+        title, genre, publication_date, published_from, published_to,
+    ).order_by(LiteratureItem.id)
+
+    body = stream_rows(query, export_format)
+    headers = {
+        "Content-Disposition": f'attachment; filename="literature_items.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_FORMATS[export_format], headers=headers)
+
+# Полнотекстовый поиск по названию и описанию с ранжированием по релевантности.
+@router.get("/search", response_model=List[LiteratureSearchResult])
+async def search_literature_items(
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, description="Поисковый запрос"),
     limit: int = Query(10, ge=1, le=100, description="Количество записей на страницу"),
     offset: int = Query(0, ge=0, description="Смещение от начала списка")
 ):
-    query = db.query(LiteratureItem)
-    
-    if title:
-        query = query.filter(LiteratureItem.title.ilike(f"%{title}%"))
-    if genre:
-        query = query.filter(LiteratureItem.genre.ilike(f"%{genre}%"))
-    if publication_date:
-        query = query.filter(LiteratureItem.publication_date == publication_date)
-    
-    # Добавим проверку на дублирование или фильтрацию по всем полям
-    items = query.offset(offset).limit(limit).all()
-    
-    return items
+    if db.bind.dialect.name == "postgresql":
+        tsquery = search_query_expression(q)
+        rank = func.ts_rank_cd(LiteratureItem.search_vector, tsquery)
+        snippet = func.ts_headline(
+            regconfig("russian"),
+            func.coalesce(LiteratureItem.description, LiteratureItem.title),
+            tsquery,
+            "MaxWords=20, MinWords=5, StartSel=<b>, StopSel=</b>",
+        )
+        result = await db.execute(
+            select(LiteratureItem, rank.label("rank"), snippet.label("snippet"))
+            .where(LiteratureItem.search_vector.op("@@")(tsquery))
+            .order_by(rank.desc(), LiteratureItem.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        matches = result.all()
+    else:
+        matches = await search_with_fallback_index(db, q, limit, offset)
+
+    return [
+        LiteratureSearchResult(
+            **LiteratureItemResponse.model_validate(item).model_dump(),
+            rank=rank,
+            snippet=snippet,
+        )
+        for item, rank, snippet in matches
+    ]
+
+# Резервный поиск для СУБД без tsvector (SQLite): отбор по лексемам, ранжирование в Python
+async def search_with_fallback_index(db: AsyncSession, q: str, limit: int, offset: int):
+    terms = query_lexemes(q)
+    if not terms:
+        return []
+
+    query = select(LiteratureItem, LiteratureItem.search_vector)
+    for term in terms:
+        query = query.where(LiteratureItem.search_vector.contains(f" {term}:", autoescape=True))
+    result = await db.execute(query)
+
+    ranked = sorted(
+        ((item, rank_document(document, terms)) for item, document in result.all()),
+        key=lambda match: (-match[1], match[0].id),
+    )
+    return [
+        (item, rank, build_snippet(item.description or item.title, terms))
+        for item, rank in ranked[offset:offset + limit]
+    ]
 
 # Получение информации о книге по её ID.
 @router.get("/literature_items/{literature_id}", response_model=LiteratureItemResponse)
 async def get_literature_item_by_id(
-    literature_id: int, db: Session = Depends(get_db)
+    literature_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
 ):
-    literature_item = db.query(LiteratureItem).filter(LiteratureItem.id == literature_id).first()
+    # Карточки книг меняются редко, поэтому сначала смотрим в кэш
+    cached_item = literature_item_cache.get(literature_id)
+    if cached_item is not None:
+        etag, item_data = cached_item
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return item_data
+
+    # Поколение запоминается до чтения: если книгу изменят во время запроса,
+    # прочитанная устаревшая карточка не попадёт в кэш
+    generation = literature_item_cache.generation(literature_id)
+
+    # Условный запрос проверяется по одной версии строки, без чтения всей карточки
+    if request.headers.get("if-none-match"):
+        version = await db.scalar(select(LiteratureItem.version).where(LiteratureItem.id == literature_id))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Literature item not found")
+        etag = make_etag("literature-item", literature_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    result = await db.execute(select(LiteratureItem).where(LiteratureItem.id == literature_id))
+    literature_item = result.scalars().first()
     if not literature_item:
         raise HTTPException(status_code=404, detail="Literature item not found")
-    return literature_item
+
+    etag = make_etag("literature-item", literature_id, literature_item.version)
+    item_data = LiteratureItemResponse.model_validate(literature_item).model_dump()
+    literature_item_cache.set(literature_id, (etag, item_data), generation)
+    response.headers["ETag"] = etag
+    return item_data
 
 # Обновление информации о книге по её ID (только для администратора).
 @router.put("/literature_items/{literature_id}", response_model=LiteratureItemResponse)
 async def update_literature_item(
     literature_id: int,
     literature_item_data: LiteratureItemCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Используем проверку на администратора
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)  # Используем проверку на администратора
 ):
-    literature_item = db.query(LiteratureItem).filter(LiteratureItem.id == literature_id).first()
+    result = await db.execute(select(LiteratureItem).where(LiteratureItem.id == literature_id))
+    literature_item = result.scalars().first()
     if not literature_item:
         raise HTTPException(status_code=404, detail="Literature item not found")
     
     # Обновление данных о книге
     literature_item.title = literature_item_data.title
     literature_item.description = literature_item_data.description
-    db.commit()
-    db.refresh(literature_item)
+    literature_item.search_vector = search_vector_value(
+        db.bind.dialect.name, literature_item_data.title, literature_item_data.description
+    )
+    literature_item.version = LiteratureItem.version + 1
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(literature_item)
+    await publish_changes("literature_items", [literature_id])
     return literature_item
 
 # Создание новой книги (только для администратора).
 @router.post("/literature_items", response_model=LiteratureItemResponse)
 async def create_literature_item(
     literature_item_data: LiteratureItemCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
     # Создаем новый объект литературы с учётом всех полей
     literature_item = LiteratureItem(
@@ -84,36 +324,54 @@ async def create_literature_item(
         description=literature_item_data.description,
         genre=literature_item_data.genre,
         publication_date=literature_item_data.publication_date,
-        author_id=literature_item_data.author_id
+        author_id=literature_item_data.author_id,
+        search_vector=search_vector_value(
+            db.bind.dialect.name, literature_item_data.title, literature_item_data.description
+        )
     )
 
     db.add(literature_item)
-    db.commit()
-    db.refresh(literature_item)
+    await bump_catalog_version(db)
+    await db.commit()
+    await db.refresh(literature_item)
+    await publish_changes("literature_items", [literature_item.id])
     
     # Возвращаем данные с использованием схемы LiteratureItemResponse
-    return LiteratureItemResponse(
-        id=literature_item.id,
-        title=literature_item.title,
-        description=literature_item.description,
-        genre=literature_item.genre,
-        publication_date=literature_item.publication_date,
-        available_copies=literature_item.available_copies,
-        author_id=literature_item.author_id
-    )
+    return LiteratureItemResponse.model_validate(literature_item)
+
+# Потоковый импорт каталога из NDJSON или CSV (только для администратора).
+# Тело запроса читается по частям, книги записываются пачками, ошибки строк попадают в отчёт
+@router.post("/import", response_model=CatalogImportResponse)
+async def import_catalog(
+    request: Request,
+    import_format: str | None = Query(None, alias="format", description="ndjson или csv; по умолчанию по Content-Type"),
+    chunk_size: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=50000, description="Размер пачки"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    import_format = import_format or detect_format(request.headers.get("content-type"))
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Неподдерживаемый формат импорта")
+
+    importer = CatalogImporter(db, chunk_size=chunk_size)
+    report = await importer.run(iter_records(iter_lines(request.stream()), import_format))
+    return report.as_dict()
 
 # Удаление книги по ID (только для администратора).
 @router.delete("/literature_items/{literature_id}", response_model=LiteratureItemResponse)
 async def delete_literature_item(
     literature_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_admin: Principal = Depends(get_current_admin)
 ):
-    literature_item = db.query(LiteratureItem).filter(LiteratureItem.id == literature_id).first()
+    result = await db.execute(select(LiteratureItem).where(LiteratureItem.id == literature_id))
+    literature_item = result.scalars().first()
     if not literature_item:
         raise HTTPException(status_code=404, detail="Literature item not found")
     
-    db.delete(literature_item)
-    db.commit()
-    return LiteratureItemResponse(**literature_item.__dict__)
+    await db.delete(literature_item)
+    await bump_catalog_version(db)
+    await db.commit()
+    await publish_changes("literature_items", [literature_id])
+    return LiteratureItemResponse.model_validate(literature_item)
 
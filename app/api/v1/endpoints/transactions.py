@@ -1,168 +1,448 @@
 import logging
-from fastapi import APIRouter, HTTPException, Depends, status, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status, Body
+from sqlalchemy import DateTime, Integer, String, bindparam, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.models.transaction import Transaction
-from app.schemas.transactions import TransactionResponse, IssueBookResponse, ReturnBookResponse
-from app.models import LiteratureItem, User
-from app.dependencies import get_current_user
-from datetime import datetime
-from typing import List
-from app.core.logging import logger
+from app.models.transaction import LOAN_PERIOD, Transaction
+from app.schemas.transactions import (
+    TransactionResponse,
+    IssueBookResponse,
+    ReturnBookResponse,
+    BatchIssueRequest,
+    BatchIssueResponse,
+    BatchIssueResult,
+    BatchReturnRequest,
+    BatchReturnResponse,
+    BatchReturnResult,
+    TransactionWithBookResponse,
+    transactions_adapter,
+    transactions_with_book_adapter,
+)
+from app.models import Author, LiteratureItem, User
+from app.core.pagination import decode_cursor, encode_cursor, keyset_before, set_next_page_headers
+from app.core.responses import json_response
+from app.core.security import Principal
+from app.dependencies import get_current_admin, get_current_user
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Union
+from app.core.invalidation import publish_changes
+from app.core.etag import bump_catalog_version
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler("app.log")
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
 router = APIRouter()
 
-# Функция для проверки, является ли пользователь администратором.
-def get_current_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
+# Максимальное число невозвращенных книг у читателя
+MAX_ACTIVE_LOANS = 5
+
+# Вставка выдачи одним запросом INSERT ... SELECT: строка появляется,
+# только если у читателя меньше MAX_ACTIVE_LOANS невозвращенных книг
+def loan_insert(user_id: str, book_id: int):
+    active_loans = (
+        select(func.count())
+        .select_from(Transaction)
+        .where(Transaction.user_id == user_id, Transaction.return_date.is_(None))
+        .scalar_subquery()
+    )
+    loan_date = datetime.utcnow()
+    row = select(
+        literal(user_id, String),
+        literal(book_id, Integer),
+        literal(loan_date, DateTime),
+        literal(loan_date + LOAN_PERIOD, DateTime),
+    ).where(active_loans < MAX_ACTIVE_LOANS)
+    return (
+        insert(Transaction)
+        .from_select(["user_id", "literature_item_id", "loan_date", "due_date"], row)
+        .returning(Transaction.id, Transaction.due_date)
+    )
+
+# Администратор выдает книгу только читателю.
+# Строка читателя блокируется до конца транзакции, чтобы параллельные выдачи не обошли лимит
+async def lock_reader(db: AsyncSession, user_id: str, current_user: Principal):
+    result = await db.execute(select(User.role).where(User.id == user_id).with_for_update())
+    role = result.scalar_one_or_none()
+    if role is None:
+        logger.error("User ID %s not found for book issue.", user_id)
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Требуется роль администратора для выполнения этого действия."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден."
+        )
+    if current_user.id == user_id or role == "admin":
+        logger.error("Admin cannot issue book to themselves or another admin: Admin ID %s, User ID %s", current_user.id, user_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Администратор может выдать книгу только читателю."
+        )
+
+# Пакетная выдача книг одному читателю (только для администраторов).
+# Все книги обрабатываются в одной транзакции БД; недоступные книги и книги сверх лимита
+# отклоняются по отдельности, остальные выдаются
+@router.post("/issue/batch", response_model=BatchIssueResponse)
+async def issue_books_batch(
+    request: BatchIssueRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin)
+):
+    user_id = request.user_id
+    logger.info("Attempting to issue %s books to user ID %s by admin ID %s", len(request.book_ids), user_id, current_user.id)
+
+    await lock_reader(db, user_id, current_user)
+
+    errors = {}
+    book_ids = []
+    for position, book_id in enumerate(request.book_ids):
+        if book_id in book_ids:
+            errors[position] = "Книга уже указана в запросе."
+        else:
+            book_ids.append(book_id)
+
+    # Строки книг блокируются в порядке id, чтобы пересекающиеся пакеты не взаимоблокировались
+    result = await db.execute(
+        select(LiteratureItem.id, LiteratureItem.available_copies)
+        .where(LiteratureItem.id.in_(book_ids))
+        .order_by(LiteratureItem.id)
+        .with_for_update()
+    )
+    available = {book.id for book in result if book.available_copies > 0}
+
+    result = await db.execute(
+        select(func.count())
+        .select_from(Transaction)
+        .where(Transaction.user_id == user_id, Transaction.return_date.is_(None))
+    )
+    capacity = MAX_ACTIVE_LOANS - result.scalar_one()
+
+    accepted = [book_id for book_id in book_ids if book_id in available][:max(capacity, 0)]
+    over_limit = available - set(accepted)
+    if accepted:
+        # Списание по экземпляру только тех книг, что укладываются в лимит
+        await db.execute(
+            update(LiteratureItem)
+            .where(LiteratureItem.id.in_(accepted))
+            .values(available_copies=LiteratureItem.available_copies - 1, version=LiteratureItem.version + 1)
+        )
+
+    loans = {}
+    if accepted:
+        loan_date = datetime.utcnow()
+        result = await db.execute(
+            insert(Transaction).returning(
+                Transaction.id, Transaction.literature_item_id, Transaction.due_date,
+                sort_by_parameter_order=True,
+            ),
+            [
+                {
+                    "user_id": user_id,
+                    "literature_item_id": book_id,
+                    "loan_date": loan_date,
+                    "due_date": loan_date + LOAN_PERIOD,
+                }
+                for book_id in accepted
+            ],
+        )
+        loans = {loan.literature_item_id: loan for loan in result}
+    if accepted:
+        await bump_catalog_version(db)
+    await db.commit()
+    if accepted:
+        await publish_changes("literature_items", sorted(accepted))
+
+    results = []
+    for position, book_id in enumerate(request.book_ids):
+        if position in errors:
+            results.append(BatchIssueResult(book_id=book_id, issued=False, detail=errors[position]))
+        elif book_id in loans:
+            loan = loans[book_id]
+            results.append(BatchIssueResult(
+                book_id=book_id, issued=True, transaction_id=loan.id, due_date=loan.due_date
+            ))
+        elif book_id in over_limit:
+            results.append(BatchIssueResult(
+                book_id=book_id, issued=False, detail="Пользователь уже имеет 5 не возвращенных книг."
+            ))
+        else:
+            results.append(BatchIssueResult(
+                book_id=book_id, issued=False, detail="Книга не найдена или отсутствуют доступные экземпляры."
+            ))
+
+    logger.info("Batch issue: %s of %s books issued to User ID %s", len(loans), len(request.book_ids), user_id)
+    return BatchIssueResponse(user_id=user_id, issued=len(loans), results=results)
+
+# Пакетный возврат книг (только для администраторов).
+# Закрытие выдач и возврат экземпляров выполняются в одной транзакции БД
+@router.post("/return/batch", response_model=BatchReturnResponse)
+async def return_books_batch(
+    request: BatchReturnRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin)
+):
+    logger.info("Attempting to return %s books by Admin ID %s", len(request.transaction_ids), current_user.id)
+
+    transaction_ids = list(dict.fromkeys(request.transaction_ids))
+    result = await db.execute(
+        update(Transaction)
+        .where(Transaction.id.in_(transaction_ids), Transaction.return_date.is_(None))
+        .values(return_date=datetime.utcnow())
+        .returning(Transaction.id, Transaction.literature_item_id)
+    )
+    closed = {loan.id: loan.literature_item_id for loan in result}
+
+    # Экземпляры возвращаются одним executemany, по числу закрытых выдач каждой книги
+    returned_copies = Counter(closed.values())
+    if returned_copies:
+        literature_items = LiteratureItem.__table__
+        await db.execute(
+            update(literature_items)
+            .where(literature_items.c.id == bindparam("book_id"))
+            .values(
+                available_copies=literature_items.c.available_copies + bindparam("returned"),
+                version=literature_items.c.version + 1,
+            ),
+            [
+                {"book_id": book_id, "returned": count}
+                for book_id, count in sorted(returned_copies.items())
+            ],
         )
-    return current_user
+
+    existing = set(closed)
+    missing = [transaction_id for transaction_id in transaction_ids if transaction_id not in closed]
+    if missing:
+        result = await db.execute(select(Transaction.id).where(Transaction.id.in_(missing)))
+        existing.update(result.scalars().all())
+    if returned_copies:
+        await bump_catalog_version(db)
+    await db.commit()
+    if returned_copies:
+        await publish_changes("literature_items", sorted(returned_copies))
+
+    results = []
+    seen = set()
+    for transaction_id in request.transaction_ids:
+        if transaction_id in seen:
+            detail = "Транзакция уже указана в запросе."
+        elif transaction_id in closed:
+            detail = None
+        elif transaction_id in existing:
+            detail = "Книга уже была возвращена."
+        else:
+            detail = "Транзакция для этой книги и пользователя не найдена."
+        results.append(BatchReturnResult(
+            transaction_id=transaction_id, returned=detail is None, detail=detail
+        ))
+        seen.add(transaction_id)
+
+    logger.info("Batch return: %s of %s books returned", len(closed), len(request.transaction_ids))
+    return BatchReturnResponse(returned=len(closed), results=results)
 
 # Выдача книги пользователю (только для администраторов).
+# Проверки и изменения выполняются в одной транзакции БД: экземпляр списывается условным UPDATE,
+# а запись о выдаче вставляется, только если у читателя меньше MAX_ACTIVE_LOANS книг
 @router.post("/issue/{book_id}", response_model=IssueBookResponse)
 async def issue_book(
     book_id: int, 
     user: dict = Body(...), 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin)
 ):
     user_id = user["user_id"]
 
-    logger.info(f"Attempting to issue book ID {book_id} to user ID {user_id} by admin ID {current_user.id}")
+    logger.info("Attempting to issue book ID %s to user ID %s by admin ID %s", book_id, user_id, current_user.id)
 
-    # Администратор выдает книгу только читателю.
-    user_obj = db.query(User).filter(User.id == user_id).first()
-    if not user_obj:
-        logger.error(f"User ID {user_id} not found for book issue.")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден."
-        )
-    if current_user.id == user_id or user_obj.role == "admin":
-        logger.error(f"Admin cannot issue book to themselves or another admin: Admin ID {current_user.id}, User ID {user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Администратор может выдать книгу только читателю."
-        )
+    await lock_reader(db, user_id, current_user)
 
-    # Проверка наличия доступных экземпляров книги
-    book = db.query(LiteratureItem).filter(LiteratureItem.id == book_id, LiteratureItem.available_copies > 0).first()
-    if not book:
-        logger.error(f"Book ID {book_id} not available for issue.")
+    # Списание экземпляра: строка книги меняется, только если экземпляры ещё есть
+    result = await db.execute(
+        update(LiteratureItem)
+        .where(LiteratureItem.id == book_id, LiteratureItem.available_copies > 0)
+        .values(available_copies=LiteratureItem.available_copies - 1, version=LiteratureItem.version + 1)
+        .returning(LiteratureItem.title)
+    )
+    title = result.scalar_one_or_none()
+    if title is None:
+        await db.rollback()
+        logger.error("Book ID %s not available for issue.", book_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Книга не найдена или отсутствуют доступные экземпляры."
         )
 
-    # Проверка, что пользователь имеет менее 5 невозвращенных книг
-    user_transactions = db.query(Transaction).filter(Transaction.user_id == user_id, Transaction.return_date == None).all()
-    if len(user_transactions) >= 5:
-        logger.error(f"User ID {user_id} already has 5 unreturned books.")
+    # Создание транзакции, если у пользователя менее 5 невозвращенных книг
+    result = await db.execute(loan_insert(user_id, book_id))
+    loan = result.first()
+    if loan is None:
+        await db.rollback()
+        logger.error("User ID %s already has 5 unreturned books.", user_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь уже имеет 5 не возвращенных книг."
         )
-
-    # Создание транзакции
-    transaction = Transaction(user_id=user_id, literature_item_id=book.id)
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-
-    # Уменьшение количества доступных экземпляров книги
-    book.available_copies -= 1
-    db.commit()
+    await bump_catalog_version(db)
+    await db.commit()
+    await publish_changes("literature_items", [book_id])
 
     # Логирование успешной выдачи книги
-    logger.info(f"Book issued: {book.title}, Transaction ID: {transaction.id}, User ID: {user_id}")
+    logger.info("Book issued: %s, Transaction ID: %s, User ID: %s", title, loan.id, user_id)
 
-    return {"message": "Книга выдана", "transaction_id": transaction.id, "due_date": transaction.due_date}
+    return {"message": "Книга выдана", "transaction_id": loan.id, "due_date": loan.due_date}
 
 # Возврат книги (только для администраторов).
+# Закрытие выдачи и возврат экземпляра выполняются в одной транзакции БД
 @router.post("/return/{transaction_id}", response_model=ReturnBookResponse)
 async def return_book(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_admin)
 ):
     # Логируем начало обработки запроса возврата
-    logger.info(f"Attempting to return book with Transaction ID {transaction_id} by Admin ID {current_user.id}")
-
-    # Получаем транзакцию по ID
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
-
-    # Если транзакция не найдена
-    if not transaction:
-        logger.error(f"Transaction ID {transaction_id} not found for book return.")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Транзакция для этой книги и пользователя не найдена."
-        )
+    logger.info("Attempting to return book with Transaction ID %s by Admin ID %s", transaction_id, current_user.id)
 
-    # Проверка, что книга уже была возвращена
-    if transaction.return_date is not None:
-        logger.error(f"Book already returned: Transaction ID {transaction_id}")
+    # Закрытие транзакции: только если книга ещё не возвращена
+    result = await db.execute(
+        update(Transaction)
+        .where(Transaction.id == transaction_id, Transaction.return_date.is_(None))
+        .values(return_date=datetime.utcnow())
+        .returning(Transaction.literature_item_id, Transaction.user_id)
+    )
+    loan = result.first()
+    if loan is None:
+        await db.rollback()
+        result = await db.execute(select(Transaction.id).where(Transaction.id == transaction_id))
+        # Если транзакция не найдена
+        if result.scalar_one_or_none() is None:
+            logger.error("Transaction ID %s not found for book return.", transaction_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Транзакция для этой книги и пользователя не найдена."
+            )
+        # Книга уже была возвращена
+        logger.error("Book already returned: Transaction ID %s", transaction_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Книга уже была возвращена."
         )
 
-    # Закрытие транзакции
-    transaction.return_date = datetime.utcnow()
-    db.commit()  # Сохраняем изменения
-    db.refresh(transaction)
-
     # Увеличение доступных экземпляров книги
-    book = db.query(LiteratureItem).filter(LiteratureItem.id == transaction.literature_item_id).first()
-    if book:
-        book.available_copies += 1
-        db.commit()  # Сохраняем изменения в таблице книг
+    result = await db.execute(
+        update(LiteratureItem)
+        .where(LiteratureItem.id == loan.literature_item_id)
+        .values(available_copies=LiteratureItem.available_copies + 1, version=LiteratureItem.version + 1)
+        .returning(LiteratureItem.title)
+    )
+    title = result.scalar_one_or_none()
+    await bump_catalog_version(db)
+    await db.commit()
+    await publish_changes("literature_items", [loan.literature_item_id])
 
     # Логируем возврат
-    logger.info(f"Book returned: {book.title}, Transaction ID: {transaction.id}, User ID: {transaction.user_id}")
+    logger.info("Book returned: %s, Transaction ID: %s, User ID: %s", title, transaction_id, loan.user_id)
+
+    return {"message": "Книга возвращена", "transaction_id": transaction_id}
 
-    return {"message": "Книга возвращена", "transaction_id": transaction.id}
+# Фильтр истории выдач по состоянию
+LOAN_STATUSES = Literal["active", "returned", "overdue"]
 
-# Получение транзакций пользователя.
-@router.get("/transactions/{user_id}", response_model=List[TransactionResponse])
+def filter_loans(query, loan_status: str | None, loaned_from: date | None, loaned_to: date | None):
+    if loan_status == "active":
+        query = query.where(Transaction.return_date.is_(None))
+    elif loan_status == "returned":
+        query = query.where(Transaction.return_date.is_not(None))
+    elif loan_status == "overdue":
+        query = query.where(Transaction.return_date.is_(None), Transaction.due_date < datetime.utcnow())
+    if loaned_from:
+        query = query.where(Transaction.loan_date >= datetime.combine(loaned_from, datetime.min.time()))
+    if loaned_to:
+        # Граница включительно: все выдачи за последний день диапазона
+        query = query.where(Transaction.loan_date < datetime.combine(loaned_to + timedelta(days=1), datetime.min.time()))
+    return query
+
+# Получение истории выдач пользователя: сначала новые, постранично по курсору.
+# С expand=book каждая выдача содержит название книги, имя автора и срок возврата
+@router.get(
+    "/transactions/{user_id}",
+    response_model=Union[List[TransactionResponse], List[TransactionWithBookResponse]],
+)
 async def get_user_transactions(
     user_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    loan_status: LOAN_STATUSES | None = Query(
+        None, alias="status", description="Фильтр по состоянию: active, returned или overdue"
+    ),
+    loaned_from: date | None = Query(None, description="Выданы не раньше этой даты"),
+    loaned_to: date | None = Query(None, description="Выданы не позже этой даты"),
+    limit: int = Query(50, ge=1, le=100, description="Количество записей на страницу"),
+    cursor: str | None = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    expand: Literal["book"] | None = Query(None, description="Встроить сведения о книге: book"),
 ):
-    logger.info(f"Admin ID {current_user.id} is fetching transactions for User ID {user_id if user_id else current_user.id}")
+    logger.info("Admin ID %s is fetching transactions for User ID %s", current_user.id, user_id if user_id else current_user.id)
 
     # Если текущий пользователь не администратор и пытается получить данные другого пользователя
     if current_user.role != "admin" and current_user.id != user_id:
-        logger.error(f"User {current_user.id} unauthorized to access transactions of User {user_id}")
+        logger.error("User %s unauthorized to access transactions of User %s", current_user.id, user_id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Требуется роль администратора для выполнения этого действия."
         )
 
-    # Получаем транзакции пользователя
-    transactions = db.query(Transaction).filter(Transaction.user_id == user_id).all()
+    query = select(
+        Transaction.id,
+        Transaction.literature_item_id.label("book_id"),
+        Transaction.loan_date,
+        Transaction.return_date,
+    )
+    if expand == "book":
+        # Книга и автор присоединяются в том же запросе, без отдельного чтения каждой книги
+        query = (
+            query.add_columns(Transaction.due_date, LiteratureItem.title, Author.name.label("author_name"))
+            .select_from(Transaction)
+            .outerjoin(LiteratureItem, LiteratureItem.id == Transaction.literature_item_id)
+            .outerjoin(Author, Author.id == LiteratureItem.author_id)
+        )
+    query = filter_loans(query.where(Transaction.user_id == user_id), loan_status, loaned_from, loaned_to)
+    # Порядок — обратный просмотр индекса (user_id, loan_date, id): курсор задаёт границу диапазона,
+    # поэтому дальняя страница читается так же, как первая, без сортировки и пропуска строк
+    if cursor is not None:
+        last_loan_date, last_id = decode_cursor(cursor, [datetime.fromisoformat, int])
+        query = query.where(keyset_before([Transaction.loan_date, Transaction.id], [last_loan_date, last_id]))
+
+    # Лишняя запись показывает, есть ли следующая страница, без подсчёта строк
+    result = await db.execute(
+        query.order_by(Transaction.loan_date.desc(), Transaction.id.desc()).limit(limit + 1)
+    )
+    transactions = result.all()
 
-    if not transactions:
-        logger.info(f"No transactions found for User {user_id}")
+    # 404 только для истории без фильтров: пустой результат фильтра или курсора — обычная пустая страница
+    filtered = loan_status is not None or loaned_from is not None or loaned_to is not None
+    if not transactions and cursor is None and not filtered:
+        logger.info("No transactions found for User %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Транзакции пользователя не найдены."
         )
 
     # Логируем успешное получение транзакций
-    logger.info(f"Transactions retrieved for User {user_id} by User {current_user.id}")
+    logger.info("Transactions retrieved for User %s by User %s", user_id, current_user.id)
 
-    # Возвращаем список транзакций
-    return [TransactionResponse.from_orm(transaction) for transaction in transactions]
\ No newline at end of file
+    next_cursor = None
+    if len(transactions) > limit:
+        last = transactions[limit - 1]
+        next_cursor = encode_cursor([last.loan_date, last.id])
+    set_next_page_headers(request, response, next_cursor)
+    response.headers["X-Has-More"] = "true" if next_cursor else "false"
+    if expand == "book":
+        return json_response(transactions_with_book_adapter, [
+            {
+                "id": loan.id,
+                "book_id": loan.book_id,
+                "loan_date": loan.loan_date,
+                "due_date": loan.due_date,
+                "return_date": loan.return_date,
+                "book": {"id": loan.book_id, "title": loan.title, "author_name": loan.author_name},
+            }
+            for loan in transactions[:limit]
+        ], response)
+    return json_response(transactions_adapter, transactions[:limit], response)
\ No newline at end of file
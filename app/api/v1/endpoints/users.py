@@ -1,48 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
-from sqlalchemy.orm import Session
-from app.db.session import get_db, SessionLocal
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
 from app.models import User
-from app.utils import hash_password
+from app.core.security import hash_password_async
 from app.core.config import settings
-from typing import Dict
+from app.core.invalidation import publish_changes
+from app.core.registration import RegistrationState, registration_store
+from app.schemas.user import UserRegister
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Временное хранилище для отслеживания контекста пользователя (можно заменить на Redis или базу данных).
-user_registration_context: Dict[str, Dict] = {}
-
 # Пароль для администратора.
 ADMIN_PASSWORD = "1234567"
 
-# Хэширование пароля.
-def hash_password(password: str):
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    return pwd_context.hash(password)
+# Создание пользователя; имя могли занять, пока шла регистрация.
+async def create_user(db: AsyncSession, username: str, hashed_password: str, role: str) -> User:
+    db_user = User(username=username, hashed_password=hashed_password, role=role)
+    db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Пользователь с таким именем уже существует"
+        )
+    await db.refresh(db_user)
+    await publish_changes("users", [db_user.id])
+    return db_user
 
 # Первый шаг: пользователь вводит имя и пароль.
 @router.post("/register/start")
 async def start_registration(
     username: str = Form(...), 
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Проверяем, существует ли пользователь с таким именем.
-    if db.query(User).filter(User.username == username).first():
+    result = await db.execute(select(User).where(User.username == username))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Пользователь с таким именем уже существует"
         )
 
-    # Сохраняем имя пользователя и пароль в контексте.
-    user_registration_context[username] = {"password": password}
+    # Сохраняем имя пользователя и хеш пароля: открытый пароль между шагами не хранится.
+    hashed_password = await hash_password_async(password)
+    await registration_store.save(RegistrationState(username=username, hashed_password=hashed_password))
     return {"message": "Введите, кем вы хотите зарегистрироваться: читателем или администратором"}
 
 # Второй шаг: пользователь выбирает роль.
@@ -50,10 +56,11 @@ async def start_registration(
 async def choose_role(
     username: str = Form(...), 
     role_choice: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Проверяем, есть ли пользователь в контексте регистрации.
-    if username not in user_registration_context:
+    registration = await registration_store.get(username)
+    if registration is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Сначала нужно ввести имя пользователя и пароль"
@@ -66,21 +73,17 @@ async def choose_role(
             detail="Некорректный выбор роли"
         )
     
-    user_registration_context[username]["role"] = role_choice
-
     # Если выбрана роль "admin", запрашиваем код.
     if role_choice == "admin":
+        registration.role = role_choice
+        await registration_store.save(registration)
         return {"message": "Введите код администратора для завершения регистрации"}
     
      # Если выбрана роль "user", завершаем регистрацию.
-    hashed_password = hash_password(user_registration_context[username]["password"])
-    db_user = User(username=username, hashed_password=hashed_password, role="user")
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await create_user(db, username, registration.hashed_password, "user")
 
     # Удаляем пользователя из контекста.
-    user_registration_context.pop(username, None)
+    await registration_store.delete(username)
 
     return {"message": "Регистрация завершена. Ваша роль: читатель"}
 
@@ -89,17 +92,18 @@ async def choose_role(
 async def confirm_admin(
     username: str = Form(...), 
     admin_code: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Проверяем, есть ли пользователь в контексте регистрации.
-    if username not in user_registration_context:
+    registration = await registration_store.get(username)
+    if registration is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Сначала нужно ввести имя пользователя и пароль"
         )
 
     # Проверяем, выбрал ли пользователь роль "admin".
-    if user_registration_context[username].get("role") != "admin":
+    if registration.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Вы не выбирали роль администратора"
@@ -113,13 +117,31 @@ async def confirm_admin(
         )
 
     # Если код правильный, создаём пользователя.
-    hashed_password = hash_password(user_registration_context[username]["password"])
-    db_user = User(username=username, hashed_password=hashed_password, role="admin")
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await create_user(db, username, registration.hashed_password, "admin")
 
     # Удаляем пользователя из контекста.
-    user_registration_context.pop(username, None)
+    await registration_store.delete(username)
+
+    return {"message": "Регистрация завершена. Ваша роль: администратор"}
+
+# Регистрация одним запросом: имя, пароль, роль и, для администратора, код.
+@router.post("/register")
+async def register(data: UserRegister, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User.id).where(User.username == data.username))
+    if result.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Пользователь с таким именем уже существует"
+        )
+
+    if data.role == "admin" and data.admin_code != ADMIN_PASSWORD:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный код администратора. Попробуйте снова"
+        )
+
+    hashed_password = await hash_password_async(data.password)
+    await create_user(db, data.username, hashed_password, data.role)
 
-    return {"message": "Регистрация завершена. Ваша роль: администратор"}
\ No newline at end of file
+    role_name = "администратор" if data.role == "admin" else "читатель"
+    return {"message": f"Регистрация завершена. Ваша роль: {role_name}"}
\ No newline at end of file
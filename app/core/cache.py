@@ -0,0 +1,301 @@
+import asyncio
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.core.config import settings
+
+# Счётчики кэша для подбора размера и TTL
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    size: int = 0
+    maxsize: int = 0
+    # Объём записей для кэшей с ограничением по памяти
+    bytes: int = 0
+    max_bytes: int | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+# Интерфейс кэша: другой бэкенд (например, Redis) реализует эти же методы
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        ...
+
+# Кэш в памяти процесса: вытеснение давно не использованных записей и срок жизни.
+# С max_bytes вытеснение идёт и по суммарному размеру записей, который считает sizeof
+class LRUCache(CacheBackend):
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats(maxsize=maxsize, max_bytes=max_bytes)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= self.clock():
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            # Запись больше всего кэша не сохраняется, чтобы не вытеснить ради неё остальные
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "size": len(self._entries), "bytes": self._bytes})
+
+# Кэш аутентифицированных пользователей по токену.
+# Отзыв выполняется через поколение пользователя: запись со старым поколением считается промахом.
+# Полный сброс начинает новую эпоху, поэтому и он отзывает записи, сохраняемые параллельно
+class PrincipalCache:
+    def __init__(self, backend: CacheBackend, ttl: float, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self._generations: dict = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Any:
+        entry = self.backend.get(token)
+        if entry is None:
+            return None
+        principal, generation = entry
+        if self.generation(principal.id) != generation:
+            self.backend.delete(token)
+            return None
+        return principal
+
+    # Поколение нужно запомнить до чтения пользователя из БД, чтобы не пропустить отзыв
+    def generation(self, user_id: str) -> tuple:
+        return self._epoch, self._generations.get(user_id, 0)
+
+    # Запись живёт не дольше срока действия токена (expires_at — время Unix)
+    def set(self, token: str, principal: Any, expires_at: float, generation: tuple) -> None:
+        ttl = min(self.ttl, expires_at - self.clock())
+        if ttl <= 0:
+            return
+        self.backend.set(token, (principal, generation), ttl=ttl)
+
+    # Отзыв всех закэшированных токенов пользователя (смена роли, удаление)
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+# Кэш для чтения через кэш с проверкой поколения ключа, как в PrincipalCache.
+# Удаление ключа назначает ему новое поколение; значение, прочитанное из БД до удаления,
+# в кэш уже не попадёт. Поколения уникальны, их хранится не больше max_generations
+class GenerationalCache:
+    def __init__(self, backend: CacheBackend, max_generations: int):
+        self.backend = backend
+        self.max_generations = max_generations
+        self._generations: OrderedDict = OrderedDict()
+        self._counter = itertools.count(1)
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        return self.backend.get(key, default)
+
+    # Поколение нужно запомнить до чтения из БД
+    def generation(self, key: Hashable) -> tuple:
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: tuple, ttl: float | None = None) -> None:
+        with self._lock:
+            if (self._epoch, self._generations.get(key, 0)) != generation:
+                return
+            self.backend.set(key, value, ttl=ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._generations[key] = next(self._counter)
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_generations:
+                self._generations.popitem(last=False)
+            self.backend.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+            self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+# Готовая страница списка: тело ответа, его ETag и курсор следующей страницы.
+# Заголовок Link строится заново из URL каждого запроса
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str | None = None
+    next_cursor: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+# Значения параметров запроса в ключе кэша: без пустых фильтров, даты — в ISO-формате
+def normalize_params(params: dict) -> tuple:
+    return tuple(sorted(
+        (name, value.isoformat() if isinstance(value, date) else value)
+        for name, value in params.items()
+        if value is not None
+    ))
+
+# Кэш результатов списочных запросов.
+# Ключ включает поколения таблиц, от которых зависит результат: запись в таблицу увеличивает
+# поколение, и все прежние ключи перестают находиться (их вытеснят LRU и срок жизни).
+# Промах по ключу пересчитывает только один запрос, остальные ждут его результата
+class QueryResultCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._generations: dict = {}
+        self._inflight: dict = {}
+
+    def key(self, namespace: str, tables: tuple, params: dict) -> tuple:
+        generations = tuple(self._generations.get(table, 0) for table in tables)
+        return namespace, generations, normalize_params(params)
+
+    def get(self, key: tuple) -> Any:
+        return self.backend.get(key)
+
+    async def get_or_compute(self, key: tuple, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.backend.get(key)
+        if value is not None:
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            value = await asyncio.shield(inflight)
+            if value is not None:
+                return value
+            # Первый запрос завершился ошибкой: ошибку для своего запроса получаем сами
+            return await compute()
+
+        inflight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = inflight
+        value = None
+        try:
+            value = await compute()
+            self.backend.set(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+            inflight.set_result(value)
+
+    # Грубая инвалидация: после любой записи в таблицу сбрасываются все результаты, зависящие от неё
+    def invalidate(self, *tables: str) -> None:
+        for table in tables:
+            self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+# Кэш карточек книг по ID
+literature_item_cache = GenerationalCache(
+    LRUCache(maxsize=settings.ITEM_CACHE_MAXSIZE, ttl=settings.ITEM_CACHE_TTL_SECONDS),
+    max_generations=settings.ITEM_CACHE_MAXSIZE,
+)
+
+# Кэш пользователей, прошедших проверку токена
+principal_cache = PrincipalCache(
+    LRUCache(maxsize=settings.PRINCIPAL_CACHE_MAXSIZE),
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Кэш страниц списков книг и авторов
+query_cache = QueryResultCache(
+    LRUCache(
+        maxsize=settings.QUERY_CACHE_MAXSIZE,
+        ttl=settings.QUERY_CACHE_TTL_SECONDS,
+        max_bytes=settings.QUERY_CACHE_MAX_BYTES,
+    )
+)
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator
+
+from sqlalchemy import Select
+
+from app.db.session import AsyncSessionLocal
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+# Поля книги в выгрузке, в порядке колонок CSV
+EXPORT_COLUMNS = ("id", "title", "description", "publication_date", "genre", "available_copies", "author_id")
+# Число строк, которое драйвер забирает с сервера за один раз
+EXPORT_BATCH_SIZE = 1000
+
+def encode_ndjson(columns, rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+def encode_csv(rows, header=None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+# Потоковая выгрузка результата запроса: строки читаются серверным курсором пачками
+# по EXPORT_BATCH_SIZE, поэтому память не зависит от размера таблицы.
+# Сессия открывается внутри генератора: он работает уже после выхода из обработчика
+async def stream_rows(query: Select, export_format: str) -> AsyncIterator[bytes]:
+    columns = [column.key for column in query.selected_columns]
+    if export_format == "csv":
+        yield encode_csv([], header=columns)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield encode_csv(rows)
+            else:
+                yield encode_ndjson(columns, rows)
+
+# Accept-Encoding: gzip допустим, если он (или "*", когда gzip не назван) указан с ненулевым q;
+# "gzip;q=0" — явный отказ от сжатия
+def accepts_gzip(header: str | None) -> bool:
+    qualities = {}
+    for token in (header or "").split(","):
+        coding, *params = (part.strip() for part in token.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+# Сжатие потока gzip по мере выдачи частей
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import column, insert, select, table
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dates import parse_publication_date
+from app.core.etag import bump_catalog_version
+from app.core.invalidation import publish_changes
+from app.core.search import build_search_document, normalize_name, search_vector_expression
+from app.db.session import AsyncSessionLocal
+from app.models import Author, LiteratureItem
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_CHUNK_SIZE = 5000
+# В отчёт попадают только первые ошибки, остальные лишь считаются
+MAX_REPORTED_ERRORS = 1000
+
+# Временная таблица PostgreSQL, в которую пачка книг загружается через COPY
+IMPORT_STAGING_TABLE = "literature_items_import"
+IMPORT_COLUMNS = ("title", "description", "publication_date", "genre", "available_copies", "author_id")
+
+ENCODING_ERROR = "Строка не в кодировке UTF-8"
+# Предельная длина одной записи CSV в символах, включая переводы строк внутри полей в кавычках
+MAX_CSV_RECORD_LENGTH = 1024 * 1024
+
+@dataclass
+class ImportRowError:
+    line: int
+    error: str
+
+@dataclass
+class ImportReport:
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    authors_created: int = 0
+    errors: List[ImportRowError] = field(default_factory=list)
+
+    def add_error(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(ImportRowError(line=line, error=error))
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+# Формат по заголовку Content-Type или расширению файла
+def detect_format(name: str | None) -> str | None:
+    name = (name or "").lower()
+    if "csv" in name:
+        return "csv"
+    if "ndjson" in name or "jsonl" in name or "json" in name:
+        return "ndjson"
+    return None
+
+# Разбиение потока байтов на строки без чтения всего файла в память
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+# Строки файла в виде текста; недекодируемая строка отдаётся как None
+async def iter_text_lines(lines: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    first = True
+    async for line in lines:
+        try:
+            text = line.decode("utf-8")
+        except UnicodeDecodeError:
+            text = None
+        if first and text is not None:
+            text = text.lstrip("\ufeff")
+        first = False
+        yield text
+
+# Записи файла: (номер строки, словарь полей, ошибка разбора)
+async def iter_records(lines: AsyncIterator[bytes], import_format: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    if import_format == "ndjson":
+        line_number = 0
+        async for line in iter_text_lines(lines):
+            line_number += 1
+            if line is None:
+                yield line_number, None, ENCODING_ERROR
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None, "Некорректный JSON"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Ожидается JSON-объект"
+                continue
+            yield line_number, record, None
+        return
+
+    async for record in iter_csv_records(lines):
+        yield record
+
+# Записи CSV. Поле в кавычках может содержать перевод строки, поэтому строки копятся, пока кавычки
+# не закроются, но не дольше MAX_CSV_RECORD_LENGTH символов: иначе одна лишняя кавычка заставила бы
+# держать в памяти весь остаток файла. Такая запись отклоняется по первой строке, а следующие за ней
+# строки разбираются заново
+async def iter_csv_records(lines: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    header = None
+    pending: List[Tuple[int, str]] = []
+    pending_length = 0
+    quotes = 0
+    replay: deque = deque()
+    source = iter_text_lines(lines).__aiter__()
+    line_number = 0
+    exhausted = False
+    while True:
+        if replay:
+            number, line = replay.popleft()
+        elif not exhausted:
+            try:
+                line = await source.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                continue
+            line_number += 1
+            number = line_number
+        elif pending:
+            number, line = None, None
+        else:
+            break
+
+        if number is not None:
+            if line is None:
+                yield number, None, ENCODING_ERROR
+                continue
+            pending.append((number, line))
+            pending_length += len(line) + 1
+            quotes += line.count('"')
+            if quotes % 2 and pending_length <= MAX_CSV_RECORD_LENGTH:
+                continue
+        if quotes % 2:
+            # Кавычки не закрылись до конца файла или до предела длины записи
+            yield pending[0][0], None, "Незакрытые кавычки в CSV"
+            replay.extendleft(reversed(pending[1:]))
+            pending, pending_length, quotes = [], 0, 0
+            continue
+
+        record_line = pending[0][0]
+        text = "\n".join(value for _, value in pending)
+        pending, pending_length, quotes = [], 0, 0
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if len(values) != len(header):
+            yield record_line, None, "Число полей не совпадает с заголовком"
+            continue
+        yield record_line, dict(zip(header, values)), None
+
+def optional_text(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+# Проверка и приведение полей одной записи; ValueError описывает ошибку строки
+def parse_row(record: dict) -> dict:
+    title = optional_text(record.get("title"))
+    if title is None:
+        raise ValueError("Не указано название книги")
+    author = optional_text(record.get("author"))
+    if author is None:
+        raise ValueError("Не указан автор")
+    try:
+        available_copies = int(record.get("available_copies") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Некорректное число экземпляров")
+    if available_copies < 0:
+        raise ValueError("Некорректное число экземпляров")
+    publication_date = parse_publication_date(optional_text(record.get("publication_date")))
+    return {
+        "title": title,
+        "description": optional_text(record.get("description")),
+        "publication_date": publication_date,
+        "genre": optional_text(record.get("genre")),
+        "available_copies": available_copies,
+        "author": author,
+        "author_bio": optional_text(record.get("author_bio")),
+    }
+
+# Потоковый импорт каталога: записи читаются пачками по chunk_size,
+# каждая пачка записывается и фиксируется отдельной транзакцией
+class CatalogImporter:
+    def __init__(
+        self,
+        db: AsyncSession,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        on_progress: Callable[[ImportReport], None] | None = None,
+    ):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.report = ImportReport()
+        # Нормализованное имя автора -> ID, чтобы не искать одного автора в каждой пачке
+        self.author_ids: Dict[str, int] = {}
+
+    async def run(self, records: AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]) -> ImportReport:
+        chunk = []
+        async for line_number, record, error in records:
+            self.report.processed += 1
+            if error is None:
+                try:
+                    chunk.append((line_number, parse_row(record)))
+                except ValueError as exc:
+                    error = str(exc)
+            if error is not None:
+                self.report.add_error(line_number, error)
+                continue
+            if len(chunk) >= self.chunk_size:
+                await self.flush(chunk)
+                chunk = []
+        if chunk:
+            await self.flush(chunk)
+        return self.report
+
+    async def flush(self, chunk: List[Tuple[int, dict]]):
+        rows = [row for _, row in chunk]
+        try:
+            author_ids = await self.resolve_authors(rows)
+            items = [
+                {name: row[name] for name in IMPORT_COLUMNS if name != "author_id"}
+                | {"author_id": author_ids[normalize_name(row["author"])]}
+                for row in rows
+            ]
+            if self.db.bind.dialect.name == "postgresql":
+                await self.copy_items(items)
+            else:
+                await self.db.execute(insert(LiteratureItem.__table__), [
+                    {**item, "search_vector": build_search_document(item["title"], item["description"])}
+                    for item in items
+                ])
+            await bump_catalog_version(self.db)
+            await self.db.commit()
+        except SQLAlchemyError as exc:
+            await self.db.rollback()
+            # Авторы, созданные в откатившейся транзакции, больше не существуют
+            self.author_ids.clear()
+            logger.error("Catalog import chunk failed: %s", exc)
+            for line_number, _ in chunk:
+                self.report.add_error(line_number, "Ошибка записи пачки в базу данных")
+        else:
+            self.report.imported += len(chunk)
+            # Кэши сбрасываются после каждой зафиксированной пачки, как при импорте через API, так и из CLI
+            await publish_changes("literature_items")
+            await publish_changes("authors")
+        logger.info(
+            "Catalog import progress: %d processed, %d imported", self.report.processed, self.report.imported
+        )
+        if self.on_progress is not None:
+            self.on_progress(self.report)
+
+    # Поиск авторов по нормализованному имени и создание недостающих
+    async def resolve_authors(self, rows: List[dict]) -> Dict[str, int]:
+        missing = {}
+        for row in rows:
+            key = normalize_name(row["author"])
+            if key not in self.author_ids:
+                missing.setdefault(key, row)
+        if not missing:
+            return self.author_ids
+
+        result = await self.db.execute(
+            select(Author.id, Author.name_normalized)
+            .where(Author.name_normalized.in_(list(missing)))
+            .order_by(Author.id)
+        )
+        for author_id, key in result:
+            self.author_ids.setdefault(key, author_id)
+
+        new_authors = [
+            {"name": row["author"], "bio": row["author_bio"], "name_normalized": key}
+            for key, row in missing.items()
+            if key not in self.author_ids
+        ]
+        if new_authors:
+            result = await self.db.execute(
+                insert(Author).returning(Author.id, Author.name_normalized, sort_by_parameter_order=True),
+                new_authors,
+            )
+            for author_id, key in result:
+                self.author_ids[key] = author_id
+            self.report.authors_created += len(new_authors)
+        return self.author_ids
+
+    # PostgreSQL: COPY во временную таблицу и один INSERT ... SELECT с вычислением search_vector
+    async def copy_items(self, items: List[dict]):
+        connection = await self.db.connection()
+        await connection.exec_driver_sql(
+            f"CREATE TEMP TABLE IF NOT EXISTS {IMPORT_STAGING_TABLE} ("
+            "title text, description text, publication_date date, genre text, "
+            "available_copies integer, author_id integer"
+            ") ON COMMIT DELETE ROWS"
+        )
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            IMPORT_STAGING_TABLE,
+            records=[tuple(item[name] for name in IMPORT_COLUMNS) for item in items],
+            columns=list(IMPORT_COLUMNS),
+        )
+        staging = table(IMPORT_STAGING_TABLE, *(column(name) for name in IMPORT_COLUMNS))
+        await connection.execute(
+            insert(LiteratureItem.__table__).from_select(
+                [*IMPORT_COLUMNS, "search_vector"],
+                select(
+                    *(staging.c[name] for name in IMPORT_COLUMNS),
+                    search_vector_expression(staging.c.title, staging.c.description),
+                ),
+            )
+        )
+
+async def read_file(path: str, block_size: int = 1 << 20) -> AsyncIterator[bytes]:
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while block := stream.read(block_size):
+            yield block
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+# Импорт из файла командной строкой:
+#     python -m app.core.catalog_import catalog.ndjson
+def main():
+    parser = argparse.ArgumentParser(description="Import authors and literature items from NDJSON or CSV")
+    parser.add_argument("path", help="Файл каталога или '-' для чтения из stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    import_format = args.format or detect_format(args.path)
+    if import_format is None:
+        parser.error("не удалось определить формат, укажите --format")
+
+    def print_progress(report: ImportReport):
+        print(f"processed={report.processed} imported={report.imported} failed={report.failed}", file=sys.stderr)
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            importer = CatalogImporter(db, chunk_size=args.chunk_size, on_progress=print_progress)
+            return await importer.run(iter_records(iter_lines(read_file(args.path)), import_format))
+
+    report = asyncio.run(run())
+    print(json.dumps(report.as_dict(), ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,50 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Literature Hub API"
     DATABASE_URL: str
+    # Необязательный URL для асинхронного движка (по умолчанию выводится из DATABASE_URL)
+    ASYNC_DATABASE_URL: str | None = None
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Кэш карточек книг: максимальное число записей и срок жизни записи
+    ITEM_CACHE_MAXSIZE: int = 10000
+    ITEM_CACHE_TTL_SECONDS: float = 300
+    # Кэш пользователей по токену: срок жизни записи не превышает срока действия токена
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 300
+    # Кэш страниц списков книг и авторов: число страниц, их суммарный объём в байтах и срок жизни
+    QUERY_CACHE_MAXSIZE: int = 1000
+    QUERY_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    QUERY_CACHE_TTL_SECONDS: float = 30
+    # Инвалидация кэшей между воркерами: memory — только в своём процессе (один воркер),
+    # postgres — рассылка событий через NOTIFY/LISTEN в указанном канале
+    INVALIDATION_BUS: Literal["memory", "postgres"] = "memory"
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    # Хеширование паролей: стоимость bcrypt и число потоков для него
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    # Незавершённые регистрации: memory — в памяти процесса (один воркер),
+    # database — в таблице pending_registrations (несколько воркеров)
+    REGISTRATION_STORE: Literal["memory", "database"] = "memory"
+    REGISTRATION_TTL_SECONDS: float = 900
+    REGISTRATION_MAX_PENDING: int = 10000
+    # Пул соединений с базой на один процесс (значения по умолчанию — как у SQLAlchemy).
+    # DB_POOL_RECYCLE=-1 не пересоздаёт соединения по возрасту
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Логирование: уровень, файл с ротацией по размеру (по умолчанию не задан — только stderr)
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str | None = None
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
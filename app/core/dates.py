@@ -0,0 +1,25 @@
+from datetime import date, datetime
+
+# Форматы, встречающиеся в строковой колонке publication_date.
+# Для неполных дат (только год или месяц) берётся первый день периода
+PUBLICATION_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%Y/%m/%d", "%d/%m/%Y", "%Y-%m", "%m.%Y", "%Y")
+
+# Разбор даты публикации; ValueError, если строку не удалось разобрать
+def parse_publication_date(value) -> date | None:
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text).date()
+    except ValueError:
+        pass
+    for date_format in PUBLICATION_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Некорректная дата публикации: {text}")
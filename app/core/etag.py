@@ -0,0 +1,33 @@
+from fastapi import Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.catalog_version import LITERATURE_ITEMS_CATALOG, CatalogVersion
+
+# Увеличение версии каталога в транзакции записи. Строка счётчика общая для всех записей,
+# поэтому вызывается последним запросом перед commit: блокировка держится как можно короче
+async def bump_catalog_version(db: AsyncSession, name: str = LITERATURE_ITEMS_CATALOG):
+    await db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == name)
+        .values(version=CatalogVersion.version + 1)
+    )
+
+async def get_catalog_version(db: AsyncSession, name: str = LITERATURE_ITEMS_CATALOG) -> int:
+    version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.name == name))
+    return version or 0
+
+# Сильный ETag из версии данных
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+# If-None-Match: список тегов через запятую или "*"; для GET сравнение слабое, префикс W/ не учитывается
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
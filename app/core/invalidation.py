@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Iterable, List
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.cache import literature_item_cache, principal_cache, query_cache
+from app.core.config import settings
+from app.core.metrics import cache_invalidation_events_total, cache_invalidation_lag_seconds
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, записи в которые затрагивают кэши процесса
+CACHED_TABLES = ("literature_items", "authors", "users")
+# Событий в одном уведомлении: полезная нагрузка NOTIFY ограничена 8000 байт
+MAX_EVENTS_PER_MESSAGE = 200
+
+# Изменение строки таблицы; без id — изменение таблицы целиком
+@dataclass(frozen=True)
+class ChangeEvent:
+    table: str
+    id: int | str | None = None
+
+# Вытеснение записей кэшей процесса, зависящих от изменённой строки
+def evict(event: ChangeEvent):
+    if event.table == "literature_items":
+        if event.id is not None:
+            literature_item_cache.delete(event.id)
+        query_cache.invalidate("literature_items")
+    elif event.table == "authors":
+        query_cache.invalidate("authors")
+    elif event.table == "users":
+        if event.id is None:
+            principal_cache.clear()
+        else:
+            principal_cache.invalidate_user(event.id)
+
+# Сброс всех кэшей, когда события могли быть потеряны (например, при обрыве соединения)
+def evict_all():
+    literature_item_cache.clear()
+    principal_cache.clear()
+    query_cache.invalidate(*CACHED_TABLES)
+
+def encode_messages(worker_id: str, events: List[ChangeEvent]) -> List[str]:
+    sent_at = time.time()
+    return [
+        json.dumps({
+            "worker": worker_id,
+            "sent_at": sent_at,
+            "events": [[event.table, event.id] for event in events[start:start + MAX_EVENTS_PER_MESSAGE]],
+        })
+        for start in range(0, len(events), MAX_EVENTS_PER_MESSAGE)
+    ]
+
+# Шина инвалидации: воркер, выполнивший запись, сразу вытесняет записи своих кэшей
+# и рассылает события остальным воркерам; те вытесняют записи по мере получения
+class InvalidationBus(ABC):
+    def __init__(self, worker_id: str | None = None, handler: Callable[[ChangeEvent], None] = evict):
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.handler = handler
+        self._pending: set = set()
+
+    async def publish(self, events: List[ChangeEvent]):
+        self.apply(events)
+        await self.send(events)
+
+    # Публикация из синхронного кода (хуков сессии SQLAlchemy): свои кэши — сразу,
+    # рассылка — задачей в цикле событий. Без цикла событий (скрипты на синхронной сессии)
+    # события применяются только в своём процессе
+    def publish_nowait(self, events: List[ChangeEvent]):
+        self.apply(events)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.send(events))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def apply(self, events: List[ChangeEvent]):
+        for event in events:
+            self.handler(event)
+            cache_invalidation_events_total.inc((event.table, "local"))
+
+    async def send(self, events: List[ChangeEvent]):
+        try:
+            await self.broadcast(encode_messages(self.worker_id, events))
+        except (SQLAlchemyError, OSError) as exc:
+            # Запись уже зафиксирована: остальные воркеры увидят её по истечении срока жизни кэшей
+            logger.error("Cache invalidation broadcast failed: %s", exc)
+
+    # Сообщение от шины: свои события уже применены при публикации
+    def receive(self, payload: str):
+        message = json.loads(payload)
+        if message["worker"] == self.worker_id:
+            return
+        # Время публикации взято с часов другого процесса: на разных хостах часы должны быть синхронизированы
+        cache_invalidation_lag_seconds.observe((), max(time.time() - message["sent_at"], 0.0))
+        for table, row_id in message["events"]:
+            self.handler(ChangeEvent(table, row_id))
+            cache_invalidation_events_total.inc((table, "remote"))
+
+    @abstractmethod
+    async def broadcast(self, payloads: List[str]):
+        ...
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+# Шина в памяти: доставляет сообщения шинам, подключённым к тому же списку участников.
+# В одном воркере событий извне нет; в тестах несколько шин изображают несколько воркеров
+class LoopbackInvalidationBus(InvalidationBus):
+    def __init__(self, peers: list | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.peers = peers if peers is not None else []
+
+    async def broadcast(self, payloads: List[str]):
+        for payload in payloads:
+            for peer in list(self.peers):
+                peer.receive(payload)
+
+    async def start(self):
+        self.peers.append(self)
+
+    async def stop(self):
+        if self in self.peers:
+            self.peers.remove(self)
+
+# PostgreSQL: NOTIFY после фиксации записи и LISTEN на отдельном соединении в каждом воркере
+class PostgresInvalidationBus(InvalidationBus):
+    def __init__(self, engine, channel: str, reconnect_delay: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._task: asyncio.Task | None = None
+
+    async def broadcast(self, payloads: List[str]):
+        async with self.engine.connect() as connection:
+            for payload in payloads:
+                await connection.execute(select(func.pg_notify(self.channel, payload)))
+            await connection.commit()
+
+    async def start(self):
+        self._task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Слушатель переподключается при обрыве; пока соединения не было, события могли потеряться,
+    # поэтому после переподключения кэши процесса сбрасываются целиком
+    async def listen(self):
+        import asyncpg
+
+        dsn = self.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _connection: lost.set())
+                await connection.add_listener(
+                    self.channel, lambda _connection, _pid, _channel, payload: self.receive(payload)
+                )
+                if reconnecting:
+                    evict_all()
+                logger.info("Listening for cache invalidation on channel %s", self.channel)
+                await lost.wait()
+                logger.warning("Cache invalidation listener connection lost")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning("Cache invalidation listener failed to connect: %s", exc)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            reconnecting = True
+            await asyncio.sleep(self.reconnect_delay)
+
+def create_invalidation_bus() -> InvalidationBus:
+    if settings.INVALIDATION_BUS == "postgres":
+        from app.db.session import async_engine
+
+        return PostgresInvalidationBus(async_engine, settings.INVALIDATION_CHANNEL)
+    return LoopbackInvalidationBus()
+
+invalidation_bus = create_invalidation_bus()
+
+def change_events(table: str, ids: Iterable[int | str]) -> List[ChangeEvent]:
+    return [ChangeEvent(table, row_id) for row_id in ids] or [ChangeEvent(table)]
+
+# Публикация изменений после commit: вызывается обработчиками, записавшими строки таблицы
+async def publish_changes(table: str, ids: Iterable[int | str] = ()):
+    await invalidation_bus.publish(change_events(table, ids))
+
+# То же из синхронных хуков после commit
+def publish_changes_nowait(table: str, ids: Iterable[int | str] = ()):
+    invalidation_bus.publish_nowait(change_events(table, ids))
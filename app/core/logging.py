@@ -1,18 +1,147 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Создаем объект логгера
-logger = logging.getLogger(__name__)
+from app.core.metrics import request_stats_var
 
-# Устанавливаем уровень логирования
-logger.setLevel(logging.INFO)
+# Контекст текущего запроса: попадает в каждую запись лога
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+user_id_var: ContextVar[str | None] = ContextVar("user_id", default=None)
 
-# Создаем обработчик для записи логов в файл
-file_handler = logging.FileHandler("app.log", encoding="utf-8")
-file_handler.setLevel(logging.INFO)
+# Атрибуты LogRecord, которые не относятся к extra
+STANDARD_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
 
-# Создаем формат для вывода логов
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
+REQUEST_ID_HEADER = b"x-request-id"
 
-# Добавляем обработчик в логгер
-logger.addHandler(file_handler)
+# Копирует контекст запроса в запись до того, как она уйдёт в очередь
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+# Одна запись — один JSON-объект в строке
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+# Стандартный QueueHandler.prepare дописывает трассировку в текст сообщения и сбрасывает exc_info.
+# Здесь сообщение подставляется без неё, а трассировка сохраняется в exc_text: JsonFormatter в потоке
+# QueueListener выводит её отдельным полем, не удерживая кадры стека до обработки записи
+class StructuredQueueHandler(QueueHandler):
+    traceback_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener: QueueListener | None = None
+
+# Настройка логирования приложения, выполняется один раз при старте.
+# Обработчики с записью на диск работают в фоновом потоке QueueListener,
+# поэтому запрос лишь кладёт запись в очередь и не ждёт файловой системы
+def setup_logging(settings) -> QueueListener:
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = JsonFormatter()
+    handlers = [logging.StreamHandler()]
+    if settings.LOG_FILE:
+        handlers.append(RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+access_logger = logging.getLogger("app.access")
+
+# ASGI-middleware: идентификатор запроса (из X-Request-ID или новый), сброс контекста
+# и итоговая запись access-лога с кодом ответа и задержкой
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+        user_id_token = user_id_var.set(None)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # Число SQL-запросов и время в базе собирает MetricsMiddleware, если она подключена
+            stats = request_stats_var.get()
+            access_logger.info(
+                "%s %s %d",
+                scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "db_queries": stats.queries if stats is not None else None,
+                    "db_ms": round(stats.db_seconds * 1000, 2) if stats is not None else None,
+                },
+            )
+            user_id_var.reset(user_id_token)
+            request_id_var.reset(request_id_token)
@@ -0,0 +1,191 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Границы корзин гистограмм задержки в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Метка для запросов, не попавших ни в один маршрут: путь в метку не пишется,
+# иначе число рядов росло бы с каждым новым URL
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+# Метрики обновляются только из потока цикла событий, поэтому обходятся без блокировок
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Labels, float] = defaultdict(float)
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self.values[labels] += amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in list(self.values.items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.values[labels] -= amount
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: счётчики по корзинам (последняя — +Inf), сумма и число наблюдений
+        self.values: Dict[Labels, List] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total, count) in list(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                bucket_labels = format_labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(total)}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {count}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # Текстовый формат экспозиции Prometheus
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status"),
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed.", ("method",),
+))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "SQL statements executed while handling requests, by route.", ("method", "route"),
+))
+http_request_db_duration_seconds = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in the database per request, by route.", ("method", "route"),
+))
+
+cache_invalidation_events_total = registry.register(Counter(
+    "cache_invalidation_events_total", "Cache invalidation events applied by this worker, by table and origin.",
+    ("table", "origin"),
+))
+# Задержка от публикации события другим воркером до вытеснения записей в этом
+cache_invalidation_lag_seconds = registry.register(Histogram(
+    "cache_invalidation_lag_seconds", "Delay between publishing a change event and applying it on this worker.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+
+# Счётчики базы данных текущего запроса
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+request_stats_var: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context._metrics_started
+
+# Подключение учёта времени запросов к движку (для асинхронного — к его sync_engine)
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+def uninstrument_engine(engine):
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+# ASGI-middleware: задержка и код ответа по шаблону маршрута, число запросов в работе,
+# число SQL-запросов и время в базе на каждый запрос
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        stats_token = request_stats_var.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+        http_requests_in_flight.inc((method,))
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec((method,))
+            request_stats_var.reset(stats_token)
+            # Маршрут известен только после маршрутизации: FastAPI кладёт его в scope
+            route = scope.get("route")
+            labels = (method, route.path if route is not None else UNMATCHED_ROUTE)
+            http_requests_total.inc(labels + (str(status_code),))
+            http_request_duration_seconds.observe(labels, elapsed)
+            db_queries_total.inc(labels, stats.queries)
+            http_request_db_duration_seconds.observe(labels, stats.db_seconds)
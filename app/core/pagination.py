@@ -0,0 +1,80 @@
+import base64
+import json
+from typing import Any, Callable, List, Sequence
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import and_, tuple_
+
+# Курсор — непрозрачная строка с ключом сортировки последней записи страницы
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+# Каждое значение курсора приводится к типу своей колонки функцией из parsers
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Некорректный курсор"
+    )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise invalid_cursor
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, UnicodeError):
+        raise invalid_cursor
+
+# Условие "строго после курсора" для сортировки по возрастанию
+def keyset_after(columns: Sequence[Any], values: Sequence[Any]):
+    if len(columns) == 1:
+        return columns[0] > values[0]
+    return tuple_(*columns) > tuple_(*values)
+
+# Условие "строго после курсора" для сортировки по убыванию: граница обратного просмотра индекса
+def keyset_before(columns: Sequence[Any], values: Sequence[Any]):
+    if len(columns) == 1:
+        return columns[0] < values[0]
+    return tuple_(*columns) < tuple_(*values)
+
+# Выдача по колонке с NULL в порядке просмотра индекса (column, tiebreaker): по возрастанию NULL в конце
+# (прямой просмотр), по убыванию — в начале (обратный). Строки с NULL и со значением — отдельные сегменты,
+# сегмент курсора ограничен сравнением строк, поэтому дальняя страница тоже читается с границы индекса.
+# Возвращает пары (условие, порядок) в порядке выдачи начиная с сегмента курсора
+def keyset_segments_nulls(column, tiebreaker, cursor_values: Sequence[Any] | None, descending: bool = False):
+    def order(expression):
+        return expression.desc() if descending else expression.asc()
+
+    seek = keyset_before if descending else keyset_after
+    values = [column.is_not(None)]
+    nulls = [column.is_(None)]
+    if cursor_values is not None:
+        value, tiebreaker_value = cursor_values
+        if value is None:
+            nulls.append(seek([tiebreaker], [tiebreaker_value]))
+        else:
+            values.append(seek([column, tiebreaker], [value, tiebreaker_value]))
+
+    value_segment = (and_(*values), [order(column), order(tiebreaker)])
+    nulls_segment = (and_(*nulls), [order(tiebreaker)])
+    segments = [nulls_segment, value_segment] if descending else [value_segment, nulls_segment]
+    # Первый сегмент уже выдан, если курсор стоит во втором
+    if cursor_values is not None and (cursor_values[0] is None) != descending:
+        segments = segments[1:]
+    return segments
+
+# Проверка, что курсор и смещение не переданы одновременно
+def ensure_single_pagination_mode(cursor: str | None, offset: int):
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Параметры cursor и offset нельзя использовать одновременно"
+        )
+
+# Курсор следующей страницы передаётся в заголовках, тело ответа остаётся списком
+def set_next_page_headers(request: Request, response: Response, next_cursor: str | None):
+    if next_cursor is None:
+        return
+    next_url = request.url.remove_query_params("offset").include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
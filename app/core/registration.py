@@ -0,0 +1,92 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, select
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import PendingRegistration
+
+# Состояние незавершённой регистрации между шагами
+@dataclass
+class RegistrationState:
+    username: str
+    hashed_password: str
+    role: Optional[str] = None
+
+# Интерфейс хранилища регистраций: записи живут не дольше ttl секунд
+class RegistrationStore(ABC):
+    @abstractmethod
+    async def get(self, username: str) -> Optional[RegistrationState]:
+        ...
+
+    @abstractmethod
+    async def save(self, state: RegistrationState) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, username: str) -> None:
+        ...
+
+# Хранилище в памяти процесса: подходит только для одного воркера
+class MemoryRegistrationStore(RegistrationStore):
+    def __init__(self, ttl: float, maxsize: int, clock: Callable[[], float] = time.monotonic):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    async def get(self, username: str) -> Optional[RegistrationState]:
+        return self.cache.get(username)
+
+    async def save(self, state: RegistrationState) -> None:
+        self.cache.set(state.username, state)
+
+    async def delete(self, username: str) -> None:
+        self.cache.delete(username)
+
+# Хранилище в таблице pending_registrations: общее для всех воркеров
+class DatabaseRegistrationStore(RegistrationStore):
+    def __init__(self, ttl: float, session_factory=AsyncSessionLocal, clock: Callable[[], datetime] = datetime.utcnow):
+        self.ttl = timedelta(seconds=ttl)
+        self.session_factory = session_factory
+        self.clock = clock
+
+    async def get(self, username: str) -> Optional[RegistrationState]:
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(PendingRegistration).where(
+                    PendingRegistration.username == username,
+                    PendingRegistration.expires_at > self.clock(),
+                )
+            )).scalar_one_or_none()
+        if row is None:
+            return None
+        return RegistrationState(username=row.username, hashed_password=row.hashed_password, role=row.role)
+
+    async def save(self, state: RegistrationState) -> None:
+        now = self.clock()
+        async with self.session_factory() as db:
+            # Заодно удаляем просроченные регистрации, чтобы таблица не росла
+            await db.execute(delete(PendingRegistration).where(PendingRegistration.expires_at <= now))
+            await db.merge(PendingRegistration(
+                username=state.username,
+                hashed_password=state.hashed_password,
+                role=state.role,
+                expires_at=now + self.ttl,
+            ))
+            await db.commit()
+
+    async def delete(self, username: str) -> None:
+        async with self.session_factory() as db:
+            await db.execute(delete(PendingRegistration).where(PendingRegistration.username == username))
+            await db.commit()
+
+def create_registration_store() -> RegistrationStore:
+    if settings.REGISTRATION_STORE == "database":
+        return DatabaseRegistrationStore(ttl=settings.REGISTRATION_TTL_SECONDS)
+    return MemoryRegistrationStore(ttl=settings.REGISTRATION_TTL_SECONDS, maxsize=settings.REGISTRATION_MAX_PENDING)
+
+# Хранилище незавершённых регистраций, выбранное в настройках
+registration_store = create_registration_store()
@@ -0,0 +1,21 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# pydantic проверяет строки из базы и сериализует их в байты JSON за один проход в pydantic-core.
+# Поля выводятся под псевдонимами, как при сериализации по response_model
+def dump_json(adapter: TypeAdapter, values) -> bytes:
+    return adapter.dump_json(adapter.validate_python(values, from_attributes=True), by_alias=True)
+
+# Готовый JSON-ответ для списков. FastAPI не валидирует возвращённый Response
+# повторно по response_model и не прогоняет его через jsonable_encoder;
+# response_model при этом остаётся в маршруте для документации OpenAPI
+def json_response(adapter: TypeAdapter, values, response: Response | None = None) -> Response:
+    return raw_json_response(dump_json(adapter, values), response)
+
+# Ответ из уже сериализованного тела (например, из кэша результатов запросов)
+def raw_json_response(content: bytes, response: Response | None = None) -> Response:
+    headers = None
+    if response is not None:
+        # Заголовки, выставленные обработчиком (курсор следующей страницы, Link, ETag)
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(content, media_type="application/json", headers=headers)
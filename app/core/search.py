@@ -0,0 +1,177 @@
+import html
+import re
+from typing import Iterable, List, Set
+
+from sqlalchemy import bindparam, func, literal_column, select, update
+from sqlalchemy.sql.elements import ColumnElement
+
+# Конфигурации полнотекстового поиска PostgreSQL: каталог двуязычный
+SEARCH_CONFIGS = ("russian", "english")
+
+# Веса полей как в setweight: название важнее описания
+TITLE_WEIGHT = "A"
+DESCRIPTION_WEIGHT = "B"
+PYTHON_WEIGHTS = {TITLE_WEIGHT: 1.0, DESCRIPTION_WEIGHT: 0.4}
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Окончания для упрощённого стемминга (от длинных к коротким)
+RUSSIAN_ENDINGS = sorted({
+    "ость", "ости", "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ать", "ять", "ить", "еть", "ешь", "ете", "ила", "ыла", "ена", "ует", "ают", "яют",
+    "ее", "ие", "ые", "ое", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом", "их", "ых",
+    "ую", "юю", "ая", "яя", "ою", "ею", "ах", "ях", "ов", "ев", "ам", "ям", "ия", "ья",
+    "ье", "ии", "ет", "ит", "ут", "ют", "ат", "ят", "ил", "ла", "ли", "ло", "ть",
+    "а", "я", "о", "е", "и", "ы", "у", "ю", "ь", "й",
+}, key=len, reverse=True)
+ENGLISH_ENDINGS = ("ingly", "edly", "ing", "ies", "ied", "ed", "es", "ly", "'s", "s")
+MIN_STEM_LENGTH = 3
+
+# Приведение слова к нижнему регистру и единому написанию
+def normalize_word(word: str) -> str:
+    return word.casefold().replace("ё", "е")
+
+# Упрощённый стемминг: отбрасывает типичное окончание, сохраняя основу не короче MIN_STEM_LENGTH
+def stem(word: str) -> str:
+    word = normalize_word(word)
+    endings = RUSSIAN_ENDINGS if CYRILLIC_RE.search(word) else ENGLISH_ENDINGS
+    for ending in endings:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[: -len(ending)]
+    return word
+
+def tokenize(text: str | None) -> List[str]:
+    return WORD_RE.findall(text or "")
+
+def lexemes(text: str | None) -> Set[str]:
+    return {stem(word) for word in tokenize(text)}
+
+# Документ для резервного индекса (SQLite): лексемы с весом поля, разделённые пробелами
+def build_search_document(title: str | None, description: str | None) -> str:
+    title_lexemes = lexemes(title)
+    entries = [f"{lexeme}:{TITLE_WEIGHT}" for lexeme in sorted(title_lexemes)]
+    entries += [
+        f"{lexeme}:{DESCRIPTION_WEIGHT}"
+        for lexeme in sorted(lexemes(description) - title_lexemes)
+    ]
+    return " " + " ".join(entries) + " "
+
+def parse_search_document(document: str | None) -> dict:
+    weights = {}
+    for entry in (document or "").split():
+        lexeme, _, weight = entry.rpartition(":")
+        weights[lexeme] = weight
+    return weights
+
+# Лексемы запроса; пустой результат означает, что искать нечего
+def query_lexemes(query: str) -> List[str]:
+    return sorted(lexemes(query))
+
+# Оценка релевантности документа для резервного индекса
+def rank_document(document: str | None, terms: Iterable[str]) -> float:
+    weights = parse_search_document(document)
+    return sum(PYTHON_WEIGHTS[weights[term]] for term in terms if term in weights)
+
+# Фрагмент текста с подсветкой найденных слов, аналог ts_headline
+def build_snippet(text: str | None, terms: Iterable[str], max_words: int = 20) -> str | None:
+    if not text:
+        return None
+    terms = set(terms)
+    words = list(WORD_RE.finditer(text))
+    matches = [i for i, match in enumerate(words) if stem(match.group()) in terms]
+    if not matches:
+        start = 0
+    else:
+        start = max(0, matches[0] - max_words // 4)
+    window = words[start:start + max_words]
+    if not window:
+        return html.escape(text)
+
+    parts = []
+    position = window[0].start()
+    for match in window:
+        parts.append(html.escape(text[position:match.start()]))
+        word = html.escape(match.group())
+        parts.append(f"<b>{word}</b>" if stem(match.group()) in terms else word)
+        position = match.end()
+    snippet = "".join(parts)
+    if start > 0:
+        snippet = "... " + snippet
+    if start + max_words < len(words):
+        snippet += " ..."
+    return snippet
+
+# Нормализованное имя автора для нечёткого поиска: регистр, "ё" и лишние пробелы
+def normalize_name(name: str | None) -> str:
+    return " ".join(normalize_word(part) for part in (name or "").split())
+
+# Порог word_similarity, совпадает со значением pg_trgm.word_similarity_threshold по умолчанию
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# Триграммы слов строки в том же виде, что строит pg_trgm
+def trigrams(text: str) -> Set[str]:
+    result = set()
+    for word in WORD_RE.findall(normalize_name(text)):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+# Доля триграмм запроса, найденных в имени: приближение word_similarity из pg_trgm
+def word_similarity(query: str, text: str) -> float:
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return 0.0
+    return len(query_trigrams & trigrams(text)) / len(query_trigrams)
+
+def regconfig(config: str) -> ColumnElement:
+    return literal_column(f"'{config}'::regconfig")
+
+# Выражение tsvector для PostgreSQL по всем конфигурациям поиска
+def search_vector_expression(title, description) -> ColumnElement:
+    vector = None
+    for weight, text in ((TITLE_WEIGHT, title), (DESCRIPTION_WEIGHT, description)):
+        for config in SEARCH_CONFIGS:
+            part = func.setweight(func.to_tsvector(regconfig(config), func.coalesce(text, "")), weight)
+            vector = part if vector is None else vector.op("||")(part)
+    return vector
+
+# Запрос tsquery: совпадение в любой из конфигураций
+def search_query_expression(query: str) -> ColumnElement:
+    tsquery = None
+    for config in SEARCH_CONFIGS:
+        part = func.websearch_to_tsquery(regconfig(config), query)
+        tsquery = part if tsquery is None else tsquery.op("||")(part)
+    return tsquery
+
+# Значение колонки search_vector для вставки или обновления на данном диалекте
+def search_vector_value(dialect_name: str, title: str | None, description: str | None):
+    if dialect_name == "postgresql":
+        return search_vector_expression(title, description)
+    return build_search_document(title, description)
+
+# Пересчёт search_vector для набора строк (миграции, импорт, бенчмарки)
+def refresh_search_vectors(connection, table, ids: Iterable[int] | None = None):
+    if connection.dialect.name == "postgresql":
+        statement = update(table).values(
+            search_vector=search_vector_expression(table.c.title, table.c.description)
+        )
+        if ids is not None:
+            statement = statement.where(table.c.id.in_(list(ids)))
+        connection.execute(statement)
+        return
+
+    query = select(table.c.id, table.c.title, table.c.description)
+    if ids is not None:
+        query = query.where(table.c.id.in_(list(ids)))
+    rows = connection.execute(query).all()
+    if rows:
+        connection.execute(
+            update(table).where(table.c.id == bindparam("row_id")).values(
+                search_vector=bindparam("document")
+            ),
+            [
+                {"row_id": row.id, "document": build_search_document(row.title, row.description)}
+                for row in rows
+            ],
+        )
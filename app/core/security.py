@@ -1,12 +1,44 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import jwt
 from passlib.context import CryptContext
+from app.core.cache import principal_cache
 from app.core.config import settings
+from app.core.invalidation import publish_changes_nowait
 from app.models.user import User
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Стоимость bcrypt задаётся в настройках; хэши с другой стоимостью пересчитываются при входе
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# Отдельный ограниченный пул для bcrypt: он отпускает GIL, поэтому потоки работают параллельно,
+# а общий пул FastAPI и цикл событий не заняты хэшированием
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+# Неизменяемый снимок аутентифицированного пользователя
+@dataclass(frozen=True)
+class Principal:
+    id: str
+    username: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, role=user.role)
 
 # Функция для проверки пароля
 def verify_password(plain_password, hashed_password):
@@ -16,13 +48,29 @@ def verify_password(plain_password, hashed_password):
 def hash_password(password):
     return pwd_context.hash(password)
 
+async def run_in_password_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, func, *args)
+
+# Хеширование пароля из асинхронного обработчика
+async def hash_password_async(password: str) -> str:
+    return await run_in_password_pool(hash_password, password)
+
 # Функция для проверки учетных данных пользователя
-def verify_user_credentials(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def verify_user_credentials(db: AsyncSession, username: str, password: str):
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await run_in_password_pool(
+        pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not valid:
         return False
+    # Хэш со старой стоимостью заменяется новым, пока известен открытый пароль
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 # Генерация токена авторизации
@@ -42,8 +90,13 @@ def generate_auth_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-# Функция для проверки и извлечения пользователя по токену
-def verify_auth_token(token: str, db: Session):
+# Функция для проверки и извлечения пользователя по токену.
+# Проверенные токены кэшируются, поэтому повторные запросы не обращаются к БД
+async def verify_auth_token(token: str, db: AsyncSession) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -57,7 +110,58 @@ def verify_auth_token(token: str, db: Session):
         role = payload.get("role")
     except jwt.exceptions.PyJWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.id == user_id).first()
+    generation = principal_cache.generation(user_id)
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    principal = Principal.from_user(user)
+    principal_cache.set(token, principal, expires_at=payload["exp"], generation=generation)
+    return principal
+
+def attribute_changed(target, attribute: str) -> bool:
+    return inspect(target).attrs[attribute].history.has_changes()
+
+# Пользователи, чьи токены нужно отозвать после фиксации транзакции сессии.
+# Отзыв во время flush опасен: параллельный запрос успел бы запомнить новое поколение
+# и закэшировать под ним ещё не изменённую роль
+REVOKED_USERS_KEY = "revoked_user_ids"
+# Массовое изменение пользователей: после фиксации сбрасывается весь кэш
+REVOKE_ALL_USERS_KEY = "revoke_all_users"
+
+def schedule_revocation(session: Session, user_id: str):
+    session.info.setdefault(REVOKED_USERS_KEY, set()).add(user_id)
+
+# Отзыв закэшированных токенов при смене роли или удалении пользователя
+@event.listens_for(User, "after_update")
+def revoke_principal_on_role_change(mapper, connection, target):
+    if attribute_changed(target, "role") or attribute_changed(target, "username"):
+        schedule_revocation(inspect(target).session, target.id)
+
+@event.listens_for(User, "after_delete")
+def revoke_principal_on_delete(mapper, connection, target):
+    schedule_revocation(inspect(target).session, target.id)
+
+# Массовые UPDATE/DELETE по пользователям не дают событий по строкам — сбрасываем кэш целиком
+@event.listens_for(Session, "do_orm_execute")
+def revoke_principals_on_bulk_change(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ is User for mapper in orm_execute_state.all_mappers
+    ):
+        orm_execute_state.session.info[REVOKE_ALL_USERS_KEY] = True
+
+# Отзыв в этом процессе и рассылка события остальным воркерам
+@event.listens_for(Session, "after_commit")
+def revoke_principals_after_commit(session):
+    user_ids = session.info.pop(REVOKED_USERS_KEY, set())
+    if session.info.pop(REVOKE_ALL_USERS_KEY, False):
+        publish_changes_nowait("users")
+    elif user_ids:
+        publish_changes_nowait("users", sorted(user_ids))
+
+# Изменения откатились — отзывать нечего
+@event.listens_for(Session, "after_rollback")
+def discard_revocations_after_rollback(session):
+    session.info.pop(REVOKED_USERS_KEY, None)
+    session.info.pop(REVOKE_ALL_USERS_KEY, None)
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# SQLAlchemy пишет сообщения пула в логгер по модулю класса пула, то есть сюда.
+# Как и для логгеров sqlalchemy.*, по умолчанию выводятся только предупреждения
+logging.getLogger(__name__).setLevel(logging.WARNING)
+
+# Счётчики получения соединений из пула: сколько раз, сколько ждали, сколько не дождались
+@dataclass
+class PoolTelemetry:
+    acquisitions: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, waited: float, timed_out: bool):
+        with self.lock:
+            self.acquisitions += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+# Замер времени connect(): ожидание свободного соединения, открытие нового сверх пула
+# и pre-ping. Счётчики переживают пересоздание пула при dispose()
+class TelemetryPoolMixin:
+    telemetry: PoolTelemetry
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.telemetry.record(time.perf_counter() - started, timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+class InstrumentedQueuePool(TelemetryPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(TelemetryPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+# Текущее состояние пула движка; для пулов без очереди (SQLite в памяти) — только тип
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            # Предел соединений одного процесса: его и умножают на число воркеров uvicorn
+            max_connections=pool.size() + max(pool._max_overflow, 0),
+        )
+    telemetry = getattr(pool, "telemetry", None)
+    if telemetry is not None:
+        stats.update(telemetry.as_dict())
+    return stats
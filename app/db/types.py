@@ -0,0 +1,12 @@
+from sqlalchemy import Date
+from sqlalchemy.types import TypeDecorator
+
+from app.core.dates import parse_publication_date
+
+# Колонка DATE, которая принимает и строки в поддерживаемых форматах
+class PublicationDate(TypeDecorator):
+    impl = Date
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return parse_publication_date(value)
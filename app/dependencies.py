@@ -1,28 +1,31 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.user import User
-from app.core.security import verify_auth_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.core.logging import user_id_var
+from app.core.security import Principal, verify_auth_token
 
 # Создаем схему для извлечения токена из заголовка
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Функция для получения сессии базы данных
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Функция для получения текущего пользователя
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
     # Используем verify_auth_token для декодирования токена и получения пользователя
-    user = verify_auth_token(token, db)
+    user = await verify_auth_token(token, db)
 
     # Проверяем, найден ли пользователь
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return user
\ No newline at end of file
+    # Пользователь попадает в контекст логов текущего запроса
+    user_id_var.set(user.id)
+    return user
+
+# Функция для проверки, является ли пользователь администратором
+def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Требуется роль администратора для выполнения этого действия."
+        )
+    return current_user
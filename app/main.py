@@ -1,16 +1,38 @@
 import logging
-from fastapi import FastAPI, HTTPException
-from app.api.v1.endpoints import literature_items, authors, users, auth_portal, transactions
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from app.api.v1.endpoints import literature_items, authors, users, auth_portal, transactions, admin
 from app.core.config import settings
-from app.db.session import engine
+from app.core.invalidation import invalidation_bus
+from app.core.logging import RequestContextMiddleware, setup_logging
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry
+from app.db.session import async_engine, engine
 from app.db.base import Base
 
 # Настройка логирования
-logging.basicConfig(level=logging.INFO)
+setup_logging(settings)
 logger = logging.getLogger(__name__)
 
+# Слушатель событий инвалидации кэшей работает, пока работает воркер
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await invalidation_bus.start()
+    try:
+        yield
+    finally:
+        await invalidation_bus.stop()
+
 # Инициализация FastAPI приложения
-app = FastAPI(title="Literature Hub API", version="1.0.0")
+# Ответы обработчиков сериализуются orjson вместо стандартного json
+app = FastAPI(
+    title="Literature Hub API", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan
+)
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Учёт числа SQL-запросов и времени в базе для каждого HTTP-запроса
+instrument_engine(async_engine.sync_engine)
 
 # Подключение роутеров
 app.include_router(auth_portal.router, prefix="/auth", tags=["Authentication"])
@@ -18,18 +40,24 @@ app.include_router(literature_items.router, prefix="/literature", tags=["Literat
 app.include_router(authors.router, prefix="/authors", tags=["Authors"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(transactions.router, prefix="/transactions", tags=["Transactions"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 @app.get("/")
 def root():
     logger.info("Root endpoint called")
     return {"message": "Welcome to the Literature Hub API!"}
 
+# Метрики в текстовом формате Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Логирование ошибок в транзакциях:
 @app.post("/transactions/")
 async def create_transaction(transaction_data: dict):
     try:
-        logger.info(f"Transaction creation request: {transaction_data}")
+        logger.info("Transaction creation request: %s", transaction_data)
         return {"message": "Transaction created successfully!"}
     except Exception as e:
-        logger.error(f"Error creating transaction: {str(e)}")
+        logger.error("Error creating transaction: %s", e)
         raise HTTPException(status_code=500, detail="Transaction creation failed")
\ No newline at end of file
@@ -1,4 +1,6 @@
 from .author import Author
 from .user import User
-from .literature_item import LiteratureItem
+from .literature_item import LiteratureItem, UnparsedPublicationDate
 from .transaction import Transaction
+from .pending_registration import PendingRegistration
+from .catalog_version import CatalogVersion
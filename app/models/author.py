@@ -1,13 +1,28 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index
 from sqlalchemy.orm import relationship
+from app.core.search import normalize_name
 from app.db.base import Base
 
+# Нормализованное имя вычисляется при вставке из значения колонки name
+def default_name_normalized(context):
+    return normalize_name(context.get_current_parameters().get("name"))
+
 class Author(Base):
     __tablename__ = "authors"
+    __table_args__ = (
+        Index(
+            "ix_authors_name_normalized_trgm",
+            "name_normalized",
+            postgresql_using="gin",
+            postgresql_ops={"name_normalized": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     name = Column(String, nullable=False)
     bio = Column(String, nullable=True)
+    # Имя в нижнем регистре с заменой "ё" на "е" для триграммного поиска
+    name_normalized = Column(String, nullable=True, default=default_name_normalized)
 
     literature_items = relationship("LiteratureItem", back_populates="author")
 
@@ -0,0 +1,19 @@
+from sqlalchemy import BigInteger, Column, DDL, String, event
+from app.db.base import Base
+
+# Имена счётчиков версий
+LITERATURE_ITEMS_CATALOG = "literature_items"
+
+# Версия таблицы целиком: растёт при любой записи в неё, из неё строятся ETag списков
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+
+# Строка счётчика создаётся вместе с таблицей (create_all в тестах; в миграции — отдельно)
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL(f"INSERT INTO catalog_versions (name, version) VALUES ('{LITERATURE_ITEMS_CATALOG}', 1)"),
+)
@@ -1,18 +1,59 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from app.db.base import Base
+from app.db.types import PublicationDate
+
+# В PostgreSQL — tsvector с GIN-индексом, в остальных СУБД — документ резервного индекса
+SearchVector = Text().with_variant(TSVECTOR(), "postgresql")
 
 class LiteratureItem(Base):
     __tablename__ = "literature_items"
+    __table_args__ = (
+        Index("ix_literature_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_literature_items_genre_trgm",
+            "genre",
+            postgresql_using="gin",
+            postgresql_ops={"genre": "gin_trgm_ops"},
+        ),
+        # Диапазоны и сортировка по дате публикации; id продолжает ключ курсора
+        Index("ix_literature_items_publication_date_id", "publication_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    publication_date = Column(String, nullable=True)
+    publication_date = Column(PublicationDate, nullable=True)
     genre = Column(String, nullable=True)
     available_copies = Column(Integer, default=0)
-    author_id = Column(Integer, ForeignKey("authors.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("authors.id"), nullable=False, index=True)
+    # Версия строки: растёт при каждом изменении книги, включая выдачу и возврат экземпляров
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Поисковый документ по названию и описанию, обновляется при создании и изменении книги.
+    # Колонка отложенная: обычные выборки книг её не читают
+    search_vector = deferred(Column(SearchVector, nullable=True))
 
     author = relationship("Author", back_populates="literature_items")
     
-    transactions = relationship("Transaction", back_populates="literature_item")
\ No newline at end of file
+    transactions = relationship("Transaction", back_populates="literature_item")
+
+# Колонки ответа со списком книг: выборка только их обходится без ORM-объектов и identity map
+LITERATURE_ITEM_RESPONSE_COLUMNS = (
+    LiteratureItem.id,
+    LiteratureItem.title,
+    LiteratureItem.description,
+    LiteratureItem.publication_date,
+    LiteratureItem.genre,
+    LiteratureItem.available_copies,
+    LiteratureItem.author_id,
+)
+
+# Строки publication_date, которые не удалось разобрать при переходе на DATE
+class UnparsedPublicationDate(Base):
+    __tablename__ = "literature_item_unparsed_dates"
+
+    literature_item_id = Column(
+        Integer, ForeignKey("literature_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    publication_date = Column(String, nullable=False)
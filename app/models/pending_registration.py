@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, String
+from app.db.base import Base
+
+# Незавершённая многошаговая регистрация: пароль хранится только в виде хеша
+class PendingRegistration(Base):
+    __tablename__ = "pending_registrations"
+
+    username = Column(String, primary_key=True)
+    hashed_password = Column(String, nullable=False)
+    role = Column(String, nullable=True)
+    # Просроченные записи не выдаются и удаляются при следующих сохранениях
+    expires_at = Column(DateTime, nullable=False, index=True)
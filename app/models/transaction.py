@@ -1,17 +1,38 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Integer
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime, timedelta
 from app.db.base import Base
 
+# Срок возврата книги — 2 недели
+LOAN_PERIOD = timedelta(days=14)
+
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # История выдач читателя: фильтр по user_id, порядок по loan_date и id без сортировки
+        Index("ix_transactions_user_id_loan_date", "user_id", "loan_date", "id"),
+        Index("ix_transactions_literature_item_id", "literature_item_id"),
+        # Частичные индексы по невозвращенным книгам: лимит выдач и поиск просрочек
+        Index(
+            "ix_transactions_active_user_id",
+            "user_id",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL"),
+        ),
+        Index(
+            "ix_transactions_active_due_date",
+            "due_date",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     literature_item_id = Column(Integer, ForeignKey("literature_items.id"), nullable=False)
-    loan_date = Column(DateTime, default=datetime.utcnow)
-    due_date = Column(DateTime, default=lambda: datetime.utcnow() + timedelta(days=14))  # срок возврата 2 недели
+    loan_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+    due_date = Column(DateTime, default=lambda: datetime.utcnow() + LOAN_PERIOD)
     return_date = Column(DateTime, nullable=True)
 
     # Relationships
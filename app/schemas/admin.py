@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    maxsize: int
+    bytes: int = 0
+    max_bytes: Optional[int] = None
+
+class CachesStatsResponse(BaseModel):
+    caches: Dict[str, CacheStatsResponse]
+
+class PoolStatsResponse(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout: Optional[float] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    max_connections: Optional[int] = None
+    acquisitions: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_seconds_total: Optional[float] = None
+    wait_seconds_max: Optional[float] = None
+
+class PoolsStatsResponse(BaseModel):
+    pools: Dict[str, PoolStatsResponse]
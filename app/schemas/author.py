@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional
 from app.schemas.literature_item import LiteratureItemResponse
 
@@ -12,9 +12,19 @@ class AuthorBase(BaseModel):
 class AuthorCreate(AuthorBase):
     pass
 
-class AuthorResponse(AuthorBase):
+# Автор в списке без include: поля literature_items нет, а не пустой список
+class AuthorSummaryResponse(AuthorBase):
     id: int
+
+    class Config:
+        from_attributes = True
+
+class AuthorResponse(AuthorSummaryResponse):
     literature_items: List[LiteratureItemResponse] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Сериализация страницы авторов сразу в JSON (см. app.core.responses.json_response)
+authors_adapter = TypeAdapter(List[AuthorResponse])
+author_summaries_adapter = TypeAdapter(List[AuthorSummaryResponse])
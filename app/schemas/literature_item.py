@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+from datetime import date
+from pydantic import BaseModel, TypeAdapter, field_validator
 from typing import Optional, List
+from app.core.dates import parse_publication_date
 
 class LiteratureItemBase(BaseModel):
     title: str
@@ -10,14 +12,39 @@ class LiteratureItemCreate(LiteratureItemBase):
     publication_date: Optional[str] = None
     genre: Optional[str] = None
 
+    # Дата принимается в тех же форматах, что и при импорте каталога, и хранится как YYYY-MM-DD
+    @field_validator("publication_date", mode="before")
+    @classmethod
+    def normalize_publication_date(cls, value):
+        parsed = parse_publication_date(value)
+        return parsed.isoformat() if parsed else None
+
 class LiteratureItemResponse(LiteratureItemBase):
     id: int
     title: str
     description: Optional[str] = None
-    publication_date: Optional[str] = None
+    publication_date: Optional[date] = None
     genre: Optional[str] = None
     available_copies: Optional[int] = 0 
     author_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Сериализация страницы книг сразу в JSON (см. app.core.responses.json_response)
+literature_items_adapter = TypeAdapter(List[LiteratureItemResponse])
+
+class LiteratureSearchResult(LiteratureItemResponse):
+    rank: float
+    snippet: Optional[str] = None
+
+class CatalogImportError(BaseModel):
+    line: int
+    error: str
+
+class CatalogImportResponse(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    authors_created: int
+    errors: List[CatalogImportError] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional
 from datetime import datetime
 from pydantic import Field
 
@@ -13,6 +13,20 @@ class TransactionResponse(BaseModel):
         from_attributes = True
         allow_population_by_field_name = True
 
+# Краткие сведения о книге в истории выдач (expand=book)
+class LoanBookSummary(BaseModel):
+    id: int
+    title: Optional[str] = None
+    author_name: Optional[str] = None
+
+class TransactionWithBookResponse(TransactionResponse):
+    due_date: Optional[datetime] = None
+    book: LoanBookSummary
+
+# Сериализация страницы истории выдач сразу в JSON (см. app.core.responses.json_response)
+transactions_adapter = TypeAdapter(List[TransactionResponse])
+transactions_with_book_adapter = TypeAdapter(List[TransactionWithBookResponse])
+
 class IssueBookResponse(BaseModel):
     message: str
     transaction_id: int  
@@ -26,4 +40,35 @@ class ReturnBookResponse(BaseModel):
     transaction_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Максимальное число позиций в одном пакетном запросе
+MAX_BATCH_SIZE = 50
+
+class BatchIssueRequest(BaseModel):
+    user_id: str
+    book_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchIssueResult(BaseModel):
+    book_id: int
+    issued: bool
+    transaction_id: Optional[int] = None
+    due_date: Optional[datetime] = None
+    detail: Optional[str] = None
+
+class BatchIssueResponse(BaseModel):
+    user_id: str
+    issued: int
+    results: List[BatchIssueResult]
+
+class BatchReturnRequest(BaseModel):
+    transaction_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchReturnResult(BaseModel):
+    transaction_id: int
+    returned: bool
+    detail: Optional[str] = None
+
+class BatchReturnResponse(BaseModel):
+    returned: int
+    results: List[BatchReturnResult]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List
-from typing import Optional
+from typing import Literal, Optional
 
 class UserBase(BaseModel):
     username: str
@@ -9,6 +9,11 @@ class UserCreate(UserBase):
     password: str
     role: str
 
+class UserRegister(UserBase):
+    password: str
+    role: Literal["user", "admin"] = "user"
+    admin_code: Optional[str] = None
+
 class UserResponse(UserBase):
     id: str
 
@@ -1,15 +1,7 @@
 import jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException
 from app.core.config import settings
 
-# Создаем контекст для работы с паролями
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Функция для хеширования пароля
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
 # Функция для декодирования JWT токена
 def decode_jwt(token: str) -> str:
     try:
@@ -0,0 +1,117 @@
+"""Сравнение одиночных и пакетных запросов выдачи и возврата.
+
+Один раунд — 20 выдач (4 читателя по 5 книг, лимит выдач на читателя) и 20 возвратов:
+либо 20 + 20 одиночных запросов, либо 4 пакетные выдачи и один пакетный возврат.
+
+    python -m benchmarks.batch --base-url http://localhost:8000 --database-url sqlite:///./bench.db --rounds 20
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from app.core.security import hash_password
+from app.models import Author, LiteratureItem, User
+from benchmarks.common import summarize_latencies
+
+ADMIN_PASSWORD = "bench_admin_password"
+READERS = 4
+BOOKS_PER_READER = 5
+
+# Администратор, читатели и по одной книге на каждую выдачу раунда
+def seed_batch(database_url: str) -> dict:
+    engine = create_engine(database_url)
+    run_id = uuid.uuid4().hex[:8]
+    admin_username = f"bench_admin_{run_id}"
+    reader_ids = [str(uuid.uuid4()) for _ in range(READERS)]
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            "id": str(uuid.uuid4()),
+            "username": admin_username,
+            "hashed_password": hash_password(ADMIN_PASSWORD),
+            "role": "admin",
+        }] + [
+            {"id": reader_id, "username": f"bench_reader_{run_id}_{i}", "hashed_password": "-", "role": "user"}
+            for i, reader_id in enumerate(reader_ids)
+        ])
+        author_id = connection.execute(
+            insert(Author).values(name=f"Автор {run_id}", bio="").returning(Author.id)
+        ).scalar_one()
+        book_ids = connection.execute(
+            insert(LiteratureItem).returning(LiteratureItem.id, sort_by_parameter_order=True),
+            [
+                {"title": f"Книга {run_id} {i}", "author_id": author_id, "available_copies": 1}
+                for i in range(READERS * BOOKS_PER_READER)
+            ],
+        ).scalars().all()
+    engine.dispose()
+    loans = {
+        reader_id: book_ids[i * BOOKS_PER_READER:(i + 1) * BOOKS_PER_READER]
+        for i, reader_id in enumerate(reader_ids)
+    }
+    return {"admin_username": admin_username, "loans": loans}
+
+async def single_round(client: httpx.AsyncClient, loans: dict, headers: dict):
+    transaction_ids = []
+    for user_id, book_ids in loans.items():
+        for book_id in book_ids:
+            response = await client.post(
+                f"/transactions/issue/{book_id}", json={"user_id": user_id}, headers=headers
+            )
+            response.raise_for_status()
+            transaction_ids.append(response.json()["transaction_id"])
+    for transaction_id in transaction_ids:
+        response = await client.post(f"/transactions/return/{transaction_id}", headers=headers)
+        response.raise_for_status()
+
+async def batch_round(client: httpx.AsyncClient, loans: dict, headers: dict):
+    transaction_ids = []
+    for user_id, book_ids in loans.items():
+        response = await client.post(
+            "/transactions/issue/batch", json={"user_id": user_id, "book_ids": book_ids}, headers=headers
+        )
+        response.raise_for_status()
+        transaction_ids += [result["transaction_id"] for result in response.json()["results"]]
+    response = await client.post(
+        "/transactions/return/batch", json={"transaction_ids": transaction_ids}, headers=headers
+    )
+    response.raise_for_status()
+
+async def run(base_url: str, database_url: str, rounds: int) -> dict:
+    seeded = seed_batch(database_url)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        response = await client.post(
+            "/auth/login", json={"username": seeded["admin_username"], "password": ADMIN_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        summary = {}
+        for name, round_func in (("single", single_round), ("batch", batch_round)):
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(rounds):
+                round_started = time.perf_counter()
+                await round_func(client, seeded["loans"], headers)
+                latencies.append(time.perf_counter() - round_started)
+            summary[name] = summarize_latencies(latencies, time.perf_counter() - started)
+    summary["loans_per_round"] = READERS * BOOKS_PER_READER
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs batch circulation benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    summary = asyncio.run(run(args.base_url, args.database_url or settings.DATABASE_URL, args.rounds))
+    print(json.dumps(summary, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Стресс-тест выдачи книг: сотни одновременных выдач одного издания.
+
+Проверяет, что выдано не больше экземпляров, чем было, и печатает пропускную способность.
+Сервер и бенчмарк должны смотреть в одну базу:
+
+    python -m benchmarks.circulation --base-url http://localhost:8000 --database-url sqlite:///./bench.db \
+        --readers 500 --copies 50 --clients 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from sqlalchemy import create_engine, func, insert, select
+
+from app.core.security import hash_password
+from app.models import Author, LiteratureItem, Transaction, User
+from benchmarks.common import summarize_latencies
+
+ADMIN_PASSWORD = "bench_admin_password"
+
+# Администратор, читатели и одна книга с заданным числом экземпляров
+def seed_circulation(database_url: str, readers: int, copies: int) -> dict:
+    engine = create_engine(database_url)
+    run_id = uuid.uuid4().hex[:8]
+    admin_username = f"bench_admin_{run_id}"
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            "id": str(uuid.uuid4()),
+            "username": admin_username,
+            "hashed_password": hash_password(ADMIN_PASSWORD),
+            "role": "admin",
+        }])
+        reader_ids = [str(uuid.uuid4()) for _ in range(readers)]
+        connection.execute(insert(User), [
+            {"id": reader_id, "username": f"bench_reader_{run_id}_{i}", "hashed_password": "-", "role": "user"}
+            for i, reader_id in enumerate(reader_ids)
+        ])
+        author_id = connection.execute(
+            insert(Author).values(name=f"Автор {run_id}", bio="").returning(Author.id)
+        ).scalar_one()
+        book_id = connection.execute(
+            insert(LiteratureItem)
+            .values(title=f"Книга {run_id}", author_id=author_id, available_copies=copies)
+            .returning(LiteratureItem.id)
+        ).scalar_one()
+    engine.dispose()
+    return {"admin_username": admin_username, "reader_ids": reader_ids, "book_id": book_id}
+
+# Итоговое состояние книги в базе
+def check_book(database_url: str, book_id: int) -> dict:
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        available = connection.execute(
+            select(LiteratureItem.available_copies).where(LiteratureItem.id == book_id)
+        ).scalar_one()
+        loans = connection.execute(
+            select(func.count()).select_from(Transaction).where(Transaction.literature_item_id == book_id)
+        ).scalar_one()
+    engine.dispose()
+    return {"available_copies": available, "loans": loans}
+
+async def run(base_url: str, database_url: str, readers: int, copies: int, clients: int) -> dict:
+    seeded = seed_circulation(database_url, readers, copies)
+    book_id = seeded["book_id"]
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        response = await client.post(
+            "/auth/login", json={"username": seeded["admin_username"], "password": ADMIN_PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        semaphore = asyncio.Semaphore(clients)
+        latencies: list = []
+        statuses: dict = {}
+
+        async def issue(user_id: str):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        f"/transactions/issue/{book_id}", json={"user_id": user_id}, headers=headers
+                    )
+                    key = response.status_code
+                except httpx.HTTPError as exc:
+                    key = type(exc).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[key] = statuses.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(issue(user_id) for user_id in seeded["reader_ids"]))
+        elapsed = time.perf_counter() - started
+
+    state = check_book(database_url, book_id)
+    issued = statuses.get(200, 0)
+    summary = summarize_latencies(latencies, elapsed)
+    summary.update({
+        "clients": clients,
+        "copies": copies,
+        "statuses": {str(key): value for key, value in statuses.items()},
+        **state,
+        "oversold": issued > copies or state["loans"] > copies or state["available_copies"] < 0,
+    })
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent book issue stress test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--readers", type=int, default=500)
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=100)
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    summary = asyncio.run(
+        run(args.base_url, args.database_url or settings.DATABASE_URL, args.readers, args.copies, args.clients)
+    )
+    print(json.dumps(summary, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
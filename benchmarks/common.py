@@ -0,0 +1,31 @@
+import math
+from typing import Dict, List
+
+from sqlalchemy.engine import make_url
+
+# Перцентиль по отсортированной выборке (метод ближайшего ранга)
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+# Сводка по задержкам в миллисекундах
+def summarize_latencies(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+    }
+
+# База приложения из настроек: бенчмарки пишут в неё только с явным --force
+def is_app_database(database_url: str) -> bool:
+    from app.core.config import settings
+
+    target, app_database = (
+        make_url(url).render_as_string(hide_password=False) for url in (database_url, settings.DATABASE_URL)
+    )
+    return target == app_database
@@ -0,0 +1,75 @@
+"""Сравнение двух результатов benchmarks.workload: изменение пропускной способности
+и перцентилей по каждому эндпоинту.
+
+    python -m benchmarks.compare results/before.json results/after.json --threshold 10
+
+Код возврата 1, если p95 какого-либо эндпоинта вырос больше порога (в процентах).
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+def change(before: float, after: float) -> float | None:
+    if not before:
+        return None
+    return round((after - before) / before * 100, 1)
+
+# Разница по эндпоинтам, которые есть в обоих результатах, и итог по всей нагрузке
+def compare(before: dict, after: dict) -> dict:
+    rows = {"total": (before["total"], after["total"])}
+    for name in sorted(set(before["endpoints"]) & set(after["endpoints"])):
+        rows[name] = (before["endpoints"][name], after["endpoints"][name])
+    return {
+        name: {
+            metric: {"before": old[metric], "after": new[metric], "change_pct": change(old[metric], new[metric])}
+            for metric in METRICS
+        } | {"errors": {"before": old.get("errors", 0), "after": new.get("errors", 0)}}
+        for name, (old, new) in rows.items()
+    }
+
+def regressions(diff: dict, threshold: float) -> list:
+    return [
+        name for name, metrics in diff.items()
+        if metrics["p95_ms"]["change_pct"] is not None and metrics["p95_ms"]["change_pct"] > threshold
+    ]
+
+def format_table(diff: dict) -> str:
+    lines = [f"{'endpoint':<48}" + "".join(f"{metric:>22}" for metric in METRICS)]
+    for name, metrics in diff.items():
+        cells = []
+        for metric in METRICS:
+            values = metrics[metric]
+            pct = "n/a" if values["change_pct"] is None else f"{values['change_pct']:+.1f}%"
+            cells.append(f"{values['before']:>8} → {values['after']:<8}{pct:>5}")
+        lines.append(f"{name:<48}" + "".join(f"{cell:>22}" for cell in cells))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two workload benchmark results")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="Допустимый рост p95, %%")
+    parser.add_argument("--json", action="store_true", help="Вывести разницу в JSON вместо таблицы")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    diff = compare(before, after)
+    if args.json:
+        print(json.dumps(diff, ensure_ascii=False, indent=2))
+    else:
+        print(f"{before['meta'].get('revision')} → {after['meta'].get('revision')}")
+        print(format_table(diff))
+
+    slower = regressions(diff, args.threshold)
+    if slower:
+        print(f"p95 regression above {args.threshold}%: {', '.join(slower)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
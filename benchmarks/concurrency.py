@@ -0,0 +1,87 @@
+"""Нагрузочный тест: пропускная способность и p99 при большом числе одновременных клиентов.
+
+Запуск против работающего сервера:
+
+    python -m benchmarks.concurrency --base-url http://localhost:8000 --clients 200 --requests 10000
+
+Пути по умолчанию повторяются, поэтому с кэшем страниц списков почти все ответы отдаются из памяти.
+Для замера запросов к базе сервер запускают с QUERY_CACHE_MAXSIZE=0. С --admin-token состояние кэша
+сервера (размер и число попаданий за прогон) читается из /admin/cache и попадает в результат.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import summarize_latencies
+
+DEFAULT_PATHS = ["/literature/?limit=10", "/authors/?limit=10"]
+
+# Один клиент последовательно забирает запросы из общей очереди
+async def client_worker(client: httpx.AsyncClient, queue: asyncio.Queue, latencies: list, errors: list):
+    while True:
+        try:
+            path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - started)
+
+# Счётчики кэша страниц списков на сервере; без токена администратора состояние неизвестно
+async def query_cache_stats(client: httpx.AsyncClient, admin_token: str | None) -> dict | None:
+    if admin_token is None:
+        return None
+    response = await client.get("/admin/cache", headers={"Authorization": f"Bearer {admin_token}"})
+    response.raise_for_status()
+    return response.json()["caches"]["query_results"]
+
+async def run(base_url: str, clients: int, total_requests: int, paths: list, admin_token: str | None = None) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(paths[i % len(paths)])
+
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        cache_before = await query_cache_stats(client, admin_token)
+        started = time.perf_counter()
+        await asyncio.gather(*(client_worker(client, queue, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        cache_after = await query_cache_stats(client, admin_token)
+
+    query_cache = None
+    if cache_after is not None:
+        query_cache = {
+            "enabled": cache_after["maxsize"] > 0,
+            "hits": cache_after["hits"] - cache_before["hits"],
+            "misses": cache_after["misses"] - cache_before["misses"],
+        }
+    summary = summarize_latencies(latencies, elapsed)
+    summary.update({"clients": clients, "errors": len(errors), "paths": paths, "query_cache": query_cache})
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for the Literature Hub API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--path", action="append", dest="paths", help="Путь запроса (можно указать несколько раз)")
+    parser.add_argument("--admin-token", default=None, help="Токен администратора для чтения /admin/cache")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(
+        args.base_url, args.clients, args.requests, args.paths or DEFAULT_PATHS, args.admin_token
+    ))
+    print(json.dumps(summary, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
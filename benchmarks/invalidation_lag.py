@@ -0,0 +1,62 @@
+"""Задержка инвалидации кэшей между воркерами через PostgreSQL NOTIFY/LISTEN.
+
+Две шины изображают два воркера: первая публикует события после «записи»,
+вторая слушает канал и отмечает время получения каждого события. Считается
+задержка от вызова publish до применения события вторым воркером:
+
+    python -m benchmarks.invalidation_lag --events 1000 --interval 0.005
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.core.invalidation import ChangeEvent, PostgresInvalidationBus
+from app.db.session import async_engine
+from benchmarks.common import summarize_latencies
+
+CHANNEL = "cache_invalidation_benchmark"
+
+async def run(events: int, interval: float, batch: int) -> dict:
+    published = {}
+    lags = []
+    done = asyncio.Event()
+
+    def applied(event: ChangeEvent):
+        lags.append(time.perf_counter() - published[event.id])
+        if len(lags) == events:
+            done.set()
+
+    publisher = PostgresInvalidationBus(async_engine, CHANNEL, worker_id="publisher", handler=lambda event: None)
+    listener = PostgresInvalidationBus(async_engine, CHANNEL, worker_id="listener", handler=applied)
+    await listener.start()
+    # Слушатель подключается в фоне: даём ему выполнить LISTEN до первой публикации
+    await asyncio.sleep(1.0)
+
+    started = time.perf_counter()
+    for start in range(0, events, batch):
+        ids = range(start, min(start + batch, events))
+        now = time.perf_counter()
+        published.update((book_id, now) for book_id in ids)
+        await publisher.publish([ChangeEvent("literature_items", book_id) for book_id in ids])
+        await asyncio.sleep(interval)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    finally:
+        await listener.stop()
+        await async_engine.dispose()
+
+    summary = summarize_latencies(lags, time.perf_counter() - started)
+    summary["lost"] = events - len(lags)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-worker cache invalidation lag")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=0.005, help="Пауза между публикациями, с")
+    parser.add_argument("--batch", type=int, default=1, help="Событий в одной публикации")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.events, args.interval, args.batch)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Нагрузочный тест входа: сколько логинов в секунду выдерживает один воркер
+и какая при этом задержка у остальных эндпоинтов.
+
+Запуск против работающего сервера:
+
+    python -m benchmarks.login --base-url http://localhost:8000 --clients 16 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import summarize_latencies
+
+DEFAULT_PROBE_PATH = "/literature/?limit=10"
+
+# Пользователь для теста создаётся через обычную регистрацию, если его ещё нет
+async def ensure_user(client: httpx.AsyncClient, username: str, password: str):
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    if response.status_code == 200:
+        return
+    await client.post("/users/register/start", data={"username": username, "password": password})
+    response = await client.post("/users/register/choose_role", data={"username": username, "role_choice": "user"})
+    response.raise_for_status()
+
+async def login_worker(client: httpx.AsyncClient, credentials: dict, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/auth/login", json=credentials)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - started)
+
+# Лёгкие запросы параллельно с логинами: показывают, не блокирует ли bcrypt цикл событий
+async def probe_worker(client: httpx.AsyncClient, path: str, deadline: float, interval: float, latencies: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            await client.get(path)
+        except httpx.HTTPError:
+            pass
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+async def run(base_url: str, clients: int, duration: float, probe_path: str, username: str, password: str) -> dict:
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await ensure_user(client, username, password)
+
+        # Задержка лёгкого запроса без нагрузки
+        idle: list = []
+        await probe_worker(client, probe_path, time.perf_counter() + 2, 0.05, idle)
+
+        credentials = {"username": username, "password": password}
+        logins: list = []
+        errors: list = []
+        probes: list = []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            probe_worker(client, probe_path, deadline, 0.05, probes),
+            *(login_worker(client, credentials, deadline, logins, errors) for _ in range(clients)),
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "clients": clients,
+        "logins": {**summarize_latencies(logins, elapsed), "errors": len(errors)},
+        "probe_idle": summarize_latencies(idle, 2),
+        "probe_under_load": summarize_latencies(probes, elapsed),
+        "probe_path": probe_path,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark for the Literature Hub API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--probe-path", default=DEFAULT_PROBE_PATH)
+    parser.add_argument("--username", default="bench_login_user")
+    parser.add_argument("--password", default="bench_login_password")
+    args = parser.parse_args()
+
+    summary = asyncio.run(
+        run(args.base_url, args.clients, args.duration, args.probe_path, args.username, args.password)
+    )
+    print(json.dumps(summary, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
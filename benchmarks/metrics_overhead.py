@@ -0,0 +1,84 @@
+"""Накладные расходы сбора метрик: middleware и хуков SQLAlchemy на каждый запрос.
+
+Приложение вызывается в процессе через ASGI-транспорт httpx, без сети; серии
+с метриками и без них чередуются, чтобы прогрев и шум влияли на обе одинаково:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --force --authors 1000 --items 20000
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.metrics_overhead --requests 2000 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy import event
+
+from app.core.metrics import MetricsMiddleware, after_cursor_execute, instrument_engine, uninstrument_engine
+from app.db.session import async_engine
+from app.main import app
+from benchmarks.common import summarize_latencies
+
+DEFAULT_PATHS = ["/", "/literature/?limit=10"]
+
+# Включение и отключение метрик без перезапуска: стек middleware пересобирается при следующем запросе
+METRICS_MIDDLEWARE = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+
+def set_metrics_enabled(enabled: bool):
+    app.user_middleware = [m for m in app.user_middleware if m is not METRICS_MIDDLEWARE]
+    if enabled:
+        app.user_middleware.insert(0, METRICS_MIDDLEWARE)
+        instrument_engine(async_engine.sync_engine)
+    elif event.contains(async_engine.sync_engine, "after_cursor_execute", after_cursor_execute):
+        uninstrument_engine(async_engine.sync_engine)
+    app.middleware_stack = None
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+async def run(paths: list, requests: int, rounds: int) -> dict:
+    results = {path: {"with_metrics": [], "without_metrics": []} for path in paths}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            await measure(client, path, min(requests, 200))
+        enabled = False
+        for _ in range(rounds * 2):
+            set_metrics_enabled(enabled)
+            key = "with_metrics" if enabled else "without_metrics"
+            for path in paths:
+                results[path][key].extend(await measure(client, path, requests))
+            enabled = not enabled
+
+    summary = {}
+    for path, series in results.items():
+        with_metrics = series["with_metrics"]
+        without_metrics = series["without_metrics"]
+        mean_with = sum(with_metrics) / len(with_metrics)
+        mean_without = sum(without_metrics) / len(without_metrics)
+        summary[path] = {
+            "with_metrics": summarize_latencies(with_metrics, sum(with_metrics)),
+            "without_metrics": summarize_latencies(without_metrics, sum(without_metrics)),
+            "overhead_us": round((mean_with - mean_without) * 1e6, 1),
+            "overhead_pct": round((mean_with / mean_without - 1) * 100, 2),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Запросов на путь в одной серии")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--path", action="append", dest="paths", help="Путь запроса (можно указать несколько раз)")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args.paths or DEFAULT_PATHS, args.requests, args.rounds))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
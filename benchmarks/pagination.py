@@ -0,0 +1,93 @@
+"""Задержка первой и глубокой страницы для OFFSET- и курсорной пагинации.
+
+Запросы выполняются внутри процесса через ASGI-транспорт, без сети. Кэш страниц списков
+сбрасывается перед каждым замеряемым запросом, иначе повторы отдаются из памяти и не доходят
+до базы; --cache оставляет его включённым:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.pagination --seed --force --items 200000 --page 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from sqlalchemy import select
+
+from benchmarks.common import summarize_latencies
+from benchmarks.seed import seed_catalog
+
+async def measure(client: httpx.AsyncClient, path: str, params: dict, repeats: int, cache: bool) -> dict:
+    from app.core.cache import query_cache
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        if not cache:
+            query_cache.clear()
+        request_started = time.perf_counter()
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - request_started)
+    return summarize_latencies(latencies, time.perf_counter() - started)
+
+# Курсор, указывающий на последнюю запись страницы, предшествующей нужной
+def cursor_for_page(model, page: int, limit: int) -> str | None:
+    from app.core.pagination import encode_cursor
+    from app.db.session import SessionLocal
+
+    if page <= 1:
+        return None
+    with SessionLocal() as db:
+        last_id = db.scalar(select(model.id).order_by(model.id).offset((page - 1) * limit - 1).limit(1))
+    return encode_cursor([last_id])
+
+async def run(page: int, limit: int, repeats: int, cache: bool) -> dict:
+    from app.db.session import async_engine
+    from app.main import app
+    from app.models import Author, LiteratureItem
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, model in (("/literature/", LiteratureItem), ("/authors/", Author)):
+            for page_number in (1, page):
+                offset_params = {"limit": limit, "offset": (page_number - 1) * limit}
+                results[f"{path} offset page {page_number}"] = await measure(client, path, offset_params, repeats, cache)
+
+                cursor_params = {"limit": limit}
+                cursor = cursor_for_page(model, page_number, limit)
+                if cursor is not None:
+                    cursor_params["cursor"] = cursor
+                results[f"{path} cursor page {page_number}"] = await measure(client, path, cursor_params, repeats, cache)
+    # Соединения пула закрываются явно: поток соединения aiosqlite иначе не даёт процессу завершиться
+    await async_engine.dispose()
+    return {
+        "meta": {"query_cache": cache, "page": page, "limit": limit, "repeats": repeats},
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="OFFSET vs keyset pagination benchmark")
+    parser.add_argument("--seed", action="store_true", help="Пересоздать и заполнить базу перед замером")
+    parser.add_argument("--force", action="store_true", help="Разрешить --seed для базы приложения из DATABASE_URL")
+    parser.add_argument("--authors", type=int, default=60000)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--page", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--cache", action="store_true", help="Не сбрасывать кэш страниц между запросами")
+    args = parser.parse_args()
+
+    # Замер идёт через приложение, поэтому заполняется его собственная база
+    if args.seed:
+        if not args.force:
+            parser.error("--seed пересоздаёт базу из DATABASE_URL; подтвердите флагом --force")
+        from app.core.config import settings
+        seed_catalog(settings.DATABASE_URL, args.authors, args.items)
+
+    results = asyncio.run(run(args.page, args.limit, args.repeats, args.cache))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Задержка горячих запросов к базе: выдачи читателя, просрочки, книги автора, даты публикации, жанр.
+
+Запускается на базе, заполненной benchmarks.seed с выдачами, до и после миграции индексов:
+
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --authors 10000 --items 200000 \
+        --users 20000 --loans 500000
+    python -m benchmarks.queries --database-url sqlite:///./bench.db --iterations 200 --explain
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.models import LiteratureItem, Transaction, User
+from benchmarks.common import summarize_latencies
+
+# Книги за десятилетие, начиная с года start, в порядке даты публикации
+def decade_query(start: int):
+    return select(LiteratureItem.id, LiteratureItem.title).where(
+        LiteratureItem.publication_date >= date(start, 1, 1),
+        LiteratureItem.publication_date < date(start + 10, 1, 1),
+    ).order_by(LiteratureItem.publication_date, LiteratureItem.id).limit(10)
+
+def hot_queries(user_ids: list, max_author_id: int, max_item_id: int):
+    return {
+        # Лимит невозвращенных книг при выдаче
+        "active_loans_count": lambda rng: select(func.count()).select_from(Transaction).where(
+            Transaction.user_id == rng.choice(user_ids), Transaction.return_date.is_(None)
+        ),
+        "user_loan_history": lambda rng: select(Transaction).where(
+            Transaction.user_id == rng.choice(user_ids)
+        ),
+        "book_loans": lambda rng: select(Transaction.id).where(
+            Transaction.literature_item_id == rng.randint(1, max_item_id)
+        ),
+        "overdue_loans": lambda rng: select(Transaction.id, Transaction.due_date).where(
+            Transaction.return_date.is_(None), Transaction.due_date < datetime.utcnow()
+        ).order_by(Transaction.due_date).limit(100),
+        "author_items": lambda rng: select(LiteratureItem.id, LiteratureItem.title).where(
+            LiteratureItem.author_id == rng.randint(1, max_author_id)
+        ).order_by(LiteratureItem.id).limit(10),
+        "publication_date_range": lambda rng: decade_query(rng.randint(1800, 2014)),
+        "genre_filter": lambda rng: select(LiteratureItem.id, LiteratureItem.title).where(
+            LiteratureItem.genre.ilike(f"%{rng.choice(['Поэз', 'Detect', 'Science'])}%")
+        ).order_by(LiteratureItem.id).offset(rng.randint(0, 1000)).limit(10),
+    }
+
+# План запроса в виде текста для текущей СУБД
+def explain(connection, statement) -> str:
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    rows = connection.execute(text(prefix + str(compiled))).all()
+    return " | ".join(str(row[-1]) for row in rows)
+
+def run(database_url: str, iterations: int, with_plans: bool, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    summary = {}
+    with engine.connect() as connection:
+        user_ids = connection.execute(select(User.id).where(User.role == "user").limit(1000)).scalars().all()
+        max_author_id = connection.execute(select(func.max(LiteratureItem.author_id))).scalar_one()
+        max_item_id = connection.execute(select(func.max(LiteratureItem.id))).scalar_one()
+        for name, build in hot_queries(user_ids, max_author_id, max_item_id).items():
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(iterations):
+                statement = build(rng)
+                query_started = time.perf_counter()
+                connection.execute(statement).all()
+                latencies.append(time.perf_counter() - query_started)
+            summary[name] = summarize_latencies(latencies, time.perf_counter() - started)
+            if with_plans:
+                summary[name]["plan"] = explain(connection, build(rng))
+    engine.dispose()
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot query latency benchmark")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--explain", action="store_true", help="Добавить план каждого запроса")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    summary = run(args.database_url or settings.DATABASE_URL, args.iterations, args.explain)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
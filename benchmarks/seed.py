@@ -0,0 +1,117 @@
+"""Заполнение базы синтетическим каталогом и историей выдач для бенчмарков.
+
+Размер задаётся готовым профилем или отдельными параметрами; при одинаковом --seed
+данные совпадают между запусками. Схема базы пересоздаётся, поэтому базу приложения
+из DATABASE_URL можно заполнить только с --force:
+
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --profile medium
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --force --authors 10000 --items 200000 \
+        --users 20000 --loans 500000
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+
+from app.core.search import refresh_search_vectors
+from app.db.base import Base
+from app.models import Author, LiteratureItem, Transaction, User
+from app.models.transaction import LOAN_PERIOD
+from benchmarks.common import is_app_database
+
+GENRES = ["Роман", "Поэзия", "Фантастика", "Детектив", "История", "Fiction", "Non-fiction", "Science"]
+
+BATCH_SIZE = 10000
+
+# Доля выдач, которые ещё не возвращены
+ACTIVE_LOAN_SHARE = 0.05
+
+# Готовые размеры набора данных: авторы, книги, читатели, выдачи
+PROFILES = {
+    "small": {"authors": 1000, "items": 20000, "users": 2000, "loans": 50000},
+    "medium": {"authors": 10000, "items": 200000, "users": 20000, "loans": 500000},
+    "large": {"authors": 100000, "items": 1000000, "users": 100000, "loans": 5000000},
+}
+
+# Пересоздаёт схему и вставляет авторов, книги, читателей и выдачи пакетами через executemany
+def seed_catalog(database_url: str, authors: int, items: int, users: int = 0, loans: int = 0, seed: int = 42):
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    if engine.dialect.name == "postgresql":
+        # Триграммные индексы (поиск автора, фильтр по жанру) требуют расширения, как и в миграции
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        for start in range(0, authors, BATCH_SIZE):
+            connection.execute(insert(Author), [
+                {"name": f"Автор {i}", "bio": f"Биография автора {i}"}
+                for i in range(start, min(start + BATCH_SIZE, authors))
+            ])
+        for start in range(0, items, BATCH_SIZE):
+            connection.execute(insert(LiteratureItem), [
+                {
+                    "title": f"Книга {i}",
+                    "description": f"Описание книги {i}",
+                    "genre": rng.choice(GENRES),
+                    "publication_date": f"{rng.randint(1800, 2024)}-01-01",
+                    "available_copies": rng.randint(0, 5),
+                    "author_id": rng.randint(1, authors),
+                }
+                for i in range(start, min(start + BATCH_SIZE, items))
+            ])
+        refresh_search_vectors(connection, LiteratureItem.__table__)
+
+        user_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(users)]
+        for start in range(0, users, BATCH_SIZE):
+            connection.execute(insert(User), [
+                {"id": user_id, "username": f"reader{start + i}", "hashed_password": "-", "role": "user"}
+                for i, user_id in enumerate(user_ids[start:start + BATCH_SIZE])
+            ])
+        now = datetime.utcnow()
+        for start in range(0, loans if user_ids else 0, BATCH_SIZE):
+            batch = []
+            for _ in range(start, min(start + BATCH_SIZE, loans)):
+                loan_date = now - timedelta(days=rng.uniform(0, 3 * 365))
+                active = rng.random() < ACTIVE_LOAN_SHARE
+                batch.append({
+                    "user_id": rng.choice(user_ids),
+                    "literature_item_id": rng.randint(1, items),
+                    "loan_date": loan_date,
+                    "due_date": loan_date + LOAN_PERIOD,
+                    "return_date": None if active else loan_date + timedelta(days=rng.uniform(1, 20)),
+                })
+            connection.execute(insert(Transaction), batch)
+    engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic catalog")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--profile", choices=PROFILES, default=None, help="Готовый размер набора данных")
+    parser.add_argument("--authors", type=int, default=None)
+    parser.add_argument("--items", type=int, default=None)
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--loans", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Разрешить пересоздание базы приложения из DATABASE_URL")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    database_url = args.database_url or settings.DATABASE_URL
+    if is_app_database(database_url) and not args.force:
+        parser.error("база совпадает с DATABASE_URL приложения и будет пересоздана; укажите --database-url или --force")
+
+    # Явно указанные размеры дополняют профиль
+    sizes = dict(PROFILES[args.profile]) if args.profile else {"authors": 10000, "items": 200000, "users": 0, "loans": 0}
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    seed_catalog(database_url, seed=args.seed, **sizes)
+
+if __name__ == "__main__":
+    main()
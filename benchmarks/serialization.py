@@ -0,0 +1,119 @@
+"""Микробенчмарк сериализации страницы из 100 записей LiteratureItemResponse и AuthorResponse.
+
+Сравниваются пути от результата запроса до байтов ответа:
+
+- fastapi_default: ORM-объекты → serialize_response FastAPI (валидация по response_model
+  и jsonable_encoder) → стандартный json, как было до оптимизации;
+- fastapi_orjson: то же, но байты формирует ORJSONResponse;
+- adapter_orm: ORM-объекты → TypeAdapter.validate_python → dump_json (json_response);
+- adapter_rows: строки колоночного запроса → TypeAdapter → dump_json.
+
+    python -m benchmarks.serialization --iterations 2000
+"""
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import Author, LiteratureItem
+from app.schemas.author import AuthorResponse, authors_adapter
+from app.schemas.literature_item import LiteratureItemResponse, literature_items_adapter
+from benchmarks.common import summarize_latencies
+
+PAGE_SIZE = 100
+
+ItemRow = namedtuple(
+    "ItemRow", ["id", "title", "description", "publication_date", "genre", "available_copies", "author_id"]
+)
+AuthorRow = namedtuple("AuthorRow", ["id", "name", "bio"])
+
+def item_values(i: int) -> dict:
+    return {
+        "id": i,
+        "title": f"Книга {i}",
+        "description": f"Описание книги {i} " * 5,
+        "publication_date": date(1900, 1, 1) + timedelta(days=i * 97),
+        "genre": "Роман",
+        "available_copies": i % 5,
+        "author_id": i % 17 + 1,
+    }
+
+def author_values(i: int) -> dict:
+    return {"id": i, "name": f"Автор {i}", "bio": f"Биография автора {i} " * 5}
+
+def build_pages():
+    items = [item_values(i) for i in range(1, PAGE_SIZE + 1)]
+    authors = [author_values(i) for i in range(1, PAGE_SIZE + 1)]
+    return {
+        "literature_items": (
+            List[LiteratureItemResponse],
+            literature_items_adapter,
+            [LiteratureItem(**values) for values in items],
+            [ItemRow(**values) for values in items],
+        ),
+        "authors": (
+            List[AuthorResponse],
+            authors_adapter,
+            [Author(**values) for values in authors],
+            [AuthorRow(**values) for values in authors],
+        ),
+    }
+
+# serialize_response — корутина без ожиданий внутри, её результат забирается без цикла событий
+def run_coroutine(coroutine):
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response awaited unexpectedly")
+
+def fastapi_path(response_class, response_type):
+    field = create_model_field(name="Response", type_=response_type, mode="serialization")
+
+    def render(objects):
+        content = run_coroutine(serialize_response(field=field, response_content=objects))
+        return response_class(content).body
+
+    return render
+
+def adapter_path(adapter):
+    return lambda values: adapter.dump_json(adapter.validate_python(values, from_attributes=True))
+
+def measure(render, values, iterations: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        render(values)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize_latencies(latencies, time.perf_counter() - started)
+
+def run(iterations: int) -> dict:
+    summary = {}
+    for name, (response_type, adapter, objects, rows) in build_pages().items():
+        paths = {
+            "fastapi_default": (fastapi_path(JSONResponse, response_type), objects),
+            "fastapi_orjson": (fastapi_path(ORJSONResponse, response_type), objects),
+            "adapter_orm": (adapter_path(adapter), objects),
+            "adapter_rows": (adapter_path(adapter), rows),
+        }
+        # Все пути должны давать один и тот же документ
+        documents = {json.dumps(json.loads(render(values)), sort_keys=True) for render, values in paths.values()}
+        assert len(documents) == 1, f"{name}: serialization paths disagree"
+        summary[name] = {path: measure(render, values, iterations) for path, (render, values) in paths.items()}
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
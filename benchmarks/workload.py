@@ -0,0 +1,257 @@
+"""Смешанная нагрузка на API: просмотр каталога, поиск, вход и всплески выдач/возвратов.
+
+База заполняется заранее через benchmarks.seed (размер задаёт --profile), затем нагрузка
+подаётся либо на приложение в том же процессе (ASGI-транспорт httpx, без сети),
+либо на работающий сервер по HTTP. Последовательность операций каждого клиента
+определяется --seed, поэтому запуски на разных коммитах сравнимы между собой:
+
+    export DATABASE_URL=sqlite:///./bench.db
+    python -m benchmarks.seed --force --profile medium
+    python -m benchmarks.workload --force --clients 32 --duration 60 --output results/before.json
+    python -m benchmarks.workload --base-url http://localhost:8000 --database-url postgresql://... \
+        --output results/after.json
+    python -m benchmarks.compare results/before.json results/after.json
+
+Учётные записи бенчмарка добавляются в базу из --database-url; в базу приложения из DATABASE_URL
+(в том числе при запуске в процессе, где приложение работает именно с ней) — только с --force.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import make_url
+
+from app.core.security import hash_password
+from app.models import Author, LiteratureItem, Transaction, User
+from benchmarks.common import is_app_database, summarize_latencies
+
+BENCH_PASSWORD = "bench_workload_password"
+SEARCH_TERMS = ["Книга", "Описание", "Роман", "Поэзия", "Fiction", "Science", "История"]
+# Книг в одном всплеске выдач: меньше лимита невозвращенных книг на читателя
+BURST_SIZE = 3
+
+# Доли операций в смешанной нагрузке
+SCENARIO_WEIGHTS = {
+    "browse": 40,
+    "item": 20,
+    "authors": 10,
+    "search": 15,
+    "login": 5,
+    "circulation": 10,
+}
+
+# Администратор, пользователь для входа и по читателю на каждого клиента, чтобы
+# всплески выдач разных клиентов не упирались в общий лимит невозвращенных книг
+def prepare_accounts(database_url: str, clients: int) -> dict:
+    engine = create_engine(database_url)
+    run_id = uuid.uuid4().hex[:8]
+    hashed_password = hash_password(BENCH_PASSWORD)
+    reader_ids = [str(uuid.uuid4()) for _ in range(clients)]
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": str(uuid.uuid4()), "username": f"bench_admin_{run_id}", "hashed_password": hashed_password, "role": "admin"},
+            {"id": str(uuid.uuid4()), "username": f"bench_user_{run_id}", "hashed_password": hashed_password, "role": "user"},
+        ] + [
+            {"id": reader_id, "username": f"bench_reader_{run_id}_{i}", "hashed_password": "-", "role": "user"}
+            for i, reader_id in enumerate(reader_ids)
+        ])
+        dataset = {
+            "authors": connection.execute(select(func.count()).select_from(Author)).scalar_one(),
+            "items": connection.execute(select(func.count()).select_from(LiteratureItem)).scalar_one(),
+            "users": connection.execute(select(func.count()).select_from(User)).scalar_one(),
+            "transactions": connection.execute(select(func.count()).select_from(Transaction)).scalar_one(),
+            "max_item_id": connection.execute(select(func.max(LiteratureItem.id))).scalar() or 1,
+            "max_author_id": connection.execute(select(func.max(Author.id))).scalar() or 1,
+        }
+    engine.dispose()
+    return {
+        "admin": {"username": f"bench_admin_{run_id}", "password": BENCH_PASSWORD},
+        "user": {"username": f"bench_user_{run_id}", "password": BENCH_PASSWORD},
+        "reader_ids": reader_ids,
+        "dataset": dataset,
+        "dialect": make_url(database_url).get_backend_name(),
+    }
+
+# Ответы 4xx (например, у книги нет свободных экземпляров) учитываются отдельно от сбоев
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.rejected = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            self.errors[name] += 1
+        elif response.status_code >= 400:
+            self.rejected[name] += 1
+        return response
+
+# Один виртуальный клиент: выбирает сценарии по весам, пока не истечёт время
+async def client_worker(client, recorder: Recorder, rng: random.Random, accounts: dict, reader_id: str,
+                        admin_headers: dict, deadline: float):
+    dataset = accounts["dataset"]
+    scenarios = list(SCENARIO_WEIGHTS)
+    weights = list(SCENARIO_WEIGHTS.values())
+    next_cursor = None
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario == "browse":
+            # Листание каталога: продолжаем с курсора предыдущей страницы или начинаем заново
+            params = {"limit": 20}
+            if next_cursor and rng.random() < 0.7:
+                params["cursor"] = next_cursor
+            response = await recorder.call(client, "GET /literature/", "GET", "/literature/", params=params)
+            next_cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        elif scenario == "item":
+            item_id = rng.randint(1, dataset["max_item_id"])
+            await recorder.call(
+                client, "GET /literature/literature_items/{literature_id}", "GET",
+                f"/literature/literature_items/{item_id}",
+            )
+        elif scenario == "authors":
+            author_id = rng.randint(1, dataset["max_author_id"])
+            await recorder.call(
+                client, "GET /authors/{author_id}/literature_items", "GET",
+                f"/authors/{author_id}/literature_items", params={"limit": 10},
+            )
+        elif scenario == "search":
+            await recorder.call(
+                client, "GET /literature/search", "GET", "/literature/search",
+                params={"q": rng.choice(SEARCH_TERMS), "limit": 10},
+            )
+        elif scenario == "login":
+            await recorder.call(client, "POST /auth/login", "POST", "/auth/login", json=accounts["user"])
+        else:
+            # Всплеск: несколько выдач подряд одному читателю и их возврат
+            transaction_ids = []
+            for _ in range(BURST_SIZE):
+                book_id = rng.randint(1, dataset["max_item_id"])
+                response = await recorder.call(
+                    client, "POST /transactions/issue/{book_id}", "POST", f"/transactions/issue/{book_id}",
+                    json={"user_id": reader_id}, headers=admin_headers,
+                )
+                if response is not None and response.status_code == 200:
+                    transaction_ids.append(response.json()["transaction_id"])
+            for transaction_id in transaction_ids:
+                await recorder.call(
+                    client, "POST /transactions/return/{transaction_id}", "POST",
+                    f"/transactions/return/{transaction_id}", headers=admin_headers,
+                )
+
+def make_client(base_url: str | None, clients: int) -> httpx.AsyncClient:
+    if base_url:
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(database_url: str, base_url: str | None, clients: int, duration: float, warmup: float, seed: int) -> dict:
+    accounts = prepare_accounts(database_url, clients)
+    async with make_client(base_url, clients) as client:
+        response = await client.post("/auth/login", json=accounts["admin"])
+        response.raise_for_status()
+        admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def phase(seconds: float, recorder: Recorder, phase_seed: int):
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(*(
+                client_worker(
+                    client, recorder, random.Random(phase_seed * 1000 + i), accounts,
+                    accounts["reader_ids"][i], admin_headers, deadline,
+                )
+                for i in range(clients)
+            ))
+
+        # Прогрев: кэши, пул соединений, JIT планов запросов — в результат не входит
+        if warmup > 0:
+            await phase(warmup, Recorder(), seed + 1)
+        recorder = Recorder()
+        started = time.perf_counter()
+        await phase(duration, recorder, seed)
+        elapsed = time.perf_counter() - started
+
+    endpoints = {
+        name: {
+            **summarize_latencies(latencies, elapsed),
+            "errors": recorder.errors[name],
+            "rejected": recorder.rejected[name],
+        }
+        for name, latencies in sorted(recorder.latencies.items())
+    }
+    all_latencies = [value for latencies in recorder.latencies.values() for value in latencies]
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": "http" if base_url else "in-process",
+            "base_url": base_url,
+            "database": accounts["dialect"],
+            "dataset": accounts["dataset"],
+            "clients": clients,
+            "duration": duration,
+            "warmup": warmup,
+            "seed": seed,
+            "python": platform.python_version(),
+        },
+        "total": {
+            **summarize_latencies(all_latencies, elapsed),
+            "errors": sum(recorder.errors.values()),
+            "rejected": sum(recorder.rejected.values()),
+        },
+        "endpoints": endpoints,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed workload benchmark for the Literature Hub API")
+    parser.add_argument("--base-url", default=None, help="Адрес сервера; без него приложение вызывается в процессе")
+    parser.add_argument("--database-url", default=None, help="База для подготовки учётных записей")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Файл для результатов в JSON")
+    parser.add_argument("--force", action="store_true", help="Разрешить запись учётных записей в базу приложения")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    database_url = args.database_url or settings.DATABASE_URL
+    if not args.base_url and not is_app_database(database_url):
+        parser.error("без --base-url приложение работает с базой из DATABASE_URL; --database-url должен совпадать с ней")
+    if is_app_database(database_url) and not args.force:
+        parser.error("учётные записи будут добавлены в базу приложения из DATABASE_URL; укажите --database-url или --force")
+    summary = asyncio.run(run(database_url, args.base_url, args.clients, args.duration, args.warmup, args.seed))
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
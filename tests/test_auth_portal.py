@@ -3,7 +3,8 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.db.session import SessionLocal
 from app.models.user import User
-from app.core.security import hash_password
+from app.core.security import hash_password, pwd_context
+from passlib.context import CryptContext
 from app.schemas.auth_token import AuthToken
 from app.schemas.login import LoginRequest
 
@@ -82,4 +83,19 @@ def test_invalid_json_format(client):
         "pwd": "testpassword"  # неверное имя поля
     }
     response = client.post("/auth/login", json=login_data)
-    assert response.status_code == 422  # Ошибка валидации
\ No newline at end of file
+    assert response.status_code == 422  # Ошибка валидации
+
+# Хэш с устаревшей стоимостью bcrypt пересчитывается при успешном входе
+def test_login_rehashes_password_with_outdated_cost(client, db):
+    outdated_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    user = User(username="rehashuser", hashed_password=outdated_context.hash("rehashpassword"))
+    db.add(user)
+    db.commit()
+    assert pwd_context.needs_update(user.hashed_password)
+
+    response = client.post("/auth/login", json={"username": "rehashuser", "password": "rehashpassword"})
+    assert response.status_code == 200
+
+    db.refresh(user)
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert pwd_context.verify("rehashpassword", user.hashed_password)
@@ -1,11 +1,15 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, async_engine
+from app.core.cache import query_cache
+from app.core.pagination import encode_cursor
 from app.models import Author, User, LiteratureItem
 from app.core.security import hash_password
 from app.schemas.author import AuthorCreate
 from app.schemas.literature_item import LiteratureItemResponse
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from contextlib import contextmanager
 from typing import Generator
 import pytest
 
@@ -22,6 +26,11 @@ def db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+# Тесты пишут в базу напрямую, минуя инвалидацию кэша в эндпоинтах
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    query_cache.clear()
+
 # Фикстура для создания администратора
 @pytest.fixture()
 def admin_user(db):
@@ -103,4 +112,120 @@ def test_get_literature_items_for_author(db):
     response = client.get(f"/authors/{new_author.id}/literature_items")
     assert response.status_code == 200
     assert len(response.json()) == 2
-    assert "title" in response.json()[0]
\ No newline at end of file
+    assert "title" in response.json()[0]
+
+# Подсчёт SQL-запросов, выполненных приложением через асинхронный движок
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+# Число запросов к БД не зависит от размера страницы авторов
+def test_get_authors_statement_count_is_constant(db):
+    for i in range(12):
+        author = Author(name=f"Counted Author {i}", bio="Bio")
+        db.add(author)
+        db.flush()
+        db.add(LiteratureItem(title=f"Counted Book {i}-1", author_id=author.id))
+        db.add(LiteratureItem(title=f"Counted Book {i}-2", author_id=author.id))
+    db.commit()
+
+    with count_statements() as small_page:
+        response = client.get("/authors/", params={"limit": 2, "include": "literature_items"})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    with count_statements() as large_page:
+        response = client.get("/authors/", params={"limit": 10, "include": "literature_items"})
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    counted = [author for author in response.json() if author["name"].startswith("Counted Author")]
+    assert counted and all(len(author["literature_items"]) == 2 for author in counted)
+
+    assert len(small_page) == len(large_page) == 2
+
+    # Без include список книг не загружается вовсе
+    with count_statements() as plain_page:
+        response = client.get("/authors/", params={"limit": 10})
+    assert response.status_code == 200
+    assert len(plain_page) == 1
+    assert all("literature_items" not in author for author in response.json())
+
+# Некорректное значение include
+def test_get_authors_invalid_include():
+    response = client.get("/authors/", params={"include": "transactions"})
+    assert response.status_code == 400
+
+# Постраничная выдача книг автора
+def test_get_literature_items_for_author_paginated(db):
+    new_author = Author(name="Prolific Author", bio="Author Bio")
+    db.add(new_author)
+    db.commit()
+    db.refresh(new_author)
+
+    for i in range(3):
+        db.add(LiteratureItem(title=f"Volume {i}", author_id=new_author.id))
+    db.commit()
+
+    response = client.get(f"/authors/{new_author.id}/literature_items", params={"limit": 2})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Volume 0", "Volume 1"]
+
+    response = client.get(f"/authors/{new_author.id}/literature_items", params={"limit": 2, "offset": 2})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Volume 2"]
+
+# Книги несуществующего автора
+def test_get_literature_items_for_unknown_author():
+    response = client.get("/authors/999999/literature_items")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Author not found"
+
+# Курсорная пагинация списка авторов
+def test_get_authors_cursor_pagination(db):
+    created = [Author(name=f"Keyset Writer {i}", bio="Bio") for i in range(3)]
+    db.add_all(created)
+    db.commit()
+
+    # Начинаем выдачу сразу перед первым созданным автором
+    params = {"limit": 2, "cursor": encode_cursor([created[0].id - 1])}
+    response = client.get("/authors/", params=params)
+    assert response.status_code == 200
+    first_page = [author["name"] for author in response.json()]
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/authors/", params={"limit": 2, "cursor": next_cursor})
+    assert response.status_code == 200
+    second_page = [author["name"] for author in response.json()]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert first_page + second_page == [f"Keyset Writer {i}" for i in range(3)]
+
+# Нечёткий поиск по имени: опечатки, "ё" и ранжирование по сходству
+def test_get_authors_fuzzy_name_search(db):
+    leo = Author(name="Лев Николаевич Толстой", bio="Bio")
+    alexey = Author(name="Алексей Константинович Толстой", bio="Bio")
+    fyodor = Author(name="Фёдор Михайлович Достоевский", bio="Bio")
+    db.add_all([leo, alexey, fyodor])
+    db.commit()
+
+    response = client.get("/authors/", params={"name": "лев толстой"})
+    assert response.status_code == 200
+    assert [author["id"] for author in response.json()][:2] == [leo.id, alexey.id]
+
+    response = client.get("/authors/", params={"name": "Толстй"})
+    assert {leo.id, alexey.id} <= {author["id"] for author in response.json()}
+
+    response = client.get("/authors/", params={"name": "Федор Достоевский"})
+    assert [author["id"] for author in response.json()] == [fyodor.id]
+
+    response = client.get("/authors/", params={"name": "Толстой", "cursor": encode_cursor([0])})
+    assert response.status_code == 400
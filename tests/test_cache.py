@@ -0,0 +1,386 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal, async_engine
+from app.models import Author, User
+from app.core.cache import (
+    GenerationalCache,
+    LRUCache,
+    PrincipalCache,
+    QueryResultCache,
+    literature_item_cache,
+    principal_cache,
+    query_cache,
+)
+from app.core.invalidation import ChangeEvent, LoopbackInvalidationBus, encode_messages, evict
+from app.core.metrics import cache_invalidation_lag_seconds
+from app.core.security import Principal, hash_password
+from app.db.pool import InstrumentedQueuePool, pool_stats
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from typing import Generator
+import asyncio
+import json
+import pytest
+
+# Используем TestClient для тестирования FastAPI приложения
+client = TestClient(app)
+
+# Управляемые часы для проверки срока жизни записей
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+# Подсчёт SQL-запросов, выполненных приложением через асинхронный движок
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+# Фикстура для аутентификации пользователя и получения токена
+def authenticate_user(client, username, password):
+    response = client.post("/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+# Фикстура для работы с базой данных
+@pytest.fixture(scope="module")
+def db() -> Generator[Session, None, None]:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Фикстура для создания администратора
+@pytest.fixture()
+def admin_user(db):
+    admin = db.query(User).filter(User.username == "admin").first()
+    if not admin:
+        admin = User(
+            username="admin",
+            hashed_password=hash_password("adminpassword"),
+            role="admin"
+        )
+        db.add(admin)
+        db.commit()
+        db.refresh(admin)
+    return admin
+
+# Попадания и промахи учитываются в счётчиках
+def test_lru_cache_hits_and_misses():
+    cache = LRUCache(maxsize=2)
+    assert cache.get("missing") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+# При переполнении вытесняется давно не использованная запись
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats().evictions == 1
+
+# Запись перестаёт выдаваться по истечении срока жизни
+def test_lru_cache_ttl_expiration():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats().expirations == 1
+
+# Явное удаление и очистка
+def test_lru_cache_delete_and_clear():
+    cache = LRUCache(maxsize=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.stats().size == 0
+
+# С ограничением по памяти вытесняются старые записи, а запись больше всего кэша не сохраняется
+def test_lru_cache_max_bytes():
+    cache = LRUCache(maxsize=10, max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"1234")
+    cache.set("c", b"123")
+    assert cache.get("a") is None
+    assert cache.get("b") == b"1234"
+
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert (stats.bytes, stats.max_bytes, stats.evictions) == (7, 10, 1)
+
+# Промах по ключу пересчитывает один запрос, запись в таблицу меняет ключи зависящих от неё результатов
+def test_query_result_cache_single_flight_and_invalidation():
+    cache = QueryResultCache(LRUCache(maxsize=10))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"page"
+
+    async def fetch_concurrently(key):
+        return await asyncio.gather(*(cache.get_or_compute(key, compute) for _ in range(5)))
+
+    key = cache.key("literature_items", ("literature_items",), {"genre": "Роман", "title": None, "limit": 10})
+    assert key == cache.key("literature_items", ("literature_items",), {"limit": 10, "genre": "Роман"})
+    assert asyncio.run(fetch_concurrently(key)) == [b"page"] * 5
+    assert len(calls) == 1
+
+    cache.invalidate("authors")
+    assert cache.key("literature_items", ("literature_items",), {"limit": 10, "genre": "Роман"}) == key
+    cache.invalidate("literature_items")
+    key = cache.key("literature_items", ("literature_items",), {"limit": 10, "genre": "Роман"})
+    assert cache.get(key) is None
+    asyncio.run(fetch_concurrently(key))
+    assert len(calls) == 2
+
+# Повторный запрос списка отдаётся из кэша без обращения к БД, создание книги сбрасывает кэш
+def test_literature_items_list_uses_query_cache(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+    author = Author(name="Query Cache Author", bio="Bio")
+    db.add(author)
+    db.commit()
+    query_cache.clear()
+
+    params = {"genre": "Кэшированный жанр", "limit": 5}
+    first = client.get("/literature/", params=params)
+    assert first.status_code == 200
+    with count_statements() as statements:
+        second = client.get("/literature/", params=params)
+    assert statements == []
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    response = client.post(
+        "/literature/literature_items",
+        json={"title": "Cached Genre Book", "genre": "Кэшированный жанр", "author_id": author.id},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    response = client.get("/literature/", params=params)
+    assert [item["title"] for item in response.json()] == [item["title"] for item in first.json()] + ["Cached Genre Book"]
+    assert response.headers["ETag"] != first.headers["ETag"]
+
+# Событие записи применяется воркером-автором сразу, остальными — по сообщению шины, с замером задержки
+def test_loopback_invalidation_bus_delivers_to_other_workers():
+    peers = []
+    applied = {"a": [], "b": []}
+    bus_a = LoopbackInvalidationBus(peers, worker_id="a", handler=applied["a"].append)
+    bus_b = LoopbackInvalidationBus(peers, worker_id="b", handler=applied["b"].append)
+    lag_before = cache_invalidation_lag_seconds.values.get((), [None, 0.0, 0])[2]
+
+    async def scenario():
+        await bus_a.start()
+        await bus_b.start()
+        await bus_a.publish([ChangeEvent("literature_items", 1), ChangeEvent("authors")])
+        await bus_b.stop()
+        await bus_a.publish([ChangeEvent("users", "user-1")])
+
+    asyncio.run(scenario())
+    assert applied["a"] == [
+        ChangeEvent("literature_items", 1), ChangeEvent("authors"), ChangeEvent("users", "user-1")
+    ]
+    assert applied["b"] == [ChangeEvent("literature_items", 1), ChangeEvent("authors")]
+    assert cache_invalidation_lag_seconds.values[()][2] == lag_before + 1
+
+# Из синхронного хука событие применяется сразу, а рассылается задачей в цикле событий
+def test_loopback_invalidation_bus_publish_nowait():
+    peers = []
+    applied = {"a": [], "b": []}
+    bus_a = LoopbackInvalidationBus(peers, worker_id="a", handler=applied["a"].append)
+    bus_b = LoopbackInvalidationBus(peers, worker_id="b", handler=applied["b"].append)
+
+    async def scenario():
+        await bus_a.start()
+        await bus_b.start()
+        bus_a.publish_nowait([ChangeEvent("users", "user-1")])
+        assert applied == {"a": [ChangeEvent("users", "user-1")], "b": []}
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert applied["b"] == [ChangeEvent("users", "user-1")]
+
+# Большие пачки событий делятся на несколько уведомлений
+def test_encode_messages_splits_large_batches():
+    events = [ChangeEvent("literature_items", book_id) for book_id in range(450)]
+    messages = encode_messages("worker", events)
+    assert [len(json.loads(message)["events"]) for message in messages] == [200, 200, 50]
+    assert all(len(message.encode()) < 8000 for message in messages)
+
+# Изменение книги вытесняет её карточку и страницы списков книг
+def test_evict_literature_item_change():
+    literature_item_cache.set(999, ("etag", {"title": "Stale"}), literature_item_cache.generation(999))
+    key = query_cache.key("literature_items", ("literature_items",), {"limit": 10})
+    evict(ChangeEvent("literature_items", 999))
+    assert literature_item_cache.get(999) is None
+    assert query_cache.key("literature_items", ("literature_items",), {"limit": 10}) != key
+
+# Счётчики кэшей доступны администратору
+def test_get_cache_stats(admin_user):
+    response = client.post("/auth/login", json={"username": "admin", "password": "adminpassword"})
+    token = response.json()["access_token"]
+
+    response = client.get("/admin/cache", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    stats = response.json()["caches"]["literature_items"]
+    assert {"hits", "misses", "evictions", "size", "maxsize"} <= set(stats)
+
+# Без токена счётчики недоступны
+def test_get_cache_stats_requires_auth():
+    response = client.get("/admin/cache")
+    assert response.status_code == 401
+
+# Состояние пулов соединений доступно администратору
+def test_get_pool_stats(admin_user):
+    response = client.post("/auth/login", json={"username": "admin", "password": "adminpassword"})
+    token = response.json()["access_token"]
+
+    response = client.get("/admin/pool", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    pools = response.json()["pools"]
+    assert set(pools) == {"async", "sync"}
+    assert pools["async"]["acquisitions"] > 0
+    assert client.get("/admin/pool").status_code == 401
+
+# Тайм-аут ожидания соединения и занятые соединения попадают в статистику пула
+def test_pool_telemetry_counts_timeouts(tmp_path):
+    pool_engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    try:
+        with pool_engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                pool_engine.connect()
+            stats = pool_stats(pool_engine)
+            assert stats["checked_out"] == 1
+            assert stats["max_connections"] == 1
+        stats = pool_stats(pool_engine)
+        assert stats["checked_out"] == 0
+        assert stats["acquisitions"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.05
+    finally:
+        pool_engine.dispose()
+
+# Значение, прочитанное до удаления ключа, не сохраняется; после удаления ключ снова кэшируется
+def test_generational_cache_skips_stale_set():
+    cache = GenerationalCache(LRUCache(maxsize=10), max_generations=2)
+    generation = cache.generation("book")
+    cache.delete("book")
+    cache.set("book", "old row", generation)
+    assert cache.get("book") is None
+
+    cache.set("book", "new row", cache.generation("book"))
+    assert cache.get("book") == "new row"
+
+    generation = cache.generation("book")
+    cache.clear()
+    cache.set("book", "old row", generation)
+    assert cache.get("book") is None
+
+# Срок жизни записи ограничен сроком действия токена
+def test_principal_cache_ttl_bounded_by_token_expiry():
+    clock = FakeClock()
+    cache = PrincipalCache(LRUCache(maxsize=10, clock=clock), ttl=300, clock=clock)
+    principal = Principal(id="user-1", username="reader", role="user")
+
+    cache.set("token", principal, expires_at=30, generation=cache.generation("user-1"))
+    clock.now = 29
+    assert cache.get("token") == principal
+    clock.now = 31
+    assert cache.get("token") is None
+
+    # Уже истёкший токен не кэшируется
+    cache.set("expired", principal, expires_at=10, generation=0)
+    assert cache.get("expired") is None
+
+# Отзыв пользователя делает недействительными все его записи
+def test_principal_cache_invalidate_user():
+    cache = PrincipalCache(LRUCache(maxsize=10), ttl=300)
+    principal = Principal(id="user-1", username="reader", role="user")
+    cache.set("token-1", principal, expires_at=2**40, generation=cache.generation("user-1"))
+    cache.set("token-2", principal, expires_at=2**40, generation=cache.generation("user-1"))
+
+    cache.invalidate_user("user-1")
+    assert cache.get("token-1") is None
+    assert cache.get("token-2") is None
+
+# Повторный запрос с тем же токеном не обращается к БД
+def test_authenticated_request_uses_principal_cache(admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/admin/cache", headers=headers).status_code == 200
+    with count_statements() as statements:
+        assert client.get("/admin/cache", headers=headers).status_code == 200
+    assert statements == []
+
+# Отзыв происходит только после фиксации: на flush поколение не меняется, откат отменяет отзыв
+def test_principal_revocation_waits_for_commit(db):
+    reader = User(username="revoked_reader", hashed_password="x", role="user")
+    db.add(reader)
+    db.commit()
+    generation = principal_cache.generation(reader.id)
+
+    reader.role = "admin"
+    db.flush()
+    assert principal_cache.generation(reader.id) == generation
+    db.rollback()
+    assert principal_cache.generation(reader.id) == generation
+
+    reader.role = "admin"
+    db.flush()
+    assert principal_cache.generation(reader.id) == generation
+    db.commit()
+    assert principal_cache.generation(reader.id) != generation
+
+    db.delete(reader)
+    db.commit()
+
+# Смена роли и удаление пользователя отзывают закэшированный токен
+def test_role_change_and_delete_revoke_cached_principal(db):
+    reader = User(username="cached_reader", hashed_password=hash_password("readerpassword"), role="user")
+    db.add(reader)
+    db.commit()
+
+    token = authenticate_user(client, "cached_reader", "readerpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/admin/cache", headers=headers).status_code == 403
+
+    reader.role = "admin"
+    db.commit()
+    assert client.get("/admin/cache", headers=headers).status_code == 200
+
+    db.delete(reader)
+    db.commit()
+    assert client.get("/admin/cache", headers=headers).status_code == 401
@@ -1,11 +1,21 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, async_engine
 from app.models import User, LiteratureItem, Author
 from app.schemas.literature_item import LiteratureItemCreate
 from app.core.security import hash_password
+from app.core.cache import literature_item_cache, query_cache
+from app.core import catalog_import
+from app.core.catalog_export import accepts_gzip
+from app.core.dates import parse_publication_date
+from datetime import date
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from typing import Generator
+import asyncio
+import csv
+import io
+import json
 import pytest
 
 
@@ -21,6 +31,11 @@ def db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+# Тесты пишут в базу напрямую, минуя инвалидацию кэша в эндпоинтах
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    query_cache.clear()
+
 # Фикстура для создания администратора
 @pytest.fixture()
 def admin_user(db):
@@ -185,3 +200,390 @@ def test_delete_literature_item(db, admin_user):
     response = client.delete(f"/literature/literature_items/{literature_item.id}", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
     assert response.json()["title"] == "Book to Delete"
+
+# Курсорная пагинация проходит весь список без пропусков и дублей
+def test_get_literature_items_cursor_pagination(db):
+    new_author = Author(name="Cursor Author", bio="Test Bio")
+    db.add(new_author)
+    db.commit()
+    db.refresh(new_author)
+
+    for i in range(5):
+        db.add(LiteratureItem(title=f"Cursor Book {i}", genre="Cursor Genre", author_id=new_author.id))
+    db.commit()
+
+    titles = []
+    params = {"genre": "Cursor Genre", "limit": 2}
+    while True:
+        response = client.get("/literature/", params=params)
+        assert response.status_code == 200
+        titles.extend(item["title"] for item in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            assert "Link" not in response.headers
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        params = {"genre": "Cursor Genre", "limit": 2, "cursor": next_cursor}
+
+    assert titles == [f"Cursor Book {i}" for i in range(5)]
+
+# Некорректный курсор и одновременное использование курсора со смещением
+def test_get_literature_items_invalid_cursor():
+    response = client.get("/literature/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Некорректный курсор"
+
+    response = client.get("/literature/", params={"cursor": "WzFd", "offset": 10})
+    assert response.status_code == 400
+
+# Полнотекстовый поиск: ранжирование, подсветка и обновление индекса при изменении книги
+def test_search_literature_items(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    new_author = Author(name="Search Author", bio="Test Bio")
+    db.add(new_author)
+    db.commit()
+    db.refresh(new_author)
+
+    by_title = client.post("/literature/literature_items", json={
+        "title": "Война и мир",
+        "description": "Роман-эпопея",
+        "author_id": new_author.id,
+    }, headers=headers).json()
+    by_description = client.post("/literature/literature_items", json={
+        "title": "Севастопольские рассказы",
+        "description": "Очерки о войне и обороне Севастополя",
+        "author_id": new_author.id,
+    }, headers=headers).json()
+
+    response = client.get("/literature/search", params={"q": "войны"})
+    assert response.status_code == 200
+    results = response.json()
+    assert [item["id"] for item in results] == [by_title["id"], by_description["id"]]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert "<b>войне</b>" in results[1]["snippet"]
+
+    # После изменения книги поисковый документ пересчитывается
+    client.put(f"/literature/literature_items/{by_title['id']}", json={
+        "title": "Анна Каренина",
+        "description": "Роман о любви",
+        "author_id": new_author.id,
+    }, headers=headers)
+
+    response = client.get("/literature/search", params={"q": "войны"})
+    assert [item["id"] for item in response.json()] == [by_description["id"]]
+
+    response = client.get("/literature/search", params={"q": "каренину"})
+    assert [item["id"] for item in response.json()] == [by_title["id"]]
+
+# Повторное чтение книги обслуживается кэшем, изменение книги сбрасывает запись
+def test_get_literature_item_by_id_cache_invalidation(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+
+    new_author = Author(name="Cached Author", bio="Test Bio")
+    db.add(new_author)
+    db.commit()
+    db.refresh(new_author)
+
+    literature_item = LiteratureItem(title="Cached Book", author_id=new_author.id)
+    db.add(literature_item)
+    db.commit()
+    db.refresh(literature_item)
+
+    hits_before = literature_item_cache.stats().hits
+    assert client.get(f"/literature/literature_items/{literature_item.id}").json()["title"] == "Cached Book"
+    assert client.get(f"/literature/literature_items/{literature_item.id}").json()["title"] == "Cached Book"
+    assert literature_item_cache.stats().hits == hits_before + 1
+
+    updated_data = LiteratureItemCreate(title="Recached Book", author_id=new_author.id)
+    response = client.put(
+        f"/literature/literature_items/{literature_item.id}",
+        json=updated_data.model_dump(),
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert client.get(f"/literature/literature_items/{literature_item.id}").json()["title"] == "Recached Book"
+
+    client.delete(f"/literature/literature_items/{literature_item.id}", headers={"Authorization": f"Bearer {token}"})
+    assert client.get(f"/literature/literature_items/{literature_item.id}").status_code == 404
+
+# Условные запросы: совпавший ETag даёт 304 без тела, изменение книги меняет теги карточки и списка
+def test_literature_items_conditional_get(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+
+    new_author = Author(name="ETag Author", bio="Test Bio")
+    db.add(new_author)
+    db.commit()
+    db.refresh(new_author)
+
+    literature_item = LiteratureItem(title="ETag Book", author_id=new_author.id)
+    db.add(literature_item)
+    db.commit()
+    db.refresh(literature_item)
+    item_url = f"/literature/literature_items/{literature_item.id}"
+
+    response = client.get("/literature/?limit=5")
+    list_etag = response.headers["ETag"]
+    response = client.get("/literature/?limit=5", headers={"If-None-Match": list_etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == list_etag
+
+    # При пустом кэше совпавший тег проверяется одним чтением версии каталога, без запроса страницы
+    query_cache.clear()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get("/literature/?limit=5", headers={"If-None-Match": list_etag})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 304
+    assert len(statements) == 1
+    assert "catalog_versions" in statements[0]
+
+    item_etag = client.get(item_url).headers["ETag"]
+    # Второй запрос обслуживается кэшем, третий — с пустым кэшем по одной версии строки
+    assert client.get(item_url, headers={"If-None-Match": f'"other", W/{item_etag}'}).status_code == 304
+    literature_item_cache.clear()
+    assert client.get(item_url, headers={"If-None-Match": item_etag}).status_code == 304
+
+    response = client.put(
+        item_url,
+        json=LiteratureItemCreate(title="ETag Book 2", author_id=new_author.id).model_dump(),
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+
+    response = client.get(item_url, headers={"If-None-Match": item_etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "ETag Book 2"
+    assert response.headers["ETag"] != item_etag
+    assert client.get("/literature/?limit=5", headers={"If-None-Match": list_etag}).status_code == 200
+
+# Импорт NDJSON: авторы сопоставляются по нормализованному имени, ошибочные строки попадают в отчёт
+def test_import_catalog_ndjson(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+    existing_author = Author(name="Лев Толстой", bio="Писатель")
+    db.add(existing_author)
+    db.commit()
+
+    lines = [
+        json.dumps({"title": "Импорт Война и мир", "author": "лев  толстой", "available_copies": 3}),
+        json.dumps({"title": "Импорт Анна Каренина", "author": "Лев Толстой", "genre": "Роман"}),
+        json.dumps({"title": "Импорт Идиот", "author": "Фёдор Достоевский"}),
+        json.dumps({"title": "Импорт Бесы", "author": "Федор Достоевский"}),
+        json.dumps({"title": "", "author": "Аноним"}),
+        "{not json",
+        json.dumps({"title": "Импорт Без экземпляров", "author": "Аноним", "available_copies": -1}),
+    ]
+    response = client.post(
+        "/literature/import?chunk_size=2",
+        content="\n".join(lines).encode("utf-8"),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["processed"] == 7
+    assert report["imported"] == 4
+    assert report["authors_created"] == 1
+    assert [(error["line"], error["error"]) for error in report["errors"]] == [
+        (5, "Не указано название книги"),
+        (6, "Некорректный JSON"),
+        (7, "Некорректное число экземпляров"),
+    ]
+
+    items = db.query(LiteratureItem).filter(LiteratureItem.title.like("Импорт %")).all()
+    by_title = {item.title: item for item in items}
+    assert by_title["Импорт Война и мир"].author_id == existing_author.id
+    assert by_title["Импорт Война и мир"].available_copies == 3
+    assert by_title["Импорт Анна Каренина"].author_id == existing_author.id
+    assert by_title["Импорт Идиот"].author_id == by_title["Импорт Бесы"].author_id
+
+    # Импортированные книги сразу доступны полнотекстовому поиску
+    response = client.get("/literature/search", params={"q": "каренина"})
+    assert "Импорт Анна Каренина" in [item["title"] for item in response.json()]
+
+# Импорт CSV: поле в кавычках может содержать перевод строки
+def test_import_catalog_csv(db, admin_user):
+    token = authenticate_user(client, "admin", "adminpassword")
+    body = (
+        "title,author,description,available_copies\r\n"
+        'CSV Книга,CSV Автор,"Первая строка\r\nвторая строка",2\r\n'
+        "CSV Без автора,,,1\r\n"
+    )
+    # Закэшированный до импорта список сбрасывается после зафиксированной пачки
+    assert client.get("/literature/", params={"title": "CSV Книга"}).json() == []
+    response = client.post(
+        "/literature/import",
+        content=body.encode("utf-8"),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert report["errors"] == [{"line": 4, "error": "Не указан автор"}]
+
+    item = db.query(LiteratureItem).filter(LiteratureItem.title == "CSV Книга").one()
+    assert item.description == "Первая строка\nвторая строка"
+    assert item.available_copies == 2
+    assert [row["title"] for row in client.get("/literature/", params={"title": "CSV Книга"}).json()] == ["CSV Книга"]
+
+    response = client.post(
+        "/literature/import",
+        content=b"title\n",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 400
+
+# Лишняя кавычка не копит остаток файла: запись отклоняется по пределу длины, следующие строки разбираются
+def test_import_csv_unclosed_quote(monkeypatch):
+    monkeypatch.setattr(catalog_import, "MAX_CSV_RECORD_LENGTH", 64)
+
+    async def records(body: bytes):
+        async def chunks():
+            yield body
+        return [record async for record in catalog_import.iter_records(catalog_import.iter_lines(chunks()), "csv")]
+
+    body = "title,author\n\"Сломанная,Автор\n" + "".join(f"Книга {i},Автор\n" for i in range(10))
+    result = asyncio.run(records(body.encode("utf-8")))
+    assert result[0] == (2, None, "Незакрытые кавычки в CSV")
+    assert [(line, values["title"]) for line, values, _ in result[1:]] == [(i + 3, f"Книга {i}") for i in range(10)]
+
+    # Незакрытая кавычка в конце файла отклоняет только свою строку
+    result = asyncio.run(records(b'title,author\nA,B\n"C,D\nE,F\n'))
+    assert result == [
+        (2, {"title": "A", "author": "B"}, None),
+        (3, None, "Незакрытые кавычки в CSV"),
+        (4, {"title": "E", "author": "F"}, None),
+    ]
+
+# Выгрузка каталога: NDJSON и CSV с фильтрами списка книг, сжатие gzip
+def test_export_literature_items(db):
+    author = Author(name="Export Author", bio="Bio")
+    db.add(author)
+    db.commit()
+    db.add_all([
+        LiteratureItem(title=f"Export Book {i}", genre="Exportgenre", author_id=author.id, available_copies=i)
+        for i in range(3)
+    ])
+    db.commit()
+
+    response = client.get("/literature/export", params={"genre": "exportgenre"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Export Book 0", "Export Book 1", "Export Book 2"]
+    assert rows[2]["available_copies"] == 2
+    assert rows[0]["author_id"] == author.id
+
+    response = client.get(
+        "/literature/export",
+        params={"format": "csv", "genre": "exportgenre", "title": "Book 1"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["Export Book 1"]
+
+    # q=0 — явный отказ от gzip
+    response = client.get(
+        "/literature/export", params={"genre": "exportgenre"}, headers={"Accept-Encoding": "gzip;q=0, identity"}
+    )
+    assert "content-encoding" not in response.headers
+    assert len(response.text.splitlines()) == 3
+
+    assert client.get("/literature/export", params={"format": "xml"}).status_code == 400
+
+# Разбор Accept-Encoding: учитываются q-значения и "*", подстрока gzip в чужом токене не считается
+def test_accepts_gzip():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("deflate, GZIP;q=0.5")
+    assert accepts_gzip("br, *")
+    assert not accepts_gzip(None)
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.000, identity")
+    assert not accepts_gzip("*;q=0")
+    assert not accepts_gzip("gzip;q=0, *")
+    assert not accepts_gzip("gzipped, deflate")
+
+# Фильтр по диапазону дат публикации и сортировка по дате с курсором
+def test_get_literature_items_date_range_and_sort(db):
+    author = Author(name="Dated Author", bio="Bio")
+    db.add(author)
+    db.commit()
+    dates = ["1985-05-01", "1990-01-01", "1995-06-15", "2000-12-31", "2005-03-03", None, None]
+    db.add_all([
+        LiteratureItem(title=f"Dated Book {i}", genre="Datedgenre", publication_date=value, author_id=author.id)
+        for i, value in enumerate(dates)
+    ])
+    db.commit()
+
+    response = client.get("/literature/", params={
+        "genre": "datedgenre", "published_from": "1990-01-01", "published_to": "2000-12-31",
+        "sort": "-publication_date",
+    })
+    assert response.status_code == 200
+    assert [item["publication_date"] for item in response.json()] == ["2000-12-31", "1995-06-15", "1990-01-01"]
+
+    def walk(sort, limit):
+        seen = []
+        params = {"genre": "datedgenre", "sort": sort, "limit": limit}
+        while True:
+            response = client.get("/literature/", params=params)
+            seen += [(item["publication_date"], item["title"]) for item in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                return seen
+            params["cursor"] = response.headers["X-Next-Cursor"]
+
+    # Постраничный обход по дате: книги без даты идут последними, при убывании — первыми;
+    # страницы пересекают границу между книгами без даты и с датой
+    expected = [(value, f"Dated Book {i}") for i, value in enumerate(dates)]
+    for limit in (1, 2, 4):
+        assert walk("publication_date", limit) == expected
+        assert walk("-publication_date", limit) == expected[5:][::-1] + expected[:5][::-1]
+    response = client.get("/literature/", params={"genre": "datedgenre", "sort": "-publication_date", "offset": 1})
+    assert [item["publication_date"] for item in response.json()][:2] == [None, "2005-03-03"]
+
+    response = client.get("/literature/", params={"published_from": "not-a-date"})
+    assert response.status_code == 422
+
+# Разбор строковых дат публикации в поддерживаемых форматах
+def test_parse_publication_date():
+    assert parse_publication_date("2023-01-05") == date(2023, 1, 5)
+    assert parse_publication_date("05.01.2023") == date(2023, 1, 5)
+    assert parse_publication_date("1999") == date(1999, 1, 1)
+    assert parse_publication_date(" ") is None
+    with pytest.raises(ValueError):
+        parse_publication_date("весна 1999")
+
+# Метрики по шаблону маршрута: задержка, код ответа и время в базе
+def test_metrics_endpoint_reports_route_latency_and_db_time(db):
+    for _ in range(2):
+        assert client.get("/literature/?limit=5").status_code == 200
+    assert client.get("/literature/no-such-route/extra").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    samples = {}
+    for line in response.text.splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+
+    labels = 'method="GET",route="/literature/"'
+    assert samples[f'http_requests_total{{{labels},status="200"}}'] >= 2
+    assert samples[f'http_request_duration_seconds_count{{{labels}}}'] >= 2
+    assert samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] >= 2
+    assert samples[f'db_queries_total{{{labels}}}'] >= 2
+    assert samples[f'http_request_db_duration_seconds_sum{{{labels}}}'] > 0
+    assert samples['http_requests_total{method="GET",route="unmatched",status="404"}'] >= 1
+    # Сам запрос к /metrics ещё выполняется
+    assert samples['http_requests_in_flight{method="GET"}'] == 1
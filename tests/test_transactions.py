@@ -1,14 +1,22 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, async_engine
 from app.models import User, Transaction, LiteratureItem, Author
 from app.schemas.literature_item import LiteratureItemCreate
 from app.schemas.transactions import TransactionResponse
 from app.core.security import hash_password
+from app.core.logging import JsonFormatter, RequestContextFilter, StructuredQueueHandler
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from typing import Generator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import asyncio
+import httpx
+import json
+import logging
 import pytest
+import queue
 
 # Используем TestClient для тестирования FastAPI приложения
 client = TestClient(app)
@@ -160,6 +168,32 @@ def test_issue_book(db, admin_user, testuser, literature_item):
     assert transaction.literature_item_id == literature_item.id
     assert transaction.return_date is None
 
+# Выдача и возврат меняют остаток экземпляров, а с ним версию книги и ETag карточки
+def test_issue_and_return_change_item_etag(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    item_url = f"/literature/literature_items/{literature_item.id}"
+    etags = [client.get(item_url).headers["ETag"]]
+
+    response = client.post(
+        f"/transactions/issue/{literature_item.id}",
+        json={"user_id": testuser.id},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    transaction_id = response.json()["transaction_id"]
+
+    response = client.get(item_url, headers={"If-None-Match": etags[-1]})
+    assert response.status_code == 200
+    etags.append(response.headers["ETag"])
+
+    response = client.post(f"/transactions/return/{transaction_id}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+    response = client.get(item_url, headers={"If-None-Match": etags[-1]})
+    assert response.status_code == 200
+    etags.append(response.headers["ETag"])
+    assert len(set(etags)) == 3
+
 # Администратор может выдать книгу только читателю
 def test_admin_cannot_issue_book_to_themselves_or_another_admin(db, admin_user, testuser, literature_item):
     # Аутентификация администратора
@@ -373,6 +407,84 @@ def test_get_user_transactions_as_user(db, testuser, test_transactions):
         assert txn["loan_date"] == expected_txn.loan_date.isoformat()
         assert txn["return_date"] == (expected_txn.return_date.isoformat() if expected_txn.return_date else None)
 
+# История выдач: страницы по курсору от новых к старым, фильтры по состоянию и датам выдачи
+def test_get_user_transactions_paginated_and_filtered(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/transactions/transactions/{testuser.id}"
+
+    now = datetime.utcnow()
+    loans = []
+    for days_ago in [1, 1, 1, 10, 20, 30, 40]:
+        loan_date = now - timedelta(days=days_ago)
+        loans.append(Transaction(
+            user_id=testuser.id,
+            literature_item_id=literature_item.id,
+            loan_date=loan_date,
+            due_date=loan_date + timedelta(days=14),
+            return_date=loan_date + timedelta(days=5) if days_ago in (30, 40) else None,
+        ))
+    db.add_all(loans)
+    db.commit()
+    expected = [loan.id for loan in sorted(loans, key=lambda loan: (loan.loan_date, loan.id), reverse=True)]
+
+    ids = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        ids.extend(txn["id"] for txn in response.json())
+        if response.headers["X-Has-More"] == "false":
+            assert "X-Next-Cursor" not in response.headers
+            break
+        params = {"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    assert ids == expected
+
+    def fetch(**params):
+        response = client.get(url, params=params, headers=headers)
+        return [txn["id"] for txn in response.json()] if response.status_code == 200 else response.status_code
+
+    assert fetch(status="returned") == [loans[5].id, loans[6].id]
+    assert fetch(status="active") == expected[:5]
+    assert fetch(status="overdue") == [loans[4].id]
+    days_ago = lambda days: (now - timedelta(days=days)).date().isoformat()
+    assert fetch(loaned_from=days_ago(25), loaned_to=days_ago(5)) == [loans[3].id, loans[4].id]
+    assert fetch(status="returned", loaned_from=days_ago(5)) == []
+    assert fetch(status="lost") == 422
+    assert fetch(cursor="broken") == 400
+
+# expand=book: название книги, автор и срок возврата приходят одним SQL-запросом
+def test_get_user_transactions_expand_book(db, admin_user, testuser, literature_item, test_transactions):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/transactions/transactions/{testuser.id}"
+    assert client.get(url, headers=headers).status_code == 200
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, params={"expand": "book"}, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert "JOIN literature_items" in statements[0] and "JOIN authors" in statements[0]
+
+    data = response.json()
+    assert [txn["id"] for txn in data] == [txn.transaction_id for txn in test_transactions]
+    for txn in data:
+        assert txn["book"] == {"id": literature_item.id, "title": "Test Book", "author_name": "Test Author"}
+        assert txn["due_date"] is not None
+
+    # Без expand ответ прежний
+    assert "book" not in client.get(url, headers=headers).json()[0]
+    assert client.get(url, params={"expand": "author"}, headers=headers).status_code == 422
+
 # Пользователь пытается получить доступ к чужим транзакциям
 def test_unauthorized_user_access(db, testuser, admin_user):
     # Аутентификация пользователя
@@ -402,3 +514,225 @@ def test_no_transactions_found(db, admin_user):
     # Проверка, что транзакции не найдены
     assert response.status_code == 404
     assert response.json()["detail"] == "Транзакции пользователя не найдены."
+
+    # Фильтр без совпадений — пустая страница, а не отсутствие истории
+    response = client.get(
+        "/transactions/transactions/non-existent-user-id",
+        params={"status": "active"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+# Выдача и возврат книги сбрасывают кэшированную карточку с числом экземпляров
+def test_issue_and_return_invalidate_cached_item(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    item_url = f"/literature/literature_items/{literature_item.id}"
+    assert client.get(item_url).json()["available_copies"] == 1
+
+    response = client.post(f"/transactions/issue/{literature_item.id}", json={"user_id": testuser.id}, headers=headers)
+    assert response.status_code == 200
+    assert client.get(item_url).json()["available_copies"] == 0
+
+    response = client.post(f"/transactions/return/{response.json()['transaction_id']}", headers=headers)
+    assert response.status_code == 200
+    assert client.get(item_url).json()["available_copies"] == 1
+
+# Сотни одновременных выдач одной книги не списывают больше экземпляров, чем есть.
+# Гонку за строку книги (SELECT ... FOR UPDATE и условный UPDATE ... RETURNING) тест проверяет только
+# на PostgreSQL; SQLite выполняет записи по очереди под блокировкой базы, и там проверяется лишь
+# инвариант: выдач столько же, сколько было экземпляров, остальные запросы получают 404
+def test_concurrent_issues_do_not_oversell(db, admin_user, literature_item):
+    copies = 20
+    literature_item.available_copies = copies
+    readers = [User(username=f"reader{i}", hashed_password="x", role="user") for i in range(300)]
+    db.add_all(readers)
+    db.commit()
+    reader_ids = [reader.id for reader in readers]
+    book_id = literature_item.id
+
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Все запросы уходят разом в одном цикле событий и конкурируют за соединения пула
+    async def issue_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as async_client:
+            responses = await asyncio.gather(*(
+                async_client.post(f"/transactions/issue/{book_id}", json={"user_id": user_id}, headers=headers)
+                for user_id in reader_ids
+            ))
+        # Соединения, открытые в этом цикле событий, закрываются в нём же
+        await async_engine.dispose()
+        return [response.status_code for response in responses]
+
+    statuses = asyncio.run(issue_all())
+
+    assert statuses.count(200) == copies
+    assert statuses.count(404) == len(reader_ids) - copies
+    db.expire_all()
+    assert db.get(LiteratureItem, book_id).available_copies == 0
+    assert db.query(Transaction).filter(Transaction.literature_item_id == book_id).count() == copies
+
+# Пакетная выдача: доступные книги выдаются, остальные отклоняются по отдельности
+def test_issue_batch_partial_failure(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    books = [
+        LiteratureItem(title=f"Batch Book {i}", author_id=literature_item.author_id, available_copies=1)
+        for i in range(5)
+    ]
+    books[1].available_copies = 0
+    db.add_all(books)
+    db.add(Transaction(user_id=testuser.id, literature_item_id=literature_item.id))
+    db.commit()
+    book_ids = [book.id for book in books]
+
+    # Лимит: у читателя уже 1 книга, поэтому выдать можно не больше 4
+    response = client.post(
+        "/transactions/issue/batch",
+        json={"user_id": testuser.id, "book_ids": book_ids + [book_ids[0], 99999]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["issued"] == 4
+    assert [result["issued"] for result in data["results"]] == [True, False, True, True, True, False, False]
+    assert data["results"][1]["detail"] == "Книга не найдена или отсутствуют доступные экземпляры."
+    assert data["results"][5]["detail"] == "Книга уже указана в запросе."
+    assert data["results"][6]["detail"] == "Книга не найдена или отсутствуют доступные экземпляры."
+
+    # Повторная пакетная выдача упирается в лимит, а экземпляр остаётся на полке
+    extra = LiteratureItem(title="Batch Book extra", author_id=literature_item.author_id, available_copies=1)
+    db.add(extra)
+    db.commit()
+    response = client.post(
+        "/transactions/issue/batch", json={"user_id": testuser.id, "book_ids": [extra.id]}, headers=headers
+    )
+    assert response.json()["results"][0]["detail"] == "Пользователь уже имеет 5 не возвращенных книг."
+    db.expire_all()
+    assert db.get(LiteratureItem, extra.id).available_copies == 1
+    assert [db.get(LiteratureItem, book_id).available_copies for book_id in book_ids] == [0, 0, 0, 0, 0]
+    assert db.query(Transaction).filter_by(user_id=testuser.id, return_date=None).count() == 5
+
+# Пересекающиеся пакеты не списывают лишних экземпляров и не превышают лимит читателя
+def test_concurrent_overlapping_batches(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    other = User(username="otherreader", hashed_password="x", role="user")
+    books = [
+        LiteratureItem(title=f"Overlap Book {i}", author_id=literature_item.author_id, available_copies=1)
+        for i in range(6)
+    ]
+    db.add_all(books + [other])
+    db.add_all(Transaction(user_id=testuser.id, literature_item_id=literature_item.id) for _ in range(3))
+    db.commit()
+    book_ids = [book.id for book in books]
+
+    # У testuser остаётся место на 2 книги, пакеты пересекаются по двум книгам
+    batches = [(testuser.id, book_ids[:4]), (other.id, book_ids[2:])]
+
+    def issue(batch):
+        user_id, ids = batch
+        return client.post(
+            "/transactions/issue/batch", json={"user_id": user_id, "book_ids": ids}, headers=headers
+        )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        responses = list(executor.map(issue, batches))
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json()["issued"] == 2
+    db.expire_all()
+    loans = db.query(Transaction).filter(Transaction.literature_item_id.in_(book_ids)).all()
+    assert len(loans) == sum(response.json()["issued"] for response in responses)
+    assert len({loan.literature_item_id for loan in loans}) == len(loans)
+    for book_id in book_ids:
+        loaned = sum(loan.literature_item_id == book_id for loan in loans)
+        assert db.get(LiteratureItem, book_id).available_copies == 1 - loaned
+    assert db.query(Transaction).filter_by(user_id=testuser.id, return_date=None).count() == 5
+
+# Пакетный возврат: закрывает открытые выдачи и возвращает экземпляры
+def test_return_batch_partial_failure(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    literature_item.available_copies = 0
+    open_loans = [Transaction(user_id=testuser.id, literature_item_id=literature_item.id) for _ in range(2)]
+    closed_loan = Transaction(user_id=testuser.id, literature_item_id=literature_item.id, return_date=datetime.utcnow())
+    db.add_all(open_loans + [closed_loan])
+    db.commit()
+
+    transaction_ids = [open_loans[0].id, closed_loan.id, open_loans[1].id, 99999, open_loans[0].id]
+    response = client.post("/transactions/return/batch", json={"transaction_ids": transaction_ids}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["returned"] == 2
+    assert [result["detail"] for result in data["results"]] == [
+        None,
+        "Книга уже была возвращена.",
+        None,
+        "Транзакция для этой книги и пользователя не найдена.",
+        "Транзакция уже указана в запросе.",
+    ]
+    db.expire_all()
+    assert db.get(LiteratureItem, literature_item.id).available_copies == 2
+    assert db.query(Transaction).filter_by(user_id=testuser.id, return_date=None).count() == 0
+
+# Записи логов выдачи содержат идентификатор запроса, пользователя и задержку
+def test_issue_logs_carry_request_context(db, admin_user, testuser, literature_item):
+    token = authenticate_user(client, "admin", "adminpassword")
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        response = client.post(
+            f"/transactions/issue/{literature_item.id}",
+            json={"user_id": testuser.id},
+            headers={"Authorization": f"Bearer {token}", "X-Request-ID": "req-issue-1"}
+        )
+    finally:
+        root.removeHandler(handler)
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-issue-1"
+
+    issued = [json.loads(JsonFormatter().format(r)) for r in records if r.name == "app.api.v1.endpoints.transactions"]
+    assert issued
+    assert all(entry["request_id"] == "req-issue-1" for entry in issued)
+    assert all(entry["user_id"] == admin_user.id for entry in issued)
+
+    access = [json.loads(JsonFormatter().format(r)) for r in records if r.name == "app.access"]
+    assert access[-1]["status"] == 200
+    assert access[-1]["request_id"] == "req-issue-1"
+    assert access[-1]["latency_ms"] >= 0
+
+# Запись, прошедшая через очередь логов, сохраняет трассировку отдельным полем JSON
+def test_queued_log_keeps_exception_field():
+    log_queue = queue.Queue()
+    logger = logging.getLogger("tests.queued")
+    logger.propagate = False
+    handler = StructuredQueueHandler(log_queue)
+    logger.addHandler(handler)
+    try:
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            logger.exception("Failed for %s", "book 1", stack_info=True)
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert entry["message"] == "Failed for book 1"
+    assert entry["exc_info"].startswith("Traceback")
+    assert "ValueError: broken" in entry["exc_info"]
+    assert "Stack (most recent call last)" in entry["stack"]
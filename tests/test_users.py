@@ -1,10 +1,15 @@
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.session import SessionLocal
-from app.models import User
-from app.utils import hash_password
+from app.db.session import SessionLocal, get_async_database_url
+from app.models import PendingRegistration, User
+from app.core.registration import DatabaseRegistrationStore, RegistrationState, registration_store
+from app.core.security import hash_password, verify_password
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 from typing import Generator
+import asyncio
 import pytest
 
 # Используем TestClient для тестирования FastAPI приложения
@@ -98,4 +103,78 @@ def test_confirm_admin(db):
     # Проверяем, что пользователь зарегистрирован как "admin"
     user = db.query(User).filter(User.username == "newuser").first()
     assert user is not None
-    assert user.role == "admin"
\ No newline at end of file
+    assert user.role == "admin"
+
+# Между шагами хранится только хеш пароля
+def test_start_registration_stores_hashed_password(db):
+    client.post("/users/register/start", data={"username": "newuser", "password": "newpassword"})
+
+    state = asyncio.run(registration_store.get("newuser"))
+    assert state is not None
+    assert state.hashed_password != "newpassword"
+    assert verify_password("newpassword", state.hashed_password)
+
+# Регистрация одним запросом
+def test_register_single_request(db):
+    response = client.post("/users/register", json={"username": "newuser", "password": "newpassword"})
+    assert response.status_code == 200
+    assert response.json() == {"message": "Регистрация завершена. Ваша роль: читатель"}
+
+    response = client.post("/auth/login", json={"username": "newuser", "password": "newpassword"})
+    assert response.status_code == 200
+
+    # Повторная регистрация с тем же именем
+    response = client.post("/users/register", json={"username": "newuser", "password": "other"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Пользователь с таким именем уже существует"}
+
+# Администратор одним запросом — только с верным кодом
+def test_register_single_request_admin(db):
+    response = client.post(
+        "/users/register",
+        json={"username": "newadmin", "password": "newpassword", "role": "admin", "admin_code": "wrong"}
+    )
+    assert response.status_code == 400
+    assert db.query(User).filter(User.username == "newadmin").first() is None
+
+    response = client.post(
+        "/users/register",
+        json={"username": "newadmin", "password": "newpassword", "role": "admin", "admin_code": "1234567"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"message": "Регистрация завершена. Ваша роль: администратор"}
+    assert db.query(User).filter(User.username == "newadmin").first().role == "admin"
+
+# Хранилище в таблице: запись доступна до истечения срока и удаляется при следующем сохранении
+def test_database_registration_store_expires_entries(tmp_path):
+    url = f"sqlite:///{tmp_path / 'registrations.db'}"
+    sync_engine = create_engine(url)
+    PendingRegistration.__table__.create(sync_engine)
+    sync_engine.dispose()
+
+    async def scenario():
+        engine = create_async_engine(get_async_database_url(url))
+        now = [datetime(2026, 1, 1, 12, 0)]
+        store = DatabaseRegistrationStore(
+            ttl=60, session_factory=async_sessionmaker(engine, expire_on_commit=False), clock=lambda: now[0]
+        )
+        try:
+            await store.save(RegistrationState(username="pending", hashed_password="hash"))
+            state = await store.get("pending")
+            assert state.hashed_password == "hash" and state.role is None
+
+            state.role = "admin"
+            await store.save(state)
+            assert (await store.get("pending")).role == "admin"
+
+            now[0] += timedelta(seconds=61)
+            assert await store.get("pending") is None
+
+            await store.save(RegistrationState(username="other", hashed_password="hash"))
+            async with store.session_factory() as session:
+                usernames = (await session.execute(select(PendingRegistration.username))).scalars().all()
+            assert usernames == ["other"]
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())